@@ -20,12 +20,20 @@ import pickle
 import time
 
 # Configuración de upload
-UPLOAD_FOLDER = '/tmp/penal_uploads'
+UPLOAD_FOLDER = config.UPLOAD_FOLDER
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
 
 # Crear carpeta de uploads si no existe
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Caché de tracks y poses por hash del video (un clip subido de nuevo no se reprocesa)
+from result_cache import ResultCache, get_hash_path, get_video_hash, save_upload
+result_cache = ResultCache(config.RESULT_CACHE_FOLDER, config.RESULT_CACHE_MAX_MB * 1024 * 1024)
+
+# Caché de frames decodificados por video subido (la segunda pasada no vuelve a decodificar)
+from frame_cache import FrameCache, remove_frame_cache
+frame_cache = FrameCache(UPLOAD_FOLDER, config.FRAME_CACHE_WIDTH, config.FRAME_CACHE_MAX_MB * 1024 * 1024)
+
 app = Flask(__name__)
 # CORS(app)
 # Configurar CORS correctamente
@@ -61,6 +69,29 @@ if config.AWS_ACCESS_KEY_ID and config.AWS_SECRET_ACCESS_KEY:
 else:
     s3_client = boto3.client('s3', region_name=config.AWS_REGION)
 
+# Precalentar modelos YOLO en segundo plano: se cargan una vez por proceso
+# y los requests de detección reutilizan el registro (model_registry.py).
+# Con el reloader de Flask solo se precalienta en el proceso hijo, y nunca en
+# los procesos de la primera pasada por segmentos (importan este módulo al arrancar).
+import multiprocessing
+
+# Hilos de torch: son globales al proceso, así que se fijan una vez acá y no en
+# cada request (los procesos de la primera pasada por segmentos fijan los suyos)
+if multiprocessing.parent_process() is None:
+    from compute_profiles import get_compute_profile
+    from model_registry import set_torch_threads
+    set_torch_threads(config.TORCH_THREADS or get_compute_profile(config.DEFAULT_COMPUTE_PROFILE)['torch_threads'])
+
+if (config.MODEL_WARMUP and multiprocessing.parent_process() is None
+        and (not config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')):
+    import threading
+    from compute_profiles import get_compute_profile, get_warmup_specs
+    from model_registry import warmup_models
+    warmup_backend = config.INFERENCE_BACKEND or get_compute_profile(config.DEFAULT_COMPUTE_PROFILE)['backend']
+    threading.Thread(target=warmup_models,
+                     args=(get_warmup_specs(config.DEFAULT_COMPUTE_PROFILE), warmup_backend),
+                     daemon=True).start()
+
 # Headers para API-Football
 API_FOOTBALL_HEADERS = {
     'x-apisports-key': config.API_FOOTBALL_KEY
@@ -866,6 +897,26 @@ def allowed_file(filename):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def parse_motion_threshold(value):
+    """
+    Umbral de la compuerta de movimiento recibido en un request
+
+    Args:
+        value: Fracción de píxeles entre 0 y 1 (None = compuerta desactivada)
+
+    Raises:
+        ValueError: Si no es un número entre 0 y 1
+    """
+    if value is None:
+        return None
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"motion_threshold inválido: {value!r}")
+    if not 0 <= threshold <= 1:
+        raise ValueError(f"motion_threshold debe estar entre 0 y 1: {value!r}")
+    return threshold
+
 # ==================== ENDPOINTS DE VIDEO UPLOAD ====================
 
 @app.route('/api/upload/video', methods=['POST'])
@@ -891,7 +942,8 @@ def upload_video():
         # Guardar archivo con nombre seguro
         filename = f"penalty_{penalty_id}_temp.mp4"
         filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        # Se hashea mientras se escribe (clave del caché de resultados)
+        content_hash = save_upload(file, filepath)
         
         # Obtener info del video
         cap = cv2.VideoCapture(filepath)
@@ -909,6 +961,9 @@ def upload_video():
             'success': True,
             'filename': filename,
             'filepath': filepath,
+            'content_hash': content_hash,
+            # Ya procesado antes: la detección y las poses salen del caché
+            'cached_results': result_cache.has_results(content_hash),
             'video_info': {
                 'width': width,
                 'height': height,
@@ -946,20 +1001,52 @@ def detect_players():
         import numpy as np
         sys.path.append(os.path.dirname(__file__))
         from detector import FootballPlayerDetector
+        from track_timeline import get_timeline_path
+        from track_poses import get_poses_path
+        
+        # Perfil de cómputo: 'fast', 'balanced' o 'accurate'
+        profile = data.get('profile') or config.DEFAULT_COMPUTE_PROFILE
         
-        # Crear detector
-        detector = FootballPlayerDetector(confidence_threshold=0.4)
+        # Detección cada N frames (1 = todos); si no se indica, la define el perfil
+        detection_stride = data.get('detection_stride')
+        if detection_stride is not None:
+            detection_stride = max(1, int(detection_stride))
         
-        # Ruta para video procesado
+        # Crear detector (los modelos vienen del registro, no se recargan)
+        try:
+            detector = FootballPlayerDetector.from_profile(
+                profile, confidence_threshold=0.4, detection_stride=detection_stride,
+                backend=config.INFERENCE_BACKEND, selection_policy=data.get('selection_policy'),
+                motion_threshold=parse_motion_threshold(data.get('motion_threshold', config.MOTION_THRESHOLD)),
+                pose_all_tracks=bool(data.get('pose_all_tracks', config.POSE_ALL_TRACKS)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Ruta para video procesado (se renderiza recién cuando se pide)
         processed_video_path = os.path.join(UPLOAD_FOLDER, f"penalty_{penalty_id}_detected.mp4")
         
-        # Procesar video (primera pasada) - AHORA GUARDA EL VIDEO
+        # Procesar video (primera pasada) - guarda los tracks por frame, que se
+        # usan para el overlay, el video anotado y la segunda pasada
         detected_ids = detector.process_video_first_pass(
             video_path=filepath,
-            output_path=processed_video_path,  # Guardar video con detecciones
-            show_video=False   # No mostrar ventana
+            show_video=False,   # No mostrar ventana
+            timeline_path=get_timeline_path(filepath),
+            num_workers=config.FIRST_PASS_WORKERS,  # Segmentos en paralelo para videos largos
+            cache=result_cache.entry(get_video_hash(filepath), detector.result_cache_settings(frame_cache)),
+            poses_path=get_poses_path(filepath),  # Poses de todos los tracks (pose_all_tracks)
+            frame_cache=frame_cache  # Frames decodificados para la segunda pasada
         )
         
+        # Los tracks cambiaron: el video anotado anterior ya no corresponde
+        if os.path.exists(processed_video_path):
+            os.remove(processed_video_path)
+        
+        # Con render_video el video anotado se genera acá y un error de render
+        # llega en esta respuesta; si no, se genera cuando se pide
+        processed_video = {}
+        if data.get('render_video', config.RENDER_DETECTED_VIDEO):
+            processed_video = render_processed_video(processed_video_path, filepath)
+        
         # Obtener estadísticas
         stats = detector.calculate_statistics()
         
@@ -969,13 +1056,14 @@ def detect_players():
                              for k, v in stats.items()}
         
         print(f"✅ Detección completada. IDs encontrados: {detected_ids_list}")
-        print(f"📹 Video procesado guardado en: {processed_video_path}")
         
         return jsonify({
             'success': True,
             'detected_player_ids': detected_ids_list,
             'stats': stats_serializable,
-            'processed_video_filename': os.path.basename(processed_video_path)
+            'processed_video_filename': os.path.basename(processed_video_path),
+            **processed_video,
+            'overlay_url': f"/api/video/overlay/{os.path.basename(filepath)}"
         }), 200
         
     except Exception as e:
@@ -1005,27 +1093,61 @@ def extract_postures():
         import sys
         sys.path.append(os.path.dirname(__file__))
         from detector import FootballPlayerDetector
+        from track_timeline import get_timeline_path
+        from track_poses import get_poses_path
+        
+        # Perfil de cómputo: 'fast', 'balanced' o 'accurate'
+        profile = data.get('profile') or config.DEFAULT_COMPUTE_PROFILE
         
-        # Crear detector
-        detector = FootballPlayerDetector(confidence_threshold=0.4)
+        # Detección cada N frames (1 = todos); si no se indica, la define el perfil
+        detection_stride = data.get('detection_stride')
+        if detection_stride is not None:
+            detection_stride = max(1, int(detection_stride))
+        
+        # Crear detector (los modelos vienen del registro, no se recargan)
+        try:
+            detector = FootballPlayerDetector.from_profile(
+                profile, confidence_threshold=0.4, detection_stride=detection_stride,
+                backend=config.INFERENCE_BACKEND, selection_policy=data.get('selection_policy'),
+                motion_threshold=parse_motion_threshold(data.get('motion_threshold', config.MOTION_THRESHOLD)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Frames a procesar después del remate (negativo = procesar todo el video)
+        try:
+            kick_tail_frames = int(data.get('kick_tail_frames', config.KICK_TAIL_FRAMES))
+        except (TypeError, ValueError):
+            return jsonify({'error': f"kick_tail_frames inválido: {data.get('kick_tail_frames')!r}"}), 400
+        kick_tail_frames = kick_tail_frames if kick_tail_frames >= 0 else None
         
-        # CSV temporal
-        csv_path = os.path.join(UPLOAD_FOLDER, f"penalty_{penalty_id}_postures.csv")
+        # Keypoints temporales (.npy escrito frame a frame, sin CSV intermedio)
+        from keypoint_store import KEYPOINTS_SUFFIX
+        keypoints_path = os.path.join(UPLOAD_FOLDER, f"penalty_{penalty_id}_postures{KEYPOINTS_SUFFIX}")
         
-        # Procesar video (segunda pasada)
+        # Procesar video (segunda pasada) reutilizando los tracks de la primera
         player_usage_stats, total_frames = detector.process_video_second_pass(
             video_path=filepath,
             selected_player_ids=selected_player_ids,
-            csv_output_path=csv_path
+            keypoints_output_path=keypoints_path,
+            timeline_path=get_timeline_path(filepath),
+            kicker_foot=data.get('player_foot'),
+            kick_tail_frames=kick_tail_frames,
+            cache=result_cache.entry(get_video_hash(filepath), detector.result_cache_settings(frame_cache)),
+            poses_path=get_poses_path(filepath),
+            frame_cache=frame_cache
         )
         
-        print(f"✅ Extracción completada. CSV guardado en: {csv_path}")
+        print(f"✅ Extracción completada. Keypoints guardados en: {keypoints_path}")
         
         return jsonify({
             'success': True,
-            'csv_path': csv_path,
+            'keypoints_path': keypoints_path,
+            'csv_path': keypoints_path,  # Compatibilidad: /api/insert/postures acepta ambos
             'player_usage_stats': player_usage_stats,
-            'total_frames': total_frames
+            'total_frames': total_frames,
+            'kick_frame': detector.kick_frame,
+            'stats': detector.stage_statistics(),
+            'profile': profile
         }), 200
         
     except Exception as e:
@@ -1034,12 +1156,93 @@ def extract_postures():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+DETECTED_VIDEO_SUFFIX = '_detected.mp4'
+UPLOADED_VIDEO_SUFFIX = '_temp.mp4'
+
+# Locks para generar cada video anotado una sola vez entre requests simultáneos
+# (se elige uno por hash de la ruta: cantidad fija, sin crecer por video)
+import threading
+_render_locks = [threading.Lock() for _ in range(16)]
+
+def render_detected_video(filepath, video_path=None):
+    """
+    Genera el video anotado (*_detected.mp4) desde el timeline de la primera pasada
+    
+    Solo dibuja los tracks guardados (track_rendering.py): no carga modelos.
+    El video se escribe en un temporal único de UPLOAD_FOLDER y se mueve al
+    terminar; si el render falla, el temporal se elimina.
+    
+    Args:
+        filepath: Ruta del video anotado
+        video_path: Video subido (None = se deduce del nombre del video anotado)
+    
+    Raises:
+        FileNotFoundError: Si no existe el video subido o sus tracks
+        ValueError: Si los tracks no corresponden al video o no se puede abrir
+    """
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from track_rendering import render_timeline_video
+    from track_timeline import get_timeline_path
+    
+    if video_path is None:
+        video_path = filepath[:-len(DETECTED_VIDEO_SUFFIX)] + UPLOADED_VIDEO_SUFFIX
+    timeline_path = get_timeline_path(video_path)
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"No existe el video subido: {os.path.basename(video_path)}")
+    if not os.path.exists(timeline_path):
+        raise FileNotFoundError(f"No hay detecciones para {os.path.basename(video_path)}: "
+                                f"ejecutar primero la detección de jugadores")
+    
+    with _render_locks[hash(filepath) % len(_render_locks)]:
+        # Otro request pudo generarlo mientras se esperaba el lock
+        if os.path.exists(filepath):
+            return filepath
+        
+        fd, partial_path = tempfile.mkstemp(suffix='.partial.mp4', dir=UPLOAD_FOLDER)
+        os.close(fd)
+        try:
+            render_timeline_video(video_path, partial_path, timeline_path)
+            os.replace(partial_path, filepath)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    
+    print(f"📹 Video anotado generado: {filepath}")
+    return filepath
+
+def render_processed_video(processed_video_path, video_path):
+    """
+    Genera el video anotado dentro de la respuesta de detección (render_video)
+    
+    Returns:
+        Campos para la respuesta: el error del render si falló (la detección
+        ya está guardada, así que no se descarta)
+    """
+    try:
+        render_detected_video(processed_video_path, video_path)
+        return {'processed_video_ready': True}
+    except Exception as e:
+        print(f"❌ Error generando el video anotado: {e}")
+        return {'processed_video_ready': False, 'processed_video_error': str(e)}
+
 @app.route('/api/video/temp/<filename>')
 def serve_temp_video(filename):
-    """Sirve un video temporal subido"""
+    """Sirve un video temporal subido (el video anotado se genera al pedirlo)"""
     try:
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         
+        if not os.path.exists(filepath) and filename.endswith(DETECTED_VIDEO_SUFFIX):
+            try:
+                render_detected_video(filepath)
+            except (FileNotFoundError, ValueError) as e:
+                return jsonify({'error': str(e)}), 404
+            except Exception as e:
+                print(f"❌ Error generando el video anotado {filename}: {e}")
+                import traceback
+                traceback.print_exc()
+                return jsonify({'error': f'No se pudo generar el video anotado: {e}'}), 500
+        
         if not os.path.exists(filepath):
             return jsonify({'error': 'Video no encontrado'}), 404
         
@@ -1052,6 +1255,42 @@ def serve_temp_video(filename):
     except Exception as e:
         print(f"Error sirviendo video temporal: {e}")
         return jsonify({'error': str(e)}), 500
+
+@app.route('/api/video/overlay/<filename>')
+def get_video_overlay(filename):
+    """Cajas e IDs de la primera pasada para dibujar sobre el video en el frontend"""
+    try:
+        import sys
+        import cv2
+        sys.path.append(os.path.dirname(__file__))
+        from track_timeline import TrackTimeline, get_timeline_path
+        
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        
+        if not os.path.exists(filepath):
+            return jsonify({'error': 'Video no encontrado'}), 404
+        
+        timeline = TrackTimeline.load(get_timeline_path(filepath), filepath)
+        if timeline is None:
+            return jsonify({'error': 'No hay detecciones para este video'}), 404
+        
+        cap = cv2.VideoCapture(filepath)
+        video_info = {
+            'fps': cap.get(cv2.CAP_PROP_FPS),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        }
+        cap.release()
+        
+        return jsonify({
+            'success': True,
+            **video_info,
+            **timeline.to_overlay()
+        }), 200
+        
+    except Exception as e:
+        print(f"Error en get_video_overlay: {e}")
+        return jsonify({'error': str(e)}), 500
     
 # ==================== ENDPOINTS DE INSERCIÓN ====================
 
@@ -1211,30 +1450,25 @@ def insert_penalty():
 
 @app.route('/api/insert/postures', methods=['POST'])
 def insert_postures():
-    """Inserta posturas desde un archivo CSV"""
+    """Inserta posturas desde el archivo de keypoints de la segunda pasada"""
     try:
         data = request.json
         penalty_id = data.get('penalty_id')
-        csv_path = data.get('csv_path')
+        # Archivo de keypoints (.npy) de la segunda pasada; csv_path se mantiene
+        # por compatibilidad y también acepta un CSV histórico
+        keypoints_path = data.get('keypoints_path') or data.get('csv_path')
         
-        if not os.path.exists(csv_path):
-            return jsonify({'error': 'Archivo CSV no encontrado'}), 404
-        
-        import pandas as pd
-        import numpy as np
+        if not keypoints_path or not os.path.exists(keypoints_path):
+            return jsonify({'error': 'Archivo de posturas no encontrado'}), 404
         
-        # Leer CSV
-        df = pd.read_csv(csv_path)
-        
-        # CRÍTICO: Reemplazar NaN con None (null en SQL)
-        df = df.replace({np.nan: None})
+        from keypoint_store import iter_posture_rows
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Insertar cada frame
+        # Insertar cada frame (NaN -> None, null en SQL)
         inserted_count = 0
-        for _, row in df.iterrows():
+        for frame, values in iter_posture_rows(keypoints_path):
             cursor.execute("""
                 INSERT INTO postures (
                     penalty_id, frame,
@@ -1265,24 +1499,7 @@ def insert_postures():
                     %s, %s, %s
                 )
             """, (
-                penalty_id, int(row['frame']),
-                row['nose_x'], row['nose_y'], row['nose_confidence'],
-                row['left_eye_x'], row['left_eye_y'], row['left_eye_confidence'],
-                row['right_eye_x'], row['right_eye_y'], row['right_eye_confidence'],
-                row['left_ear_x'], row['left_ear_y'], row['left_ear_confidence'],
-                row['right_ear_x'], row['right_ear_y'], row['right_ear_confidence'],
-                row['left_shoulder_x'], row['left_shoulder_y'], row['left_shoulder_confidence'],
-                row['right_shoulder_x'], row['right_shoulder_y'], row['right_shoulder_confidence'],
-                row['left_elbow_x'], row['left_elbow_y'], row['left_elbow_confidence'],
-                row['right_elbow_x'], row['right_elbow_y'], row['right_elbow_confidence'],
-                row['left_wrist_x'], row['left_wrist_y'], row['left_wrist_confidence'],
-                row['right_wrist_x'], row['right_wrist_y'], row['right_wrist_confidence'],
-                row['left_hip_x'], row['left_hip_y'], row['left_hip_confidence'],
-                row['right_hip_x'], row['right_hip_y'], row['right_hip_confidence'],
-                row['left_knee_x'], row['left_knee_y'], row['left_knee_confidence'],
-                row['right_knee_x'], row['right_knee_y'], row['right_knee_confidence'],
-                row['left_ankle_x'], row['left_ankle_y'], row['left_ankle_confidence'],
-                row['right_ankle_x'], row['right_ankle_y'], row['right_ankle_confidence']
+                penalty_id, frame, *values
             ))
             inserted_count += 1
         
@@ -1335,6 +1552,16 @@ def upload_video_to_s3():
             if os.path.exists(original_video_path):
                 os.remove(original_video_path)
                 print(f"🗑️ Archivo temporal eliminado: {original_video_path}")
+            
+            from track_timeline import get_timeline_path
+            from track_poses import get_poses_path
+            for sidecar_path in (get_timeline_path(original_video_path), get_poses_path(original_video_path),
+                                 get_hash_path(original_video_path)):
+                if os.path.exists(sidecar_path):
+                    os.remove(sidecar_path)
+                    print(f"🗑️ Archivo temporal eliminado: {sidecar_path}")
+            for frame_cache_path in remove_frame_cache(original_video_path):
+                print(f"🗑️ Archivo temporal eliminado: {frame_cache_path}")
         except Exception as e:
             print(f"⚠️ Error al eliminar archivo temporal: {e}")
         
@@ -1375,7 +1602,8 @@ def prediction_upload_video():
         temp_id = str(uuid.uuid4())
         filename = f"prediction_{temp_id}_temp.mp4"
         filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        # Se hashea mientras se escribe (clave del caché de resultados)
+        content_hash = save_upload(file, filepath)
         
         # Obtener info del video
         cap = cv2.VideoCapture(filepath)
@@ -1394,6 +1622,9 @@ def prediction_upload_video():
             'temp_id': temp_id,
             'filename': filename,
             'filepath': filepath,
+            'content_hash': content_hash,
+            # Ya procesado antes: la detección y las poses salen del caché
+            'cached_results': result_cache.has_results(content_hash),
             'video_info': {
                 'width': width,
                 'height': height,
@@ -1426,20 +1657,51 @@ def prediction_detect_players():
         import sys
         sys.path.append(os.path.dirname(__file__))
         from detector import FootballPlayerDetector
+        from track_timeline import get_timeline_path
+        from track_poses import get_poses_path
+        
+        # Perfil de cómputo: 'fast', 'balanced' o 'accurate'
+        profile = data.get('profile') or config.DEFAULT_COMPUTE_PROFILE
         
-        # Crear detector
-        detector = FootballPlayerDetector(confidence_threshold=0.4)
+        # Detección cada N frames (1 = todos); si no se indica, la define el perfil
+        detection_stride = data.get('detection_stride')
+        if detection_stride is not None:
+            detection_stride = max(1, int(detection_stride))
         
-        # Ruta para video procesado
+        # Crear detector (los modelos vienen del registro, no se recargan)
+        try:
+            detector = FootballPlayerDetector.from_profile(
+                profile, confidence_threshold=0.4, detection_stride=detection_stride,
+                backend=config.INFERENCE_BACKEND, selection_policy=data.get('selection_policy'),
+                motion_threshold=parse_motion_threshold(data.get('motion_threshold', config.MOTION_THRESHOLD)),
+                pose_all_tracks=bool(data.get('pose_all_tracks', config.POSE_ALL_TRACKS)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Ruta para video procesado (se renderiza recién cuando se pide)
         processed_video_path = os.path.join(UPLOAD_FOLDER, f"prediction_{temp_id}_detected.mp4")
         
         # Procesar video (primera pasada)
         detected_ids = detector.process_video_first_pass(
             video_path=filepath,
-            output_path=processed_video_path,
-            show_video=False
+            show_video=False,
+            timeline_path=get_timeline_path(filepath),
+            num_workers=config.FIRST_PASS_WORKERS,
+            cache=result_cache.entry(get_video_hash(filepath), detector.result_cache_settings(frame_cache)),
+            poses_path=get_poses_path(filepath),
+            frame_cache=frame_cache
         )
         
+        # Los tracks cambiaron: el video anotado anterior ya no corresponde
+        if os.path.exists(processed_video_path):
+            os.remove(processed_video_path)
+        
+        # Con render_video el video anotado se genera acá y un error de render
+        # llega en esta respuesta; si no, se genera cuando se pide
+        processed_video = {}
+        if data.get('render_video', config.RENDER_DETECTED_VIDEO):
+            processed_video = render_processed_video(processed_video_path, filepath)
+        
         # Obtener estadísticas
         stats = detector.calculate_statistics()
         
@@ -1454,7 +1716,9 @@ def prediction_detect_players():
             'success': True,
             'detected_player_ids': detected_ids_list,
             'stats': stats_serializable,
-            'processed_video_filename': os.path.basename(processed_video_path)
+            'processed_video_filename': os.path.basename(processed_video_path),
+            **processed_video,
+            'overlay_url': f"/api/video/overlay/{os.path.basename(filepath)}"
         }), 200
         
     except Exception as e:
@@ -1489,23 +1753,56 @@ def prediction_extract_and_predict():
         import sys
         sys.path.append(os.path.dirname(__file__))
         from detector import FootballPlayerDetector
+        from track_timeline import get_timeline_path
+        from track_poses import get_poses_path
+        
+        # Perfil de cómputo: 'fast', 'balanced' o 'accurate'
+        profile = data.get('profile') or config.DEFAULT_COMPUTE_PROFILE
         
-        detector = FootballPlayerDetector(confidence_threshold=0.4)
+        # Detección cada N frames (1 = todos); si no se indica, la define el perfil
+        detection_stride = data.get('detection_stride')
+        if detection_stride is not None:
+            detection_stride = max(1, int(detection_stride))
+        
+        # Crear detector (los modelos vienen del registro, no se recargan)
+        try:
+            detector = FootballPlayerDetector.from_profile(
+                profile, confidence_threshold=0.4, detection_stride=detection_stride,
+                backend=config.INFERENCE_BACKEND, selection_policy=data.get('selection_policy'),
+                motion_threshold=parse_motion_threshold(data.get('motion_threshold', config.MOTION_THRESHOLD)))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Frames a procesar después del remate (negativo = procesar todo el video)
+        try:
+            kick_tail_frames = int(data.get('kick_tail_frames', config.KICK_TAIL_FRAMES))
+        except (TypeError, ValueError):
+            return jsonify({'error': f"kick_tail_frames inválido: {data.get('kick_tail_frames')!r}"}), 400
+        kick_tail_frames = kick_tail_frames if kick_tail_frames >= 0 else None
         
-        # CSV temporal
-        csv_path = os.path.join(UPLOAD_FOLDER, f"prediction_{temp_id}_postures.csv")
+        # Keypoints temporales (.npy escrito frame a frame, sin CSV intermedio)
+        from keypoint_store import KEYPOINTS_SUFFIX
+        keypoints_path = os.path.join(UPLOAD_FOLDER, f"prediction_{temp_id}_postures{KEYPOINTS_SUFFIX}")
+        timeline_path = get_timeline_path(filepath)
         
-        # Procesar video (segunda pasada)
+        # Procesar video (segunda pasada) reutilizando los tracks de la primera
         player_usage_stats, total_frames = detector.process_video_second_pass(
             video_path=filepath,
             selected_player_ids=selected_player_ids,
-            csv_output_path=csv_path
+            keypoints_output_path=keypoints_path,
+            timeline_path=timeline_path,
+            kicker_foot=player_foot,
+            kick_tail_frames=kick_tail_frames,
+            cache=result_cache.entry(get_video_hash(filepath), detector.result_cache_settings(frame_cache)),
+            poses_path=get_poses_path(filepath),
+            frame_cache=frame_cache
         )
         
-        print(f"✅ Extracción completada. CSV guardado en: {csv_path}")
+        print(f"✅ Extracción completada. Keypoints guardados en: {keypoints_path}")
         
-        # 2. CARGAR CSV Y PREPARAR DATOS
-        df = pd.read_csv(csv_path)
+        # 2. CARGAR KEYPOINTS (mapeados en memoria) Y PREPARAR DATOS
+        from keypoint_store import keypoints_to_dataframe, load_keypoints
+        df = keypoints_to_dataframe(load_keypoints(keypoints_path))
         
         # Renombrar columnas al formato esperado por el modelo
         column_mapping = {
@@ -1687,9 +1984,20 @@ def prediction_extract_and_predict():
             if os.path.exists(filepath):
                 os.remove(filepath)
                 print(f"🗑️ Eliminado: {filepath}")
-            if os.path.exists(csv_path):
-                os.remove(csv_path)
-                print(f"🗑️ Eliminado: {csv_path}")
+            if os.path.exists(keypoints_path):
+                os.remove(keypoints_path)
+                print(f"🗑️ Eliminado: {keypoints_path}")
+            if os.path.exists(timeline_path):
+                os.remove(timeline_path)
+                print(f"🗑️ Eliminado: {timeline_path}")
+            if os.path.exists(get_poses_path(filepath)):
+                os.remove(get_poses_path(filepath))
+                print(f"🗑️ Eliminado: {get_poses_path(filepath)}")
+            for frame_cache_path in remove_frame_cache(filepath):
+                print(f"🗑️ Eliminado: {frame_cache_path}")
+            if os.path.exists(get_hash_path(filepath)):
+                os.remove(get_hash_path(filepath))
+                print(f"🗑️ Eliminado: {get_hash_path(filepath)}")
             processed_video = os.path.join(UPLOAD_FOLDER, f"prediction_{temp_id}_detected.mp4")
             if os.path.exists(processed_video):
                 os.remove(processed_video)
@@ -1703,6 +2011,8 @@ def prediction_extract_and_predict():
             'success': True,
             'total_frames': int(total_frames_count),
             'player_foot': player_foot,
+            'kick_frame': detector.kick_frame,
+            'profile': profile,
             'height_probabilities': height_probabilities,
             'side_probabilities': side_probabilities,
             'height_distribution': height_distribution,
@@ -0,0 +1,662 @@
+"""
+Benchmarks del detector de jugadores
+python benchmark.py pose .\videos_limpios\1.mp4 --batch-sizes 1 8 16
+python benchmark.py tracker --players 22 --referees 3 --staff 10
+python benchmark.py backends .\videos_limpios\1.mp4 --backends torch onnx openvino
+python benchmark.py suite --resolutions 1280x720 1920x1080 --frames 125 250 --profiles fast balanced --json suite.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from compute_profiles import COMPUTE_PROFILES, get_compute_profile, get_warmup_specs
+from detector import FootballPlayerDetector, PlayerTracker
+from model_registry import INFERENCE_BACKENDS, set_torch_threads, warmup_models
+from track_timeline import TrackTimeline, get_timeline_path, _box_iou
+
+# Carpeta donde se guardan (y reutilizan) los clips sintéticos de la suite
+SYNTHETIC_CLIPS_FOLDER = os.path.join(tempfile.gettempdir(), 'penal_benchmark_clips')
+
+# Tolerancias de paridad de un backend contra la referencia (benchmark.py backends)
+PARITY_MIN_BOX_IOU = 0.9
+PARITY_MAX_KEYPOINT_ERROR_PX = 5.0
+PARITY_MAX_COUNT_MISMATCH_FRACTION = 0.05  # Frames con distinta cantidad de personas
+
+
+def _quiet(func, *args, **kwargs):
+    """Ejecuta una función descartando los prints de progreso"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+# Umbral de confianza de la ruta de pose original (modelo y keypoints)
+ORIGINAL_POSE_CONF = 0.3
+
+
+class OriginalPoseDetector(FootballPlayerDetector):
+    """
+    Detector con la ruta de pose original, como referencia del benchmark de pose:
+    una llamada al modelo por recorte, con el recorte sin letterbox y el
+    preprocesamiento propio de YOLO (imgsz por defecto)
+    """
+
+    def prepare_pose_crop(self, frame, bbox):
+        # El recorte se hace recién al llamar al modelo, como en get_pose_for_player original
+        return frame, bbox
+
+    def get_poses_batch(self, crops):
+        keypoints = np.full((len(crops), 17, 3), np.nan, dtype=np.float32)
+        for i, crop in enumerate(crops):
+            if crop is not None:
+                keypoints[i] = self.get_original_pose(*crop)
+        return keypoints
+
+    def get_original_pose(self, frame, bbox):
+        """
+        Keypoints (17, 3) de un jugador con la ruta original (NaN si no se detectan)
+        """
+        x1, y1, x2, y2 = map(int, bbox)
+
+        # Expandir ligeramente la región de interés
+        height, width = frame.shape[:2]
+        margin = 20
+        x1 = max(0, x1 - margin)
+        y1 = max(0, y1 - margin)
+        x2 = min(width, x2 + margin)
+        y2 = min(height, y2 + margin)
+
+        keypoints = np.full((17, 3), np.nan, dtype=np.float32)
+        player_region = frame[y1:y2, x1:x2]
+        if player_region.size == 0:
+            return keypoints
+
+        with self.stage_stats.time('pose', 1), self.pose_lock:
+            pose_results = self.pose_model(player_region, conf=ORIGINAL_POSE_CONF, verbose=False)
+
+        for result in pose_results:
+            if result.keypoints is not None and len(result.keypoints.data) > 0:
+                keypoints[:] = result.keypoints.data[0].cpu().numpy()
+                keypoints[:, 0] += x1
+                keypoints[:, 1] += y1
+                break
+
+        keypoints[~(keypoints[:, 2] > ORIGINAL_POSE_CONF)] = np.nan
+        return keypoints
+
+
+def _time_second_pass(detector, video_path, player_ids, timeline_path, keypoints_path, repeat):
+    """Segundos de la segunda pasada más rápida de repeat ejecuciones"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _quiet(detector.process_video_second_pass, video_path, player_ids,
+               keypoints_output_path=keypoints_path, timeline_path=timeline_path)
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed)
+
+
+def benchmark_pose(video_path, batch_sizes, player_ids=None, repeat=1):
+    """
+    Compara la segunda pasada con la ruta de pose original (una llamada
+    get_pose por recorte, ver OriginalPoseDetector) y con distintos tamaños
+    de lote del recorte letterbox actual
+
+    Usa el timeline de la primera pasada para que solo se mida la pose. Si el
+    video no tiene sidecar de tracks se genera en una carpeta temporal: junto
+    al video no se escribe nada.
+
+    Returns:
+        Lista de resultados [{'pose_path', 'pose_batch_size', 'seconds', 'clips_per_minute',
+        'speedup_vs_original'}, ...]; el primero es la ruta original
+    """
+    detector = FootballPlayerDetector()
+    work_dir = tempfile.mkdtemp(prefix='penal_benchmark_')
+    keypoints_path = os.path.join(work_dir, 'keypoints.npy')
+    results = []
+
+    try:
+        # Un sidecar existente solo se lee
+        timeline_path = get_timeline_path(video_path)
+        if TrackTimeline.load(timeline_path, video_path) is None:
+            print("🔍 Generando timeline de tracks (primera pasada)...")
+            timeline_path = os.path.join(work_dir, 'tracks.npz')
+            _quiet(detector.process_video_first_pass, video_path, show_video=False,
+                   timeline_path=timeline_path)
+
+        if not player_ids:
+            timeline = TrackTimeline.load(timeline_path, video_path)
+            player_ids = sorted(timeline.unique_track_ids())[:3]
+
+        original = OriginalPoseDetector()
+        configs = [('original', original, 1)] + [('batched', detector, size) for size in batch_sizes]
+        for pose_path, pose_detector, batch_size in configs:
+            pose_detector.pose_batch_size = batch_size
+            seconds = _time_second_pass(pose_detector, video_path, player_ids, timeline_path,
+                                        keypoints_path, repeat)
+            results.append({
+                'pose_path': pose_path,
+                'pose_batch_size': batch_size,
+                'seconds': seconds,
+                'clips_per_minute': 60.0 / seconds if seconds > 0 else float('inf'),
+                'speedup_vs_original': results[0]['seconds'] / seconds if results and seconds > 0 else 1.0
+            })
+            label = 'Original (por recorte)' if pose_path == 'original' else f"Lote {batch_size:>3}"
+            print(f"🦴 {label:<22}: {seconds:.2f}s por clip | {results[-1]['clips_per_minute']:.1f} clips/min | "
+                  f"x{results[-1]['speedup_vs_original']:.2f} vs original")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return results
+
+
+def sample_video_frames(video_path, n_frames):
+    """
+    Lee n_frames frames distribuidos uniformemente a lo largo del video
+    """
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for idx in np.linspace(0, max(total - 1, 0), n_frames).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _run_backend(detector, frames, reference_boxes, repeat):
+    """
+    Detección frame a frame y pose sobre las cajas de referencia
+    (sin referencia, la pose se calcula sobre las cajas detectadas)
+
+    Returns:
+        (cajas por frame, keypoints (N, 17, 3), segundos de detección, segundos de pose)
+    """
+    detection_times, pose_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        boxes = [np.array(detector.detect_players_in_frames([frame])[0]).reshape(-1, 5) for frame in frames]
+        detection_times.append(time.perf_counter() - start)
+
+    pose_boxes = boxes if reference_boxes is None else reference_boxes
+    crops = [detector.prepare_pose_crop(frame, box[:4])
+             for frame, frame_boxes in zip(frames, pose_boxes) for box in frame_boxes]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        keypoints = detector.get_poses_batch(crops)
+        pose_times.append(time.perf_counter() - start)
+
+    return boxes, keypoints, min(detection_times), min(pose_times)
+
+
+def benchmark_backends(video_path, backends, n_frames=32, repeat=3, profile=None):
+    """
+    Compara backends de inferencia (torch, onnx, openvino) en frames del video
+
+    El primer backend es la referencia: la pose de todos los backends se
+    calcula sobre sus cajas, así la paridad de keypoints no depende de
+    diferencias en la detección.
+
+    Returns:
+        Lista de resultados por backend con FPS de detección, recortes/s de pose
+        y diferencias contra la referencia (IoU mínimo de cajas, error de keypoints en px)
+    """
+    frames = sample_video_frames(video_path, n_frames)
+    print(f"🎞️ {len(frames)} frames de muestra de {video_path}")
+    # Mismos hilos de torch para todos los backends
+    set_torch_threads(get_compute_profile(profile)['torch_threads'])
+
+    reference = None
+    results = []
+    for backend in backends:
+        detector = _quiet(FootballPlayerDetector.from_profile, profile, backend=backend)
+        # Primera llamada fuera de la medición (inicialización del predictor)
+        _run_backend(detector, frames[:1], None, 1)
+
+        boxes, keypoints, detection_seconds, pose_seconds = _run_backend(
+            detector, frames, reference[0] if reference else None, repeat)
+        if reference is None:
+            reference = (boxes, keypoints)
+
+        # Paridad: cada caja de referencia contra la caja más parecida del backend
+        box_ious = [_box_iou(ref[:, :4], other[:, :4]).max(axis=1).min() if len(ref) and len(other) else 0.0
+                    for ref, other in zip(reference[0], boxes) if len(ref) or len(other)]
+        count_mismatches = sum(len(ref) != len(other) for ref, other in zip(reference[0], boxes))
+        both = ~np.isnan(reference[1][:, :, 0]) & ~np.isnan(keypoints[:, :, 0])
+        keypoint_error = np.abs(reference[1][both][:, :2] - keypoints[both][:, :2])
+
+        result = {
+            'backend': detector.effective_backend,
+            'requested_backend': backend,
+            'frames': len(frames),
+            'detection_fps': len(frames) / detection_seconds if detection_seconds > 0 else float('inf'),
+            'pose_crops_per_second': len(keypoints) / pose_seconds if pose_seconds > 0 else float('inf'),
+            'frames_with_count_mismatch': int(count_mismatches),
+            'min_box_iou': float(min(box_ious)) if box_ious else 1.0,
+            'max_keypoint_error_px': float(keypoint_error.max()) if keypoint_error.size else 0.0,
+            'keypoint_visibility_mismatches': int((np.isnan(reference[1][:, :, 0]) != np.isnan(keypoints[:, :, 0])).sum())
+        }
+        results.append(result)
+        loaded = '' if result['backend'] == backend else f" (cargó {result['backend']})"
+        print(f"⚙️ {backend:>8}{loaded}: detección {result['detection_fps']:.1f} FPS | "
+              f"pose {result['pose_crops_per_second']:.1f} recortes/s | "
+              f"IoU mín {result['min_box_iou']:.3f} | error keypoints {result['max_keypoint_error_px']:.2f}px")
+
+    return results
+
+
+def check_parity(results, min_box_iou=PARITY_MIN_BOX_IOU, max_keypoint_error_px=PARITY_MAX_KEYPOINT_ERROR_PX,
+                 max_count_mismatch_fraction=PARITY_MAX_COUNT_MISMATCH_FRACTION):
+    """
+    Verifica los resultados de benchmark_backends contra las tolerancias
+
+    Un backend que el registro no pudo cargar (corrió con torch) también falla:
+    sus números no miden ese backend.
+
+    Returns:
+        Lista de fallas (vacía si todos los backends están dentro de tolerancia)
+    """
+    failures = []
+    for result in results:
+        backend = result['requested_backend']
+        if result['backend'] != backend:
+            failures.append(f"{backend}: no se pudo cargar, se usó {result['backend']}")
+            continue
+        if result['min_box_iou'] < min_box_iou:
+            failures.append(f"{backend}: IoU mínimo de cajas {result['min_box_iou']:.3f} < {min_box_iou}")
+        if result['max_keypoint_error_px'] > max_keypoint_error_px:
+            failures.append(f"{backend}: error de keypoints {result['max_keypoint_error_px']:.2f}px "
+                            f"> {max_keypoint_error_px}px")
+        if result['frames_with_count_mismatch'] > max_count_mismatch_fraction * result['frames']:
+            failures.append(f"{backend}: {result['frames_with_count_mismatch']} de {result['frames']} frames "
+                            f"con distinta cantidad de personas")
+    return failures
+
+
+def report_parity(failures):
+    """
+    Imprime el resultado de check_parity
+
+    Returns:
+        Código de salida del comando (1 si hay fallas)
+    """
+    if not failures:
+        print("✅ Paridad de backends dentro de tolerancia")
+        return 0
+    for failure in failures:
+        print(f"❌ Paridad fuera de tolerancia: {failure}")
+    return 1
+
+
+def synthetic_crowd_detections(n_frames, n_people, width=1920, height=1080, miss_rate=0.05, seed=0):
+    """
+    Genera detecciones sintéticas de una escena concurrida (jugadores, árbitros, staff)
+
+    Cada persona sigue una caminata aleatoria suave; algunas detecciones
+    se pierden al azar para ejercitar el manejo de tracks perdidos.
+
+    Returns:
+        Lista (una por frame) de arrays (N, 5) [x1, y1, x2, y2, conf]
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform((50, 150), (width - 50, height - 50), size=(n_people, 2))
+    velocities = rng.normal(0, 4, size=(n_people, 2))
+    sizes = rng.uniform(60, 140, size=n_people)
+
+    frames = []
+    for _ in range(n_frames):
+        velocities = 0.9 * velocities + rng.normal(0, 1.5, size=velocities.shape)
+        positions = np.clip(positions + velocities, (50, 150), (width - 50, height - 50))
+
+        visible = rng.random(n_people) > miss_rate
+        h = sizes[visible]
+        cx, cy = positions[visible, 0], positions[visible, 1]
+        boxes = np.stack([cx - h / 5, cy - h / 2, cx + h / 5, cy + h / 2,
+                          rng.uniform(0.4, 0.95, size=len(h))], axis=1)
+        frames.append(boxes)
+
+    return frames
+
+
+def benchmark_tracker(n_players=22, n_referees=3, n_staff=10, n_frames=2000, repeat=3):
+    """
+    Micro-benchmark de PlayerTracker.update sobre escenas sintéticas concurridas
+
+    Returns:
+        Diccionario con personas por frame, ms por update y updates por segundo
+    """
+    n_people = n_players + n_referees + n_staff
+    frames = synthetic_crowd_detections(n_frames, n_people)
+
+    elapsed = []
+    for _ in range(repeat):
+        tracker = PlayerTracker(max_distance=80, max_frames_lost=15)
+        start = time.perf_counter()
+        for detections in frames:
+            tracker.update(detections)
+        elapsed.append(time.perf_counter() - start)
+
+    seconds = min(elapsed)
+    result = {
+        'people_per_frame': n_people,
+        'frames': n_frames,
+        'ms_per_update': seconds / n_frames * 1000,
+        'updates_per_second': n_frames / seconds,
+        'unique_ids': tracker.next_id - 1
+    }
+    print(f"👥 {n_people} personas/frame | {result['ms_per_update']:.3f} ms por update | "
+          f"{result['updates_per_second']:.0f} updates/s | IDs creados: {result['unique_ids']}")
+    return result
+
+
+def draw_humanoid(frame, x, y, height, phase, shirt_color):
+    """
+    Dibuja una figura humana simple (cabeza, torso, brazos y piernas) con los
+    pies en (x, y); phase anima el balanceo de brazos y piernas al correr
+    """
+    h = float(height)
+    thickness = max(2, int(round(h / 10)))
+    swing = np.sin(phase) * h * 0.18
+    hip = (x, y - h * 0.48)
+    neck = (x, y - h * 0.8)
+    head_radius = max(2, int(round(h * 0.09)))
+
+    def point(px, py):
+        return int(round(px)), int(round(py))
+
+    skin, shorts = (150, 170, 210), (40, 40, 40)
+    # Piernas
+    cv2.line(frame, point(*hip), point(x + swing, y), shorts, thickness)
+    cv2.line(frame, point(*hip), point(x - swing, y), shorts, thickness)
+    # Torso (camiseta)
+    cv2.line(frame, point(*neck), point(*hip), shirt_color, int(thickness * 2.2))
+    # Brazos (opuestos a las piernas)
+    shoulder = (x, y - h * 0.76)
+    cv2.line(frame, point(*shoulder), point(x - swing * 0.8, y - h * 0.5), skin, max(1, thickness - 1))
+    cv2.line(frame, point(*shoulder), point(x + swing * 0.8, y - h * 0.5), skin, max(1, thickness - 1))
+    # Cabeza
+    cv2.circle(frame, point(x, y - h * 0.9), head_radius, skin, -1)
+
+
+def render_synthetic_clip(path, width, height, n_frames, n_players=10, fps=25, seed=0):
+    """
+    Genera un clip sintético y determinístico de un penal
+
+    Campo con líneas, un arquero, jugadores de dos equipos que se mueven con
+    una caminata aleatoria suave y un pateador que corre hacia la pelota y
+    remata en la mitad del clip. Las figuras escalan con la resolución.
+
+    Returns:
+        Ruta del clip
+    """
+    rng = np.random.default_rng(seed)
+    scale = height / 720
+    player_height = 110 * scale
+
+    # Posiciones de los pies: jugadores afuera del área, arquero en el arco
+    positions = np.column_stack([rng.uniform(0.1, 0.9, n_players) * width,
+                                 rng.uniform(0.55, 0.95, n_players) * height])
+    velocities = np.zeros_like(positions)
+    colors = [(200, 60, 40) if i % 2 else (40, 40, 200) for i in range(n_players)]
+    ball_spot = np.array([width * 0.5, height * 0.62])
+    kicker_start = ball_spot + np.array([-width * 0.12, height * 0.2])
+    kick_frame = n_frames // 2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    try:
+        for frame_idx in range(n_frames):
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[:] = (50, 140, 60)
+            # Franjas de césped y líneas del área
+            for stripe in range(0, width, max(1, width // 8)):
+                frame[:, stripe:stripe + width // 16] = (58, 152, 68)
+            line = max(1, int(3 * scale))
+            cv2.rectangle(frame, (int(width * 0.2), int(height * 0.25)), (int(width * 0.8), int(height * 0.72)),
+                          (230, 230, 230), line)
+            cv2.rectangle(frame, (int(width * 0.38), int(height * 0.12)), (int(width * 0.62), int(height * 0.3)),
+                          (245, 245, 245), line)
+
+            # Jugadores: caminata aleatoria suave dentro del campo
+            velocities = 0.9 * velocities + rng.normal(0, 1.2 * scale, velocities.shape)
+            positions = np.clip(positions + velocities, (0.05 * width, 0.5 * height), (0.95 * width, 0.98 * height))
+            for (x, y), velocity, color in zip(positions, velocities, colors):
+                draw_humanoid(frame, x, y, player_height, frame_idx * 0.3 + np.hypot(*velocity), color)
+
+            # Arquero moviéndose sobre la línea
+            keeper_x = width * 0.5 + np.sin(frame_idx / fps * 2) * width * 0.05
+            draw_humanoid(frame, keeper_x, height * 0.3, player_height * 0.8, frame_idx * 0.2, (30, 200, 220))
+
+            # Pateador: carrera hasta la pelota y remate
+            progress = min(frame_idx / max(kick_frame, 1), 1.0)
+            kicker = kicker_start + (ball_spot - kicker_start) * progress
+            draw_humanoid(frame, kicker[0] - player_height * 0.2, kicker[1], player_height * 1.1,
+                          frame_idx * 0.6, (40, 40, 200))
+            ball = ball_spot.copy()
+            if frame_idx > kick_frame:
+                ball += np.array([width * 0.01, -height * 0.02]) * (frame_idx - kick_frame)
+            cv2.circle(frame, (int(ball[0]), int(ball[1])), max(2, int(8 * scale)), (250, 250, 250), -1)
+
+            # Ruido leve de cámara para que los frames no sean idénticos
+            frame = cv2.add(frame, rng.integers(0, 3, frame.shape, dtype=np.uint8))
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def get_synthetic_clip(width, height, n_frames, n_players=10, seed=0, folder=None):
+    """
+    Clip sintético de la suite, generándolo solo si todavía no existe
+    """
+    folder = folder or SYNTHETIC_CLIPS_FOLDER
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"synthetic_{width}x{height}_{n_frames}f_{n_players}p_s{seed}.mp4")
+    if not os.path.exists(path):
+        print(f"🎨 Generando clip sintético: {path}")
+        render_synthetic_clip(path, width, height, n_frames, n_players, seed=seed)
+    return path
+
+
+def _peak_rss_mb():
+    """Pico de memoria residente del proceso (ru_maxrss está en KB en Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_suite_case(clip_path, profile, backend):
+    """
+    Ejecuta primera y segunda pasada sobre un clip (corre en un proceso propio,
+    así el pico de RSS y los hilos de torch son de esta configuración)
+
+    Returns:
+        Diccionario con FPS y tiempos por etapa de cada pasada y pico de RSS
+    """
+    settings = get_compute_profile(profile)
+    backend = backend or settings['backend']
+    set_torch_threads(settings['torch_threads'])
+    detector = _quiet(FootballPlayerDetector.from_profile, profile, backend=backend)
+    # La inicialización de los predictores no entra en la medición
+    _quiet(warmup_models, get_warmup_specs(profile), backend)
+
+    work_dir = tempfile.mkdtemp(prefix='penal_benchmark_')
+    timeline_path = os.path.join(work_dir, 'tracks.npz')
+    try:
+        start = time.perf_counter()
+        detected_ids = _quiet(detector.process_video_first_pass, clip_path, show_video=False,
+                              timeline_path=timeline_path)
+        first_seconds = time.perf_counter() - start
+        first_frames = len(detector.player_counts)
+        first_stages = detector.stage_summary
+
+        # Candidatos: los 3 tracks más largos (como un usuario eligiendo al pateador)
+        timeline = TrackTimeline.load(timeline_path, clip_path)
+        track_ids, lengths = np.unique(timeline.track_ids, return_counts=True) if timeline is not None else ([], [])
+        selected_ids = [int(track_id) for track_id in np.asarray(track_ids)[np.argsort(lengths)[::-1][:3]]]
+
+        # Sin tracks (ej: pesos que no detectan las figuras) la segunda pasada
+        # se mide en modo live: detección y tracking frame a frame
+        second_mode = 'timeline' if selected_ids else 'live'
+        start = time.perf_counter()
+        _, second_frames = _quiet(detector.process_video_second_pass, clip_path, selected_ids or [1],
+                                  keypoints_output_path=os.path.join(work_dir, 'keypoints.npy'),
+                                  timeline_path=timeline_path if selected_ids else None)
+        second_seconds = time.perf_counter() - start
+        second_stages = detector.stage_summary
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'backend': detector.effective_backend,
+        'requested_backend': backend,
+        'tracks': len(detected_ids),
+        'selected_ids': selected_ids,
+        'first_pass': {
+            'frames': first_frames,
+            'seconds': round(first_seconds, 4),
+            'fps': round(first_frames / first_seconds, 2) if first_seconds > 0 else None,
+            'stages': first_stages
+        },
+        'second_pass': {
+            'mode': second_mode,
+            'frames': second_frames,
+            'seconds': round(second_seconds, 4),
+            'fps': round(second_frames / second_seconds, 2) if second_seconds > 0 else None,
+            'stages': second_stages
+        },
+        'peak_rss_mb': round(_peak_rss_mb(), 1)
+    }
+
+
+def benchmark_suite(resolutions, frame_counts, profiles, backend=None, n_players=10, seed=0, clips_folder=None):
+    """
+    Suite de regresión sobre clips sintéticos: cada combinación de resolución,
+    largo y perfil corre primera y segunda pasada en un proceso nuevo
+
+    No necesita red si los pesos de los modelos ya están descargados.
+
+    Args:
+        resolutions: Lista de (ancho, alto)
+        frame_counts: Largos de clip en frames
+        profiles: Perfiles de cómputo a medir
+        backend: Backend de inferencia (None = el de cada perfil)
+
+    Returns:
+        Lista de resultados por configuración (FPS, tiempo por etapa, pico de RSS en MB)
+    """
+    results = []
+    for width, height in resolutions:
+        for n_frames in frame_counts:
+            clip_path = get_synthetic_clip(width, height, n_frames, n_players, seed, clips_folder)
+            for profile in profiles:
+                # spawn: proceso limpio por configuración (RSS y estado de torch propios)
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    case = pool.submit(_run_suite_case, clip_path, profile, backend).result()
+
+                result = {'resolution': f"{width}x{height}", 'clip_frames': n_frames, 'profile': profile, **case}
+                results.append(result)
+                print(f"🏁 {width}x{height} {n_frames}f {profile:>8} ({result['backend']}): "
+                      f"1ª pasada {result['first_pass']['fps']} FPS | "
+                      f"2ª pasada {result['second_pass']['fps']} FPS ({result['second_pass']['mode']}) | "
+                      f"tracks {result['tracks']} | RSS pico {result['peak_rss_mb']} MB")
+    return results
+
+
+def _parse_resolution(value):
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Resolución inválida: {value} (formato: 1280x720)")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del detector de jugadores')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pose_parser = subparsers.add_parser('pose', help='Pose por lotes vs la ruta original (una llamada por recorte)')
+    pose_parser.add_argument('video_path', help='Ruta del video de entrada')
+    pose_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16],
+                             help='Tamaños de lote a comparar (default: 1 16)')
+    pose_parser.add_argument('--ids', type=int, nargs='+',
+                             help='IDs de jugadores candidatos (default: los 3 primeros)')
+    pose_parser.add_argument('--repeat', type=int, default=1,
+                             help='Repeticiones por configuración (se usa la más rápida)')
+    pose_parser.add_argument('--json', help='Guardar resultados en un archivo JSON')
+
+    tracker_parser = subparsers.add_parser('tracker', help='Micro-benchmark del tracker en escenas concurridas')
+    tracker_parser.add_argument('--players', type=int, default=22, help='Jugadores en escena (default: 22)')
+    tracker_parser.add_argument('--referees', type=int, default=3, help='Árbitros en escena (default: 3)')
+    tracker_parser.add_argument('--staff', type=int, default=10, help='Staff y suplentes en escena (default: 10)')
+    tracker_parser.add_argument('--frames', type=int, default=2000, help='Frames a simular (default: 2000)')
+    tracker_parser.add_argument('--json', help='Guardar resultados en un archivo JSON')
+
+    backends_parser = subparsers.add_parser('backends', help='Paridad y throughput de backends de inferencia')
+    backends_parser.add_argument('video_path', help='Ruta del video de entrada')
+    backends_parser.add_argument('--backends', nargs='+', choices=INFERENCE_BACKENDS, default=['torch', 'onnx'],
+                                 help='Backends a comparar; el primero es la referencia (default: torch onnx)')
+    backends_parser.add_argument('--frames', type=int, default=32, help='Frames de muestra (default: 32)')
+    backends_parser.add_argument('--repeat', type=int, default=3,
+                                 help='Repeticiones por backend (se usa la más rápida)')
+    backends_parser.add_argument('--profile', help='Perfil de cómputo (default: balanced)')
+    backends_parser.add_argument('--min-box-iou', type=float, default=PARITY_MIN_BOX_IOU,
+                                 help=f'IoU mínimo de cajas contra la referencia (default: {PARITY_MIN_BOX_IOU})')
+    backends_parser.add_argument('--max-keypoint-error', type=float, default=PARITY_MAX_KEYPOINT_ERROR_PX,
+                                 help=f'Error máximo de keypoints en px (default: {PARITY_MAX_KEYPOINT_ERROR_PX})')
+    backends_parser.add_argument('--max-count-mismatch', type=float, default=PARITY_MAX_COUNT_MISMATCH_FRACTION,
+                                 help='Fracción máxima de frames con distinta cantidad de personas '
+                                      f'(default: {PARITY_MAX_COUNT_MISMATCH_FRACTION})')
+    backends_parser.add_argument('--json', help='Guardar resultados en un archivo JSON')
+
+    suite_parser = subparsers.add_parser('suite', help='Primera y segunda pasada sobre clips sintéticos')
+    suite_parser.add_argument('--resolutions', type=_parse_resolution, nargs='+',
+                              default=[(1280, 720), (1920, 1080)],
+                              help='Resoluciones de los clips (default: 1280x720 1920x1080)')
+    suite_parser.add_argument('--frames', type=int, nargs='+', default=[125],
+                              help='Largos de clip en frames (default: 125)')
+    suite_parser.add_argument('--profiles', nargs='+', choices=list(COMPUTE_PROFILES), default=['balanced'],
+                              help='Perfiles a medir (default: balanced)')
+    suite_parser.add_argument('--backend', choices=INFERENCE_BACKENDS,
+                              help='Backend de inferencia (default: el de cada perfil)')
+    suite_parser.add_argument('--players', type=int, default=10, help='Jugadores en escena (default: 10)')
+    suite_parser.add_argument('--seed', type=int, default=0, help='Semilla de los clips (default: 0)')
+    suite_parser.add_argument('--clips-folder', help=f'Carpeta de clips (default: {SYNTHETIC_CLIPS_FOLDER})')
+    suite_parser.add_argument('--json', help='Guardar resultados en un archivo JSON')
+
+    args = parser.parse_args()
+
+    if args.command == 'pose':
+        results = benchmark_pose(args.video_path, args.batch_sizes, args.ids, args.repeat)
+    elif args.command == 'tracker':
+        results = benchmark_tracker(args.players, args.referees, args.staff, args.frames)
+    elif args.command == 'backends':
+        results = benchmark_backends(args.video_path, args.backends, args.frames, args.repeat, args.profile)
+    elif args.command == 'suite':
+        results = benchmark_suite(args.resolutions, args.frames, args.profiles, args.backend,
+                                  args.players, args.seed, args.clips_folder)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en: {args.json}")
+
+    if args.command == 'backends':
+        # Sale con error si algún backend está fuera de tolerancia
+        sys.exit(report_parity(check_parity(results, args.min_box_iou, args.max_keypoint_error,
+                                            args.max_count_mismatch)))
+
+
+if __name__ == "__main__":
+    main()
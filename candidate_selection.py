@@ -0,0 +1,86 @@
+"""
+Políticas de selección del jugador por frame en la segunda pasada
+
+Cuando se eligen varios IDs candidatos (el mismo jugador con tracks partidos),
+en cada frame se elige uno. Los keypoints de los candidatos llegan como un
+array (n_candidatos, 17, 3) [x, y, conf] con NaN en keypoints no detectados,
+y cada política devuelve un puntaje por candidato (gana el mayor; en empate,
+el primero).
+
+Firma de una política:
+    policy(keypoints, track_ids, previous_id) -> array (n_candidatos,)
+"""
+
+import numpy as np
+
+# Landmarks de ventaja que necesita otro candidato para reemplazar al track
+# elegido en el frame anterior (política 'continuity')
+CONTINUITY_MARGIN = 3
+
+
+def valid_landmark_counts(keypoints):
+    """Cantidad de keypoints con x, y y confianza válidos por candidato"""
+    return (~np.isnan(keypoints).any(axis=2)).sum(axis=1)
+
+
+def most_valid_landmarks(keypoints, track_ids, previous_id):
+    """Candidato con más landmarks válidos (comportamiento histórico)"""
+    return valid_landmark_counts(keypoints)
+
+
+def highest_mean_confidence(keypoints, track_ids, previous_id):
+    """Candidato con mayor confianza media (los keypoints faltantes cuentan 0)"""
+    confidences = keypoints[:, :, 2]
+    return np.where(np.isnan(confidences), 0.0, confidences).mean(axis=1)
+
+
+def track_continuity(keypoints, track_ids, previous_id):
+    """
+    Mantiene el track del frame anterior salvo que otro candidato tenga
+    CONTINUITY_MARGIN landmarks válidos más (evita saltos entre tracks)
+    """
+    counts = valid_landmark_counts(keypoints)
+    keeps_track = (np.asarray(track_ids) == previous_id) & (counts > 0)
+    # Con exactamente CONTINUITY_MARGIN landmarks más, gana el otro candidato
+    return counts + (CONTINUITY_MARGIN - 0.5) * keeps_track
+
+
+SELECTION_POLICIES = {
+    'valid_landmarks': most_valid_landmarks,
+    'mean_confidence': highest_mean_confidence,
+    'continuity': track_continuity
+}
+
+DEFAULT_SELECTION_POLICY = 'valid_landmarks'
+
+
+def get_selection_policy(policy=None):
+    """
+    Retorna la función de una política por nombre (o la misma función si es callable)
+
+    Raises:
+        ValueError: Si la política no existe
+    """
+    if callable(policy):
+        return policy
+    policy = policy or DEFAULT_SELECTION_POLICY
+    if policy not in SELECTION_POLICIES:
+        raise ValueError(f"Política de selección desconocida: {policy} "
+                         f"(opciones: {', '.join(SELECTION_POLICIES)})")
+    return SELECTION_POLICIES[policy]
+
+
+def select_candidate(keypoints, track_ids, previous_id=None, policy=most_valid_landmarks):
+    """
+    Elige el candidato de un frame
+
+    Args:
+        keypoints: Array (n_candidatos, 17, 3)
+        track_ids: IDs de track de cada candidato
+        previous_id: Track elegido en el frame anterior (o None)
+        policy: Función de puntaje
+
+    Returns:
+        Índice del candidato elegido
+    """
+    return int(np.argmax(policy(keypoints, track_ids, previous_id)))
@@ -0,0 +1,80 @@
+"""
+Perfiles de cómputo del detector
+
+Cada perfil agrupa los parámetros que definen el costo de inferencia
+(modelos, resolución de entrada, stride de detección, lote de pose, hilos y
+backend de inferencia; ver quantize.py report para evaluar 'onnx_int8'),
+para elegir por request entre latencia ('fast') y precisión ('accurate')
+desde el mismo despliegue.
+
+Los hilos de torch son globales al proceso: no cambian por request, se fijan
+al arrancar con los del perfil por defecto (ver model_registry.set_torch_threads).
+"""
+
+COMPUTE_PROFILES = {
+    # Predicción en vivo: modelos nano, menor resolución y detección cada 2 frames
+    'fast': {
+        'detection_weights': 'yolo11n.pt',
+        'pose_weights': 'yolo11n-pose.pt',
+        'detection_input_size': 480,
+        'pose_input_size': 256,
+        'pose_conf': 0.3,
+        'detection_stride': 2,
+        'pose_batch_size': 32,
+        'torch_threads': 2,  # Deja núcleos libres para requests concurrentes
+        'backend': 'torch'
+    },
+    # Valores históricos del detector
+    'balanced': {
+        'detection_weights': 'yolo11n.pt',
+        'pose_weights': 'yolo11n-pose.pt',
+        'detection_input_size': 640,
+        'pose_input_size': 320,
+        'pose_conf': 0.3,
+        'detection_stride': 1,
+        'pose_batch_size': 16,
+        'torch_threads': None,  # Default de torch
+        'backend': 'torch'
+    },
+    # Ingesta para archivo: modelos small y mayor resolución
+    'accurate': {
+        'detection_weights': 'yolo11s.pt',
+        'pose_weights': 'yolo11s-pose.pt',
+        'detection_input_size': 960,
+        'pose_input_size': 384,
+        'pose_conf': 0.25,
+        'detection_stride': 1,
+        'pose_batch_size': 8,
+        'torch_threads': None,
+        'backend': 'torch'
+    }
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+
+def get_compute_profile(name=None):
+    """
+    Retorna una copia de los parámetros de un perfil
+
+    Args:
+        name: 'fast', 'balanced' o 'accurate' (None = DEFAULT_PROFILE)
+
+    Raises:
+        ValueError: Si el perfil no existe
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in COMPUTE_PROFILES:
+        raise ValueError(f"Perfil de cómputo desconocido: {name} (opciones: {', '.join(COMPUTE_PROFILES)})")
+    return dict(COMPUTE_PROFILES[name])
+
+
+def get_warmup_specs(name=None):
+    """
+    Pares (pesos, imgsz) para precalentar los modelos de un perfil
+    """
+    profile = get_compute_profile(name)
+    return (
+        (profile['detection_weights'], profile['detection_input_size']),
+        (profile['pose_weights'], profile['pose_input_size'])
+    )
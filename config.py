@@ -15,6 +15,54 @@ DB_PORT = os.getenv('DB_PORT', '5432')
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
 
+# Carpeta de videos subidos (también es la fuente de clips para calibrar los modelos INT8)
+UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', '/tmp/penal_uploads')
+
+# Precalentar los modelos YOLO del detector al iniciar el servidor
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'True').lower() == 'true'
+
+# Perfil de cómputo por defecto del detector: fast, balanced o accurate (ver compute_profiles.py)
+DEFAULT_COMPUTE_PROFILE = os.getenv('DEFAULT_COMPUTE_PROFILE', 'balanced')
+
+# Caché en disco de tracks y poses por contenido del video (re-uploads del mismo clip).
+# Tamaño máximo en MB, se eliminan las entradas menos usadas (0 = desactivado)
+RESULT_CACHE_FOLDER = os.getenv('RESULT_CACHE_FOLDER', os.path.join(UPLOAD_FOLDER, 'result_cache'))
+RESULT_CACHE_MAX_MB = int(os.getenv('RESULT_CACHE_MAX_MB', '2048'))
+
+# Frames que la segunda pasada sigue procesando después del remate detectado
+# (negativo = procesar el video completo, por defecto; un request puede pedirlo con kick_tail_frames)
+KICK_TAIL_FRAMES = int(os.getenv('KICK_TAIL_FRAMES', '-1'))
+
+# Compuerta de movimiento: fracción de píxeles (miniatura en grises) que deben cambiar
+# para volver a detectar; en tramos quietos se reutilizan los tracks (sin valor = desactivada)
+MOTION_THRESHOLD = float(os.getenv('MOTION_THRESHOLD')) if os.getenv('MOTION_THRESHOLD') else None
+
+# Caché de frames decodificados junto a cada video subido: la segunda pasada los
+# lee en lugar de volver a decodificar. Límite total en MB (0 = desactivado) y
+# ancho de los frames guardados (0 = resolución del video)
+FRAME_CACHE_MAX_MB = int(os.getenv('FRAME_CACHE_MAX_MB', '0'))
+FRAME_CACHE_WIDTH = int(os.getenv('FRAME_CACHE_WIDTH', '960'))
+
+# Primera pasada con pose de todos los tracks: elegir otros IDs en la segunda
+# pasada no vuelve a procesar el video (la primera pasada tarda más)
+POSE_ALL_TRACKS = os.getenv('POSE_ALL_TRACKS', 'False').lower() == 'true'
+
+# Generar el video anotado (*_detected.mp4) dentro de la respuesta de detección
+# en lugar de hacerlo recién cuando se pide (cada request puede pedirlo con render_video)
+RENDER_DETECTED_VIDEO = os.getenv('RENDER_DETECTED_VIDEO', 'False').lower() == 'true'
+
+# Backend de inferencia de los modelos YOLO: torch, onnx, openvino u onnx_int8
+# (onnx/openvino se exportan junto a los pesos la primera vez que se usan).
+# Sin valor, cada perfil de cómputo usa su propio backend
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND') or None
+
+# Hilos de torch del servidor: globales al proceso, se fijan una vez al arrancar
+# (sin valor = los del perfil de cómputo por defecto)
+TORCH_THREADS = int(os.getenv('TORCH_THREADS')) if os.getenv('TORCH_THREADS') else None
+
+# Procesos para la primera pasada por segmentos (1 = en serie, en el hilo del request)
+FIRST_PASS_WORKERS = int(os.getenv('FIRST_PASS_WORKERS', '1'))
+
 # Configuración de AWS
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 
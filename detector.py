@@ -6,162 +6,326 @@ python .\detector_v2_yolov11.py .\videos_limpios\1.mp4
 
 import cv2
 import torch
-from ultralytics import YOLO
 import numpy as np
 from collections import defaultdict
 import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
 import os
-import pandas as pd
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import linear_sum_assignment
 from scipy.spatial.distance import cdist
+from compute_profiles import COMPUTE_PROFILES, get_compute_profile
+from candidate_selection import SELECTION_POLICIES, get_selection_policy, select_candidate
+from frame_source import FFmpegFrameSource, get_source_transform
+from kick_detection import KickDetector
+from keypoint_store import (KEYPOINT_NAMES, KeypointWriter, export_keypoints_csv, get_keypoints_path,
+                            load_keypoints)
+from motion_gate import MotionGate
+from model_registry import (DEFAULT_BACKEND, DETECTION_WEIGHTS, INFERENCE_BACKENDS, POSE_WEIGHTS,
+                            get_model, get_model_backend, get_model_lock, set_torch_threads)
+from result_cache import CACHED_POSES, CACHED_TIMELINE
+from track_poses import TrackPoseStore
+from track_rendering import (color_for_id, create_video_writer, draw_tracked_players, iter_timeline_frames,
+                             render_first_pass_frame, render_timeline)
+from track_timeline import TrackTimeline
+from video_pipeline import StageStats, VideoPipeline
 
 class PlayerTracker:
+    # Costo para pares detección-track fuera de max_distance (nunca se asignan)
+    INVALID_COST = 1e9
+    
     def __init__(self, max_distance=100, max_frames_lost=10):
         """
         Tracker para mantener IDs consistentes de jugadores
         
+        El estado de los tracks se guarda en arrays paralelos de NumPy
+        (una fila por track) y la asociación se resuelve de forma óptima
+        con el algoritmo húngaro (scipy linear_sum_assignment).
+        
         Args:
             max_distance: Distancia máxima para asociar detecciones (píxeles)
             max_frames_lost: Frames máximos sin detección antes de eliminar tracker
         """
         self.max_distance = max_distance
         self.max_frames_lost = max_frames_lost
-        self.tracks = {}  # {track_id: {'center': (x, y), 'frames_lost': int, 'bbox': (x1,y1,x2,y2)}}
         self.next_id = 1
         
+        self.ids = np.empty(0, dtype=np.int64)
+        self.centers = np.empty((0, 2), dtype=np.float64)
+        self.bboxes = np.empty((0, 4), dtype=np.float64)
+        self.frames_lost = np.empty(0, dtype=np.int64)
+        self.confs = np.empty(0, dtype=np.float64)
+        
+        # Para predicción con velocidad constante entre detecciones
+        self.velocities = np.empty((0, 2), dtype=np.float64)  # píxeles por frame
+        self.last_seen = np.empty((0, 2), dtype=np.float64)   # último centro observado
+        self.active = np.empty(0, dtype=bool)                 # asignado en la última detección
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _keep(self, mask):
+        self.ids = self.ids[mask]
+        self.centers = self.centers[mask]
+        self.bboxes = self.bboxes[mask]
+        self.frames_lost = self.frames_lost[mask]
+        self.confs = self.confs[mask]
+        self.velocities = self.velocities[mask]
+        self.last_seen = self.last_seen[mask]
+        self.active = self.active[mask]
+    
+    def _drop_expired(self):
+        expired = self.frames_lost > self.max_frames_lost
+        if expired.any():
+            self._keep(~expired)
+    
     def update(self, detections):
         """
         Actualiza los tracks con nuevas detecciones
         
         Args:
-            detections: Lista de detecciones [(x1, y1, x2, y2, conf), ...]
+            detections: Detecciones [(x1, y1, x2, y2, conf), ...] (lista o array (N, 5))
         
         Returns:
-            Lista de tracks [(track_id, x1, y1, x2, y2, conf), ...]
+            Lista de tracks [(track_id, x1, y1, x2, y2, conf), ...] en el orden de las detecciones
         """
-        if not detections:
+        detections = np.asarray(detections, dtype=np.float64).reshape(-1, 5)
+        
+        if len(detections) == 0:
             # Incrementar frames perdidos para todos los tracks
-            for track_id in list(self.tracks.keys()):
-                self.tracks[track_id]['frames_lost'] += 1
-                if self.tracks[track_id]['frames_lost'] > self.max_frames_lost:
-                    del self.tracks[track_id]
+            self.frames_lost += 1
+            self.active[:] = False
+            self._drop_expired()
             return []
         
-        # Calcular centros de las detecciones actuales
-        current_centers = []
-        for det in detections:
-            x1, y1, x2, y2 = det[:4]
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            current_centers.append((center_x, center_y))
+        # Centros de las detecciones actuales
+        centers = (detections[:, 0:2] + detections[:, 2:4]) / 2
         
-        current_centers = np.array(current_centers)
+        n_tracks = len(self.ids)
+        det_to_track = np.full(len(detections), -1, dtype=np.int64)
+        matched_tracks = np.zeros(n_tracks, dtype=bool)
         
-        # Obtener centros de tracks existentes
-        if self.tracks:
-            track_ids = list(self.tracks.keys())
-            track_centers = np.array([self.tracks[tid]['center'] for tid in track_ids])
+        if n_tracks:
+            # Asignación óptima sobre la matriz de distancias
+            distances = cdist(centers, self.centers)
+            cost = np.where(distances < self.max_distance, distances, self.INVALID_COST)
+            det_idx, track_idx = linear_sum_assignment(cost)
             
-            # Calcular matriz de distancias
-            distances = cdist(current_centers, track_centers)
+            valid = distances[det_idx, track_idx] < self.max_distance
+            det_idx, track_idx = det_idx[valid], track_idx[valid]
             
-            # Asignación húngara simplificada (greedy)
-            assigned_detections = set()
-            assigned_tracks = set()
-            assignments = []
+            # Velocidad observada desde la última vez que se vio cada track
+            frames_elapsed = self.frames_lost[track_idx] + 1
+            self.velocities[track_idx] = (centers[det_idx] - self.last_seen[track_idx]) / frames_elapsed[:, None]
+            self.last_seen[track_idx] = centers[det_idx]
             
-            # Ordenar por distancia y asignar
-            distance_indices = np.unravel_index(np.argsort(distances.ravel()), distances.shape)
-            
-            for det_idx, track_idx in zip(distance_indices[0], distance_indices[1]):
-                if (det_idx not in assigned_detections and 
-                    track_idx not in assigned_tracks and 
-                    distances[det_idx, track_idx] < self.max_distance):
-                    
-                    assignments.append((det_idx, track_ids[track_idx]))
-                    assigned_detections.add(det_idx)
-                    assigned_tracks.add(track_idx)
-        else:
-            track_ids = []
-            assignments = []
-            assigned_detections = set()
-            assigned_tracks = set()
-        
-        # Actualizar tracks existentes
-        for det_idx, track_id in assignments:
-            detection = detections[det_idx]
-            x1, y1, x2, y2 = detection[:4]
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
+            # Actualizar tracks asignados
+            self.centers[track_idx] = centers[det_idx]
+            self.bboxes[track_idx] = detections[det_idx, :4]
+            self.confs[track_idx] = detections[det_idx, 4]
+            self.frames_lost[track_idx] = 0
             
-            self.tracks[track_id]['center'] = (center_x, center_y)
-            self.tracks[track_id]['bbox'] = (x1, y1, x2, y2)
-            self.tracks[track_id]['frames_lost'] = 0
-            self.tracks[track_id]['conf'] = detection[4]
-        
-        # Crear nuevos tracks para detecciones no asignadas
-        for det_idx, detection in enumerate(detections):
-            if det_idx not in assigned_detections:
-                x1, y1, x2, y2 = detection[:4]
-                center_x = (x1 + x2) / 2
-                center_y = (y1 + y2) / 2
-                
-                self.tracks[self.next_id] = {
-                    'center': (center_x, center_y),
-                    'bbox': (x1, y1, x2, y2),
-                    'frames_lost': 0,
-                    'conf': detection[4]
-                }
-                assignments.append((det_idx, self.next_id))
-                self.next_id += 1
+            det_to_track[det_idx] = track_idx
+            matched_tracks[track_idx] = True
         
         # Incrementar frames perdidos para tracks no asignados
-        for track_id in self.tracks:
-            if track_id not in [tid for _, tid in assignments]:
-                self.tracks[track_id]['frames_lost'] += 1
+        self.frames_lost[~matched_tracks] += 1
+        
+        # Crear nuevos tracks para detecciones no asignadas
+        new_det = np.flatnonzero(det_to_track < 0)
+        if len(new_det):
+            det_to_track[new_det] = n_tracks + np.arange(len(new_det))
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + len(new_det))])
+            self.centers = np.concatenate([self.centers, centers[new_det]])
+            self.bboxes = np.concatenate([self.bboxes, detections[new_det, :4]])
+            self.confs = np.concatenate([self.confs, detections[new_det, 4]])
+            self.frames_lost = np.concatenate([self.frames_lost, np.zeros(len(new_det), dtype=np.int64)])
+            self.velocities = np.concatenate([self.velocities, np.zeros((len(new_det), 2))])
+            self.last_seen = np.concatenate([self.last_seen, centers[new_det]])
+            self.active = np.concatenate([self.active, np.zeros(len(new_det), dtype=bool)])
+            self.next_id += len(new_det)
+        
+        self.active[:] = False
+        self.active[det_to_track] = True
+        
+        # Tracks activos (uno por detección)
+        track_ids = self.ids[det_to_track].tolist()
+        rows = detections.tolist()
         
         # Eliminar tracks perdidos
-        for track_id in list(self.tracks.keys()):
-            if self.tracks[track_id]['frames_lost'] > self.max_frames_lost:
-                del self.tracks[track_id]
-        
-        # Retornar tracks activos
-        result = []
-        for _, track_id in assignments:
-            track = self.tracks[track_id]
-            bbox = track['bbox']
-            result.append((track_id, bbox[0], bbox[1], bbox[2], bbox[3], track['conf']))
-        
-        return result
+        self._drop_expired()
+        
+        return [(track_id, *row) for track_id, row in zip(track_ids, rows)]
+    
+    def predict(self):
+        """
+        Avanza los tracks un frame con velocidad constante (frames sin detección)
+        
+        Los tracks no se eliminan aquí; frames_lost se acumula y se evalúa en
+        la próxima llamada a update.
+        
+        Returns:
+            Tracks activos predichos [(track_id, x1, y1, x2, y2, conf), ...]
+        """
+        self.centers += self.velocities
+        self.bboxes += np.tile(self.velocities, 2)
+        self.frames_lost += 1
+        
+        active = np.flatnonzero(self.active)
+        return [
+            (track_id, *bbox, conf)
+            for track_id, bbox, conf in zip(self.ids[active].tolist(),
+                                            self.bboxes[active].tolist(),
+                                            self.confs[active].tolist())
+        ]
 
 class FootballPlayerDetector:
-    def __init__(self, model_path=None, confidence_threshold=0.4):
+    # Tamaño mínimo de entrada al detectar sobre una región (ROI)
+    ROI_MIN_INPUT_SIZE = 160
+    
+    def __init__(self, model_path=None, confidence_threshold=0.4, pose_batch_size=16, pose_input_size=320,
+                 detection_batch_size=1, detection_stride=1, tracking_roi=True, roi_expand=1.0,
+                 single_model=False, decoder='opencv', decode_width=None, decode_crop=None, decoder_threads=0,
+                 detection_weights=DETECTION_WEIGHTS, pose_weights=POSE_WEIGHTS, detection_input_size=640,
+                 pose_conf=0.3, torch_threads=None, profile=None, backend=DEFAULT_BACKEND,
+                 selection_policy=None, motion_threshold=None, pose_all_tracks=False):
         """
         Inicializa el detector de jugadores de fútbol con tracking usando YOLOv11
         
         Args:
             model_path: Ruta al modelo YOLO (si es None, usa YOLOv11 pre-entrenado)
             confidence_threshold: Umbral de confianza para las detecciones
+            pose_batch_size: Cantidad de recortes por llamada al modelo de pose
+            pose_input_size: Tamaño (px) del letterbox de cada recorte para pose
+            detection_batch_size: Frames por llamada al modelo de detección
+            detection_stride: Detectar cada k frames; en los intermedios los tracks
+                se propagan con velocidad constante (1 = detectar todos los frames)
+            tracking_roi: En la segunda pasada sin timeline, detectar solo alrededor
+                de los jugadores seleccionados una vez confirmados
+            roi_expand: Margen de la región, en múltiplos del tamaño de cada caja
+            single_model: Usar solo YOLOv11n-pose: sus cajas alimentan el tracker y
+                los keypoints de los seleccionados salen de la misma inferencia
+            decoder: 'opencv' (cv2.VideoCapture) o 'ffmpeg' (pipe con escalado al decodificar)
+            decode_width: Ancho al que ffmpeg escala los frames (None = resolución original)
+            decode_crop: (x, y, w, h) del video original que ffmpeg recorta antes de escalar
+            decoder_threads: Hilos del decodificador de ffmpeg (0 = automático)
+            detection_weights: Pesos del modelo de detección
+            pose_weights: Pesos del modelo de pose
+            detection_input_size: imgsz de la detección sobre el frame completo
+            pose_conf: Confianza mínima de personas y keypoints en la pose
+            torch_threads: Hilos de torch del perfil; no se aplican acá porque son globales
+                al proceso (ver model_registry.set_torch_threads)
+            profile: Nombre del perfil de cómputo usado (ver from_profile)
+            backend: Backend de inferencia pedido para ambos modelos: 'torch', 'onnx',
+                'openvino' u 'onnx_int8' (el que quedó cargado está en effective_backend)
+            selection_policy: Política para elegir entre IDs candidatos en la segunda pasada:
+                'valid_landmarks', 'mean_confidence', 'continuity' o una función
+                (ver candidate_selection.py)
+            motion_threshold: Fracción de píxeles que deben cambiar respecto del último
+                frame detectado para volver a detectar; en frames más quietos se
+                reutilizan los tracks anteriores (None = detectar siempre, ver motion_gate.py)
+            pose_all_tracks: En la primera pasada, calcular también la pose de todos los
+                tracks (track_poses.py): la segunda pasada pasa a ser una consulta sin
+                decodificar el video, para cualquier selección de IDs
         """
+        self.profile = profile
+        self.selection_policy = get_selection_policy(selection_policy)
         self.confidence_threshold = confidence_threshold
-        
-        # Cargar modelo YOLOv11 para detección
-        if model_path and os.path.exists(model_path):
-            print(f"🔧 Cargando modelo personalizado: {model_path}")
-            self.detection_model = YOLO(model_path)
+        self.pose_batch_size = max(1, int(pose_batch_size))
+        self.pose_input_size = int(pose_input_size)
+        self.detection_batch_size = max(1, int(detection_batch_size))
+        self.detection_stride = max(1, int(detection_stride))
+        self.motion_threshold = motion_threshold
+        self.pose_all_tracks = pose_all_tracks
+        self.tracking_roi = tracking_roi
+        self.roi_expand = float(roi_expand)
+        self.single_model = single_model
+        self.decoder = decoder
+        self.decode_width = decode_width
+        self.decode_crop = decode_crop
+        self.decoder_threads = int(decoder_threads)
+        self.model_path = model_path
+        self.detection_input_size = int(detection_input_size)
+        self.pose_conf = float(pose_conf)
+        self.torch_threads = torch_threads
+        
+        # Transformación frame decodificado -> video original (identidad con OpenCV)
+        self.frame_scale, self.frame_offset = (1.0, 1.0), (0, 0)
+        
+        # Modelo YOLOv11 para pose estimation (17 keypoints)
+        print(f"🦴 Usando {pose_weights} para análisis de pose...")
+        self.backend = backend
+        self.pose_weights = pose_weights  # YOLOv11 pose (nano por defecto)
+        self.pose_model = get_model(self.pose_weights, backend)
+        self.pose_lock = get_model_lock(self.pose_weights, backend)
+        self.pose_backend = get_model_backend(self.pose_weights, backend)
+        
+        # Modelos YOLOv11 desde el registro del proceso (se cargan una sola vez)
+        if single_model:
+            # El modelo de pose también detecta personas: no se carga un segundo modelo
+            if model_path:
+                print(f"⚠️ Modo de un solo modelo: se ignora {model_path}")
+            print(f"🔧 Usando {self.pose_weights} también para detección de personas...")
+            self.detection_weights = self.pose_weights
+        elif model_path and os.path.exists(model_path):
+            print(f"🔧 Usando modelo personalizado: {model_path}")
+            self.detection_weights = model_path
         else:
-            print("🔧 Cargando YOLOv11n para detección de personas...")
-            self.detection_model = YOLO('yolo11n.pt')  # YOLOv11 nano
-        
-        # Cargar modelo YOLOv11 para pose estimation (17 keypoints)
-        print("🦴 Cargando YOLOv11n-pose para análisis de pose...")
-        self.pose_model = YOLO('yolo11n-pose.pt')  # YOLOv11 pose nano
+            print(f"🔧 Usando {detection_weights} para detección de personas...")
+            self.detection_weights = detection_weights  # YOLOv11 (nano por defecto)
+        self.detection_model = get_model(self.detection_weights, backend)
+        self.detection_lock = get_model_lock(self.detection_weights, backend)
+        self.detection_backend = get_model_backend(self.detection_weights, backend)
         
         # Verificar que los modelos se cargaron correctamente
+        if self.effective_backend != backend:
+            print(f"⚠️ Backend de inferencia: se pidió {backend} pero se usa {self.effective_backend}")
+        else:
+            print(f"⚙️ Backend de inferencia: {backend}")
         print(f"✅ Modelo de detección cargado: {self.detection_model.model_name if hasattr(self.detection_model, 'model_name') else 'YOLOv11'}")
         print(f"✅ Modelo de pose cargado: {self.pose_model.model_name if hasattr(self.pose_model, 'model_name') else 'YOLOv11-pose'}")
         
+        # Nombres de los 17 keypoints de COCO pose
+        self.keypoint_names = list(KEYPOINT_NAMES)
+        
+        # Estado por trabajo (tracker, conteos, IDs detectados)
+        self.reset()
+    
+    @classmethod
+    def from_profile(cls, name=None, **overrides):
+        """
+        Crea un detector con un perfil de cómputo ('fast', 'balanced', 'accurate')
+        
+        Args:
+            name: Nombre del perfil (None = perfil por defecto)
+            overrides: Parámetros del constructor que reemplazan los del perfil
+        """
+        settings = get_compute_profile(name)
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        print(f"⚙️ Perfil de cómputo: {name or 'default'}")
+        return cls(profile=name, **settings)
+    
+    @property
+    def effective_backend(self):
+        """
+        Backend con el que corren los modelos: el pedido, o 'torch' si el registro
+        no lo pudo cargar ('detección/pose' si quedaron distintos)
+        """
+        if self.detection_backend == self.pose_backend:
+            return self.detection_backend
+        return f"{self.detection_backend}/{self.pose_backend}"
+    
+    def reset(self):
+        """
+        Reinicia el estado del trabajo actual sin recargar los modelos
+        """
         # Inicializar tracker
-        self.tracker = PlayerTracker(max_distance=80, max_frames_lost=15)
+        self.tracker = self.create_tracker()
         
         # Colores únicos para cada ID
         np.random.seed(42)
@@ -170,148 +334,556 @@ class FootballPlayerDetector:
         # Contador de jugadores por frame
         self.player_counts = []
         
-        # Nombres de los 17 keypoints de COCO pose
-        self.keypoint_names = [
-            'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
-            'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-            'left_wrist', 'right_wrist', 'left_hip', 'right_hip',
-            'left_knee', 'right_knee', 'left_ankle', 'right_ankle'
-        ]
-        
         # Para almacenar los IDs detectados durante el primer análisis
         self.detected_player_ids = set()
         
+        # Tiempo ocupado por etapa (decode, detección, tracking, pose, dibujo, encode)
+        self.stage_stats = StageStats()
+        self.pipeline_utilisation = {}
+        self.stage_summary = {}
+        
+        # Frames detectados en una región (ROI) vs en el frame completo
+        self.detection_regions = {'roi': 0, 'full': 0}
+        
+        # Keypoints del último frame por track (modo single_model)
+        self.tracked_keypoints = {}
+        
+        # Frame del remate detectado en la última segunda pasada
+        self.kick_frame = None
+        
+        # Frames clave sin detección por falta de movimiento, por pasada
+        self.motion_skipped_frames = {'primera_pasada': 0, 'segunda_pasada': 0}
+        
+        # Primera pasada recuperada del caché de resultados (sin procesar el video)
+        self.first_pass_cached = False
+        
+        # Umbrales del filtro de jugadores por resolución (alto, ancho)
+        self.field_thresholds = {}
+        
+    def result_cache_settings(self, frame_cache=None):
+        """
+        Parámetros que cambian los tracks y las poses (clave del caché de resultados)
+        
+        Args:
+            frame_cache: FrameCache usado en las pasadas (frame_cache.py); sus frames
+                reducidos cambian las poses de la segunda pasada
+        """
+        settings = {
+            'detection_weights': self.detection_weights,
+            'pose_weights': self.pose_weights,
+            'backend': self.effective_backend,
+            'confidence_threshold': self.confidence_threshold,
+            'detection_input_size': self.detection_input_size,
+            'detection_stride': self.detection_stride,
+            'motion_threshold': self.motion_threshold,
+            'single_model': self.single_model,
+            'pose_input_size': self.pose_input_size,
+            'pose_conf': self.pose_conf,
+            'decoder': self.decoder,
+            'decode_width': self.decode_width,
+            'decode_crop': self.decode_crop
+        }
+        if frame_cache is not None and frame_cache.enabled:
+            settings['frame_cache_width'] = frame_cache.width
+        return settings
+    
+    def create_motion_gate(self):
+        """
+        Compuerta de movimiento para una pasada (None si está desactivada)
+        """
+        if self.motion_threshold is None:
+            return None
+        return MotionGate(self.motion_threshold)
+    
+    def create_tracker(self):
+        """
+        Tracker con max_distance expresado en píxeles del frame decodificado
+        """
+        scale = (self.frame_scale[0] + self.frame_scale[1]) / 2
+        return PlayerTracker(max_distance=80 / scale, max_frames_lost=15)
+    
+    def open_video(self, video_path, frame_cache=None):
+        """
+        Abre el video con el decodificador configurado y guarda la transformación
+        de coordenadas frame -> video original
+        
+        Args:
+            video_path: Ruta del video
+            frame_cache: FrameCache (frame_cache.py); si tiene los frames del video
+                se leen de ahí sin decodificar
+        
+        Returns:
+            cv2.VideoCapture, FFmpegFrameSource o FrameCacheSource
+        """
+        cap = frame_cache.open(video_path) if frame_cache is not None else None
+        if cap is not None:
+            print(f"♻️ Frames desde el caché de frames ({cap.width}x{cap.height}): sin decodificar el video")
+        elif self.decoder == 'ffmpeg':
+            cap = FFmpegFrameSource(video_path, output_width=self.decode_width,
+                                    crop=self.decode_crop, threads=self.decoder_threads)
+        else:
+            cap = cv2.VideoCapture(video_path)
+        
+        self.frame_scale, self.frame_offset = get_source_transform(cap)
+        return cap
+    
+    def _is_identity_transform(self):
+        return self.frame_scale == (1.0, 1.0) and self.frame_offset == (0, 0)
+    
+    def to_source_tracks(self, tracked_players):
+        """
+        Lleva cajas del frame decodificado a coordenadas del video original
+        """
+        if self._is_identity_transform():
+            return tracked_players
+        (sx, sy), (ox, oy) = self.frame_scale, self.frame_offset
+        return [(track_id, x1 * sx + ox, y1 * sy + oy, x2 * sx + ox, y2 * sy + oy, conf)
+                for track_id, x1, y1, x2, y2, conf in tracked_players]
+    
+    def to_frame_tracks(self, tracked_players):
+        """
+        Lleva cajas del video original (timeline) al frame decodificado
+        """
+        if self._is_identity_transform():
+            return tracked_players
+        (sx, sy), (ox, oy) = self.frame_scale, self.frame_offset
+        return [(track_id, (x1 - ox) / sx, (y1 - oy) / sy, (x2 - ox) / sx, (y2 - oy) / sy, conf)
+                for track_id, x1, y1, x2, y2, conf in tracked_players]
+    
+    def to_source_keypoints(self, keypoints):
+        """
+        Lleva keypoints (17, 3) del frame decodificado al video original
+        """
+        if self._is_identity_transform():
+            return keypoints
+        keypoints = keypoints.copy()
+        keypoints[:, :2] = keypoints[:, :2] * np.array(self.frame_scale) + np.array(self.frame_offset)
+        return keypoints
+    
     def generate_color_for_id(self, track_id):
         """
         Genera un color único y consistente para cada ID
         """
-        if track_id not in self.colors:
-            np.random.seed(track_id)
-            self.colors[track_id] = (
-                int(np.random.randint(50, 255)),
-                int(np.random.randint(50, 255)),
-                int(np.random.randint(50, 255))
-            )
-        return self.colors[track_id]
+        return color_for_id(track_id, self.colors)
     
     def filter_players_in_field(self, detections, frame_shape):
         """
         Filtra detecciones para mantener solo jugadores relevantes
         """
-        filtered_detections = []
+        return detections[self.field_player_mask(detections, frame_shape)]
+    
+    def field_player_indices(self, detections, frame_shape):
+        """
+        Índices (en orden) de las detecciones que pasan el filtro de jugadores
+        """
+        return np.flatnonzero(self.field_player_mask(detections, frame_shape))
+    
+    def field_filter_thresholds(self, frame_shape):
+        """
+        Umbrales del filtro de jugadores para una resolución (se calculan una vez)
+        
+        Returns:
+            (alto mínimo, alto máximo, y mínima del centro) en píxeles
+        """
         height, width = frame_shape[:2]
+        thresholds = self.field_thresholds.get((height, width))
+        if thresholds is None:
+            # 1. Tamaño apropiado / 3. Posición en el campo
+            thresholds = (min(width, height) * 0.015, min(width, height) * 0.35, height * 0.05)
+            self.field_thresholds[(height, width)] = thresholds
+        return thresholds
+    
+    def field_player_mask(self, detections, frame_shape):
+        """
+        Máscara booleana (N,) de las detecciones que pasan el filtro de jugadores
         
-        for detection in detections:
-            x1, y1, x2, y2 = detection[:4]
-            
-            # Calcular centro y dimensiones
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            bbox_width = x2 - x1
-            bbox_height = y2 - y1
-            
-            # Filtros:
-            # 1. Tamaño apropiado
-            min_size = min(width, height) * 0.015
-            max_size = min(width, height) * 0.35
-            
-            if not (min_size < bbox_height < max_size):
-                continue
-            
-            # 2. Proporción humana
+        Args:
+            detections: Array (N, 5) [x1, y1, x2, y2, conf]
+            frame_shape: Shape del frame
+        """
+        min_size, max_size, min_center_y = self.field_filter_thresholds(frame_shape)
+        x1, y1, x2, y2 = detections[:, 0], detections[:, 1], detections[:, 2], detections[:, 3]
+        
+        # Calcular centro y dimensiones
+        center_y = (y1 + y2) / 2
+        bbox_width = x2 - x1
+        bbox_height = y2 - y1
+        
+        # Filtros:
+        # 1. Tamaño apropiado
+        mask = (min_size < bbox_height) & (bbox_height < max_size)
+        
+        # 2. Proporción humana (sin dividir por anchos nulos)
+        with np.errstate(divide='ignore', invalid='ignore'):
             aspect_ratio = bbox_height / bbox_width
-            if not (1.2 < aspect_ratio < 5.0):
-                continue
-            
-            # 3. Posición en el campo
-            if center_y < height * 0.05:
-                continue
-            
-            filtered_detections.append(detection)
+        mask &= (1.2 < aspect_ratio) & (aspect_ratio < 5.0)
+        
+        # 3. Posición en el campo
+        mask &= center_y >= min_center_y
         
-        return filtered_detections
+        return mask
     
     def detect_players_in_frame(self, frame):
         """
         Detecta jugadores en un frame con tracking usando YOLOv11
         """
         # Detección de personas con YOLOv11
-        results = self.detection_model(frame, conf=self.confidence_threshold, verbose=False)
-        
-        # Extraer detecciones
-        detections = []
-        for result in results:
-            if result.boxes is not None:
-                boxes = result.boxes.xyxy.cpu().numpy()
-                confidences = result.boxes.conf.cpu().numpy()
-                classes = result.boxes.cls.cpu().numpy()
-                
-                for box, conf, cls in zip(boxes, confidences, classes):
-                    if cls == 0:  # Clase 0 = persona
-                        detections.append(np.append(box, conf))
+        detections = self.detect_players_in_frames([frame])[0]
         
-        # Filtrar jugadores
-        filtered_detections = self.filter_players_in_field(detections, frame.shape)
-        
-        # Actualizar tracker
-        tracked_players = self.tracker.update(filtered_detections)
-        
-        # Guardar IDs detectados
-        for track_id, _, _, _, _, _ in tracked_players:
-            self.detected_player_ids.add(track_id)
+        # Filtrar jugadores y actualizar tracker
+        tracked_players = self.track_detections(detections, frame.shape)
         
         # Dibujar detecciones
         frame_with_detections = self.draw_tracked_players(frame, tracked_players)
         
         return frame_with_detections, len(tracked_players), tracked_players
     
-    def draw_tracked_players(self, frame, tracked_players):
+    def extract_person_detections(self, result):
+        """
+        Extrae las detecciones de personas de un resultado de YOLOv11
+        
+        Returns:
+            Array (N, 5) float32 [x1, y1, x2, y2, conf]
+        """
+        if result.boxes is None:
+            return np.empty((0, 5), dtype=np.float32)
+        
+        persons = result.boxes.cls.cpu().numpy() == 0  # Clase 0 = persona
+        detections = np.empty((int(persons.sum()), 5), dtype=np.float32)
+        detections[:, :4] = result.boxes.xyxy.cpu().numpy()[persons]
+        detections[:, 4] = result.boxes.conf.cpu().numpy()[persons]
+        return detections
+    
+    def extract_person_keypoints(self, result):
         """
-        Dibuja jugadores con IDs consistentes
+        Extrae los keypoints de cada persona de un resultado de YOLOv11-pose
+        
+        Returns:
+            Array (N, 17, 3) [x, y, conf] alineado con extract_person_detections,
+            con NaN en keypoints de baja confianza
+        """
+        if result.boxes is None or result.keypoints is None:
+            return np.empty((0, 17, 3), dtype=np.float32)
+        
+        persons = result.boxes.cls.cpu().numpy() == 0
+        keypoints = result.keypoints.data.cpu().numpy().astype(np.float32)[persons]
+        keypoints[~(keypoints[:, :, 2] > self.pose_conf)] = np.nan
+        return keypoints
+    
+    def detect_players_in_frames(self, frames):
+        """
+        Detecta personas en varios frames con una sola llamada al modelo
+        
+        Args:
+            frames: Lista de frames
+        
+        Returns:
+            Lista (una por frame, en orden) de arrays (N, 5) de detecciones
+        """
+        with self.stage_stats.time('detection', len(frames)), self.detection_lock:
+            results = self.detection_model(frames, conf=self.confidence_threshold,
+                                           imgsz=self.detection_input_size, verbose=False)
+            return [self.extract_person_detections(result) for result in results]
+    
+    def iter_frame_detections(self, frames, pass_name='primera_pasada'):
         """
-        frame_with_detections = frame.copy()
+        Detecta en lotes de detection_batch_size frames clave
         
-        for track_id, x1, y1, x2, y2, conf in tracked_players:
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+        Con detection_stride > 1 solo se detecta en uno de cada k frames;
+        el resto se entrega con detecciones None para que se propaguen los tracks.
+        Con motion_threshold, los frames clave estáticos repiten las detecciones
+        del último frame detectado (los tracks quedan donde estaban).
+        
+        Args:
+            frames: Iterable de frames decodificados
+            pass_name: Pasada donde contar los frames saltados por la compuerta
+        
+        Yields:
+            (frame, detecciones o None) en orden de frame
+        """
+        frames = iter(frames)
+        frame_idx = 0
+        motion_gate = self.create_motion_gate()
+        last_detections = None
+        while True:
+            # Ventana con detection_batch_size frames clave (y los intermedios)
+            window = []
+            keyframes = []
+            for frame in frames:
+                kind = 'detect' if frame_idx % self.detection_stride == 0 else 'stride'
+                if kind == 'detect' and motion_gate is not None and motion_gate.is_static(frame):
+                    kind = 'static'
+                    self.motion_skipped_frames[pass_name] += 1
+                window.append((frame, kind))
+                frame_idx += 1
+                if kind == 'detect':
+                    keyframes.append(frame)
+                    if len(keyframes) == self.detection_batch_size:
+                        break
             
-            # Color único para cada ID
-            color = self.generate_color_for_id(track_id)
+            if not window:
+                return
             
-            # Dibujar caja
-            cv2.rectangle(frame_with_detections, (x1, y1), (x2, y2), color, 2)
+            detections = iter(self.detect_players_in_frames(keyframes)) if keyframes else iter(())
+            for frame, kind in window:
+                if kind == 'detect':
+                    last_detections = next(detections)
+                    yield frame, last_detections
+                elif kind == 'static':
+                    # El primer frame siempre se detecta: last_detections ya existe
+                    yield frame, last_detections
+                else:
+                    yield frame, None
+    
+    def track_detections(self, detections, frame_shape, record_ids=True, keypoints=None):
+        """
+        Filtra las detecciones de un frame y actualiza el tracker
+        
+        Args:
+            detections: Array (N, 5) del frame (None si el frame no se detectó por stride)
+            frame_shape: Shape del frame
+            record_ids: Guardar los IDs en detected_player_ids
+            keypoints: Keypoints (N, 17, 3) alineados con detections (modo single_model);
+                quedan en tracked_keypoints indexados por track_id
+        
+        Returns:
+            Lista de tracks [(track_id, x1, y1, x2, y2, conf), ...]
+        """
+        self.tracked_keypoints = {}
+        
+        with self.stage_stats.time('tracking'):
+            if detections is None:
+                # Frame sin detección (stride): propagar tracks
+                tracked_players = self.tracker.predict()
+            else:
+                # Filtrar jugadores
+                kept = self.field_player_mask(detections, frame_shape)
+                
+                # Actualizar tracker (retorna un track por detección, en el mismo orden)
+                tracked_players = self.tracker.update(detections[kept])
+                
+                if keypoints is not None:
+                    self.tracked_keypoints = {
+                        track[0]: player_keypoints for track, player_keypoints in zip(tracked_players, keypoints[kept])
+                    }
+        
+        # Guardar IDs detectados
+        if record_ids:
+            for track_id, _, _, _, _, _ in tracked_players:
+                self.detected_player_ids.add(track_id)
+        
+        return tracked_players
+    
+    def compute_tracking_roi(self, bboxes, frames_lost, frame_shape):
+        """
+        Región de detección alrededor de las cajas de los tracks seleccionados
+        
+        Cada caja se expande roi_expand veces su tamaño por lado, y el margen
+        crece con los frames que el track lleva sin detección.
+        
+        Args:
+            bboxes: Array (N, 4) [x1, y1, x2, y2] de los tracks seleccionados
+            frames_lost: Array (N,) de frames sin detección de cada track
+            frame_shape: Shape del frame completo
+        
+        Returns:
+            (x1, y1, x2, y2) enteros, recortados al frame
+        """
+        height, width = frame_shape[:2]
+        sizes = bboxes[:, 2:4] - bboxes[:, 0:2]
+        margins = np.tile(sizes * self.roi_expand * (1 + 0.25 * frames_lost[:, None]), 2)
+        
+        expanded = bboxes + margins * np.array([-1, -1, 1, 1])
+        x1, y1 = np.floor(expanded[:, 0:2].min(axis=0))
+        x2, y2 = np.ceil(expanded[:, 2:4].max(axis=0))
+        
+        x1 = int(np.clip(x1, 0, width - 1))
+        y1 = int(np.clip(y1, 0, height - 1))
+        return x1, y1, int(np.clip(x2, x1 + 1, width)), int(np.clip(y2, y1 + 1, height))
+    
+    def detect_players_in_roi(self, frame, roi):
+        """
+        Detecta personas solo dentro de una región del frame
+        
+        La región se infiere con la misma escala que el frame completo, por lo
+        que el costo baja con el área y los jugadores se ven igual que en la
+        primera pasada.
+        
+        Args:
+            frame: Frame completo
+            roi: (x1, y1, x2, y2) de la región
+        
+        Returns:
+            Array (N, 5) de detecciones en coordenadas del frame completo
+        """
+        result, (x1, y1) = self.infer_region(frame, roi)
+        detections = self.extract_person_detections(result)
+        detections[:, :4] += np.array([x1, y1, x1, y1], dtype=np.float32)
+        return detections
+    
+    def infer_region(self, frame, roi=None):
+        """
+        Una inferencia del modelo de detección sobre el frame o una región
+        
+        Returns:
+            (resultado de YOLOv11, origen (x, y) de la región en el frame)
+        """
+        if roi is None:
+            with self.stage_stats.time('detection'), self.detection_lock:
+                return self.detection_model(frame, conf=self.confidence_threshold,
+                                            imgsz=self.detection_input_size, verbose=False)[0], (0, 0)
+        
+        x1, y1, x2, y2 = roi
+        crop = frame[y1:y2, x1:x2]
+        
+        scale = self.detection_input_size / max(frame.shape[:2])
+        imgsz = int(np.ceil(max(crop.shape[:2]) * scale / 32)) * 32
+        imgsz = min(max(imgsz, self.ROI_MIN_INPUT_SIZE), self.detection_input_size)
+        
+        with self.stage_stats.time('detection'), self.detection_lock:
+            return self.detection_model(crop, conf=self.confidence_threshold, imgsz=imgsz, verbose=False)[0], (x1, y1)
+    
+    def detect_players_with_keypoints(self, frame, roi=None):
+        """
+        Detección y pose en una sola inferencia de YOLOv11-pose (modo single_model)
+        
+        Args:
+            frame: Frame completo
+            roi: (x1, y1, x2, y2) opcional para inferir solo en esa región
+        
+        Returns:
+            (detecciones, keypoints (N, 17, 3)) en coordenadas del frame completo
+        """
+        result, (x1, y1) = self.infer_region(frame, roi)
+        detections = self.extract_person_detections(result)
+        detections[:, :4] += np.array([x1, y1, x1, y1], dtype=np.float32)
+        
+        keypoints = self.extract_person_keypoints(result)
+        keypoints[:, :, :2] += np.array([x1, y1], dtype=np.float32)
+        return detections, keypoints
+    
+    def iter_live_tracked_frames(self, frames, selected_player_ids):
+        """
+        Tracking frame a frame de la segunda pasada (sin timeline)
+        
+        Con tracking_roi, mientras ningún track seleccionado esté vivo (antes de
+        confirmarlo, o después de perderlo más de max_frames_lost frames) se
+        detecta sobre el frame completo; si no, solo en la región alrededor de
+        sus últimas cajas. Con single_model los keypoints salen de la misma
+        inferencia que las cajas.
+        
+        Args:
+            frames: Iterable de frames decodificados
+            selected_player_ids: IDs de los jugadores seleccionados
+        
+        Yields:
+            (frame, [(track_id, x1, y1, x2, y2, conf), ...], {track_id: keypoints})
+        """
+        selected = np.asarray(list(selected_player_ids), dtype=np.int64)
+        motion_gate = self.create_motion_gate()
+        detections, keypoints = None, None
+        
+        for frame_idx, frame in enumerate(frames):
+            if frame_idx % self.detection_stride:
+                tracked_players = self.track_detections(None, frame.shape, record_ids=False)
+                yield frame, tracked_players, self.tracked_keypoints
+                continue
             
-            # Etiqueta
-            label = f'Jugador ID-{track_id}: {conf:.2f}'
-            label_color = (255, 255, 255)
+            if motion_gate is not None and motion_gate.is_static(frame):
+                # Escena quieta: mismas detecciones (y keypoints) que el último frame detectado
+                self.motion_skipped_frames['segunda_pasada'] += 1
+                tracked_players = self.track_detections(detections, frame.shape, record_ids=False,
+                                                        keypoints=keypoints)
+                yield frame, tracked_players, self.tracked_keypoints
+                continue
             
-            # Fondo para la etiqueta
-            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            cv2.rectangle(frame_with_detections, 
-                         (x1, y1 - label_size[1] - 10), 
-                         (x1 + label_size[0] + 5, y1), 
-                         color, -1)
+            roi = None
+            targets = np.isin(self.tracker.ids, selected)
+            if self.tracking_roi and targets.any():
+                roi = self.compute_tracking_roi(self.tracker.bboxes[targets],
+                                                self.tracker.frames_lost[targets], frame.shape)
+                self.detection_regions['roi'] += 1
+            else:
+                self.detection_regions['full'] += 1
             
-            # Texto de la etiqueta
-            cv2.putText(frame_with_detections, label, (x1 + 2, y1 - 5), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, label_color, 2)
+            if self.single_model:
+                detections, keypoints = self.detect_players_with_keypoints(frame, roi)
+            elif roi is not None:
+                detections, keypoints = self.detect_players_in_roi(frame, roi), None
+            else:
+                detections, keypoints = self.detect_players_in_frames([frame])[0], None
             
-            # Punto central
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            cv2.circle(frame_with_detections, (center_x, center_y), 3, color, -1)
+            tracked_players = self.track_detections(detections, frame.shape, record_ids=False,
+                                                    keypoints=keypoints)
+            yield frame, tracked_players, self.tracked_keypoints
+    
+    def draw_tracked_players(self, frame, tracked_players):
+        """
+        Dibuja jugadores con IDs consistentes (ver track_rendering.py)
+        """
+        return draw_tracked_players(frame, tracked_players, self.colors)
+    
+    def render_first_pass_frame(self, frame, tracked_players, frame_idx, total_frames):
+        """
+        Dibuja tracks e información del frame para el video de la primera pasada
+        """
+        return render_first_pass_frame(frame, tracked_players, frame_idx, total_frames, self.colors)
+    
+    def report_pipeline_utilisation(self, pipeline=None, wall_seconds=None, pass_name=None, frames=None):
+        """
+        Guarda e imprime la utilización y los tiempos por etapa de la última pasada
+        
+        Sin pipeline se calcula con stage_stats sobre wall_seconds (en el modo
+        por segmentos puede superar el 100%: suma de varios procesos).
+        Además emite una línea de log estructurado (JSON) con el resumen.
         
-        return frame_with_detections
+        Args:
+            pass_name: 'primera_pasada' o 'segunda_pasada' (para el log)
+            frames: Frames de video procesados (costo por frame de cada etapa)
+        """
+        if pipeline is not None:
+            wall_seconds = pipeline.wall_seconds
+            self.pipeline_utilisation = pipeline.utilisation()
+        else:
+            self.pipeline_utilisation = self.stage_stats.utilisation(wall_seconds)
+        self.stage_summary = self.stage_stats.summary(frames)
+        if self.pipeline_utilisation:
+            usage = ', '.join(f"{stage}: {value*100:.0f}%" 
+                              for stage, value in sorted(self.pipeline_utilisation.items(), key=lambda kv: -kv[1]))
+            print(f"⏱️ Utilización por etapa: {usage}")
+        
+        record = {
+            'event': 'stage_stats',
+            'pass': pass_name,
+            'profile': self.profile,
+            'backend': self.effective_backend,
+            'requested_backend': self.backend,
+            'frames': frames,
+            'wall_s': round(wall_seconds, 4) if wall_seconds else None,
+            'utilisation': {stage: round(value, 4) for stage, value in self.pipeline_utilisation.items()},
+            'stages': self.stage_summary
+        }
+        print(f"📋 STAGE_STATS {json.dumps(record)}")
     
-    def get_pose_for_player(self, frame, bbox):
+    def stage_statistics(self):
         """
-        Obtiene los 17 keypoints de pose para un jugador específico usando YOLOv11-pose
+        Utilización y tiempos por etapa de la última pasada (para las respuestas de la API)
+        """
+        return {
+            'utilizacion_etapas': dict(self.pipeline_utilisation),
+            'tiempos_etapas': dict(self.stage_summary)
+        }
+    
+    def prepare_pose_crop(self, frame, bbox):
+        """
+        Recorta un jugador y lo ajusta (letterbox) al tamaño fijo de entrada de pose
         
         Args:
             frame: Frame de video
             bbox: Bounding box del jugador (x1, y1, x2, y2)
         
         Returns:
-            Lista de 17 keypoints [(x1, y1, conf1), (x2, y2, conf2), ...] o None si no detecta
+            Tupla (imagen, origen_xy, escala_xy, padding_xy) o None si el recorte está vacío
         """
         x1, y1, x2, y2 = map(int, bbox)
         
@@ -329,37 +901,121 @@ class FootballPlayerDetector:
         if player_region.size == 0:
             return None
         
-        # Ejecutar detección de pose con YOLOv11
-        pose_results = self.pose_model(player_region, conf=0.3, verbose=False)
+        # Letterbox: escalar manteniendo proporción y rellenar hasta el tamaño fijo
+        size = self.pose_input_size
+        region_h, region_w = player_region.shape[:2]
+        scale = size / max(region_h, region_w)
+        new_w = max(1, int(round(region_w * scale)))
+        new_h = max(1, int(round(region_h * scale)))
+        pad_x = (size - new_w) // 2
+        pad_y = (size - new_h) // 2
+        
+        letterboxed = np.full((size, size, 3), 114, dtype=np.uint8)
+        letterboxed[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+            player_region, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        
+        return (
+            letterboxed,
+            (x1, y1),
+            (new_w / region_w, new_h / region_h),
+            (pad_x, pad_y)
+        )
+    
+    def get_poses_batch(self, crops):
+        """
+        Ejecuta YOLOv11-pose por lotes sobre recortes preparados con prepare_pose_crop
         
-        for result in pose_results:
-            if result.keypoints is not None and len(result.keypoints.data) > 0:
-                # Obtener los keypoints del primer (y más confiable) resultado
-                keypoints = result.keypoints.data[0].cpu().numpy()  # Shape: (17, 3) [x, y, conf]
-                
-                # Ajustar coordenadas al frame completo
-                adjusted_keypoints = []
-                for kp in keypoints:
-                    if len(kp) >= 3:
-                        kp_x, kp_y, kp_conf = kp[0], kp[1], kp[2]
-                        # Ajustar coordenadas
-                        adj_x = kp_x + x1 if kp_conf > 0.3 else np.nan
-                        adj_y = kp_y + y1 if kp_conf > 0.3 else np.nan
-                        adj_conf = kp_conf if kp_conf > 0.3 else np.nan
-                        adjusted_keypoints.append((adj_x, adj_y, adj_conf))
-                    else:
-                        adjusted_keypoints.append((np.nan, np.nan, np.nan))
-                
-                return adjusted_keypoints
+        Args:
+            crops: Lista de recortes (o None para recortes vacíos)
+        
+        Returns:
+            Array (len(crops), 17, 3) [x, y, conf] en coordenadas del frame,
+            con NaN en keypoints no detectados o de baja confianza
+        """
+        keypoints = np.full((len(crops), 17, 3), np.nan, dtype=np.float32)
+        valid_idx = [i for i, crop in enumerate(crops) if crop is not None]
+        
+        for start in range(0, len(valid_idx), self.pose_batch_size):
+            batch_idx = valid_idx[start:start + self.pose_batch_size]
+            images = [crops[i][0] for i in batch_idx]
+            
+            # Una sola llamada al modelo de pose para todo el lote
+            with self.stage_stats.time('pose', len(images)), self.pose_lock:
+                pose_results = self.pose_model(images, conf=self.pose_conf, imgsz=self.pose_input_size, verbose=False)
+            
+            for i, result in zip(batch_idx, pose_results):
+                if result.keypoints is not None and len(result.keypoints.data) > 0:
+                    # Keypoints del primer (y más confiable) resultado. Shape: (17, 3)
+                    keypoints[i] = result.keypoints.data[0].cpu().numpy()
+        
+        if not valid_idx:
+            return keypoints
+        
+        # Ajustar coordenadas al frame completo (vectorizado)
+        origins = np.zeros((len(crops), 2), dtype=np.float32)
+        scales = np.ones((len(crops), 2), dtype=np.float32)
+        pads = np.zeros((len(crops), 2), dtype=np.float32)
+        for i in valid_idx:
+            _, origins[i], scales[i], pads[i] = crops[i]
+        
+        keypoints[:, :, :2] = (keypoints[:, :, :2] - pads[:, None, :]) / scales[:, None, :] + origins[:, None, :]
+        
+        # Descartar keypoints de baja confianza
+        keypoints[~(keypoints[:, :, 2] > self.pose_conf)] = np.nan
         
-        # Si no se detectó pose, retornar NaN para todos los keypoints
-        return [(np.nan, np.nan, np.nan)] * 17
+        return keypoints
     
-    def process_video_first_pass(self, video_path, output_path=None, show_video=True):
+    def get_pose_for_player(self, frame, bbox):
+        """
+        Obtiene los 17 keypoints de pose para un jugador específico usando YOLOv11-pose
+        
+        Args:
+            frame: Frame de video
+            bbox: Bounding box del jugador (x1, y1, x2, y2)
+        
+        Returns:
+            Array (17, 3) de keypoints [x, y, conf] con NaN si no se detectan
+        """
+        return self.get_poses_batch([self.prepare_pose_crop(frame, bbox)])[0]
+    
+    def process_video_first_pass(self, video_path, output_path=None, show_video=True, timeline_path=None,
+                                 num_workers=1, overlap_frames=30, cache=None, poses_path=None, frame_cache=None):
         """
         Primera pasada: detecta y trackea jugadores usando YOLOv11
+        
+        Args:
+            video_path: Ruta del video de entrada
+            output_path: Ruta del video de salida con tracking (opcional)
+            show_video: Mostrar video en tiempo real
+            timeline_path: Ruta del sidecar donde guardar los tracks por frame (opcional)
+            num_workers: Procesos en paralelo (> 1 activa el modo por segmentos)
+            overlap_frames: Frames compartidos entre segmentos para unir los IDs
+            cache: CacheEntry del caché de resultados (result_cache.py); con los
+                tracks de este video en caché no se procesa el video
+            poses_path: Ruta del sidecar de poses de todos los tracks (con pose_all_tracks)
+            frame_cache: FrameCache (frame_cache.py) donde guardar los frames decodificados
+                para la segunda pasada
         """
-        cap = cv2.VideoCapture(video_path)
+        if cache is not None and timeline_path:
+            cached_timeline = cache.get(CACHED_TIMELINE)
+            if cached_timeline and self.pose_all_tracks and not self.has_all_track_poses(cache, cached_timeline):
+                print("⚠️ El caché no tiene las poses de todos los tracks; se procesa el video")
+                cached_timeline = None
+            if cached_timeline:
+                return self.restore_first_pass(video_path, cached_timeline, timeline_path, output_path,
+                                               cache, poses_path)
+        
+        if num_workers > 1:
+            if show_video:
+                print("⚠️ El modo por segmentos no muestra video; se procesa en serie")
+            elif self.pose_all_tracks:
+                print("⚠️ El modo por segmentos no calcula la pose de todos los tracks; se procesa en serie")
+            else:
+                return self.process_video_first_pass_sharded(
+                    video_path, output_path, timeline_path, num_workers, overlap_frames, cache,
+                    poses_path, frame_cache)
+        
+        cap = self.open_video(video_path)
         
         if not cap.isOpened():
             raise ValueError(f"No se pudo abrir el video: {video_path}")
@@ -377,59 +1033,72 @@ class FootballPlayerDetector:
         print("🔍 PRIMERA PASADA: Detectando y trackeando jugadores con YOLOv11...")
         
         # Writer para video de salida
-        writer = None
-        if output_path:
-            # Intentar H.264 primero (mejor compatibilidad con navegadores)
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*'H264')
-            except:
-                try:
-                    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-                except:
-                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # Fallback
-            writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        writer = create_video_writer(output_path, fps, width, height) if output_path else None
+        
+        # Frames decodificados para la segunda pasada (se guardan en el hilo de decodificación)
+        frame_cache_writer = frame_cache.writer(
+            video_path, (width, height), total_frames, cap.get(cv2.CAP_PROP_FPS),
+            (self.frame_scale, self.frame_offset)
+        ) if frame_cache is not None else None
+        video_read = False
+        
+        # Nuevo trabajo: tracker, conteos e IDs desde cero
+        self.reset()
         
         frame_count = 0
-        self.player_counts = []
+        timeline = TrackTimeline() if timeline_path else None
+        if timeline is not None:
+            # La segunda pasada lo usa sin abrir el video (consulta de poses)
+            timeline.fps = cap.get(cv2.CAP_PROP_FPS)
+        
+        # Poses de todos los tracks (la segunda pasada solo las consulta)
+        pose_store = TrackPoseStore() if self.pose_all_tracks else None
+        
+        # Sin ventana, el dibujo se hace en el hilo de codificación
+        render = None if show_video else self.render_first_pass_frame
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # frame = cv2.resize(frame, (1568, 1045))
-                
-                # Detectar y trackear jugadores
-                frame_with_detections, player_count, tracked_players = self.detect_players_in_frame(frame)
-                self.player_counts.append(player_count)
-                
-                # Información del frame
-                info_text = f"Frame: {frame_count+1}/{total_frames} | Jugadores: {player_count} | YOLOv11"
-                cv2.putText(frame_with_detections, info_text, (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Lista de IDs detectados
-                if tracked_players:
-                    ids_text = f"IDs activos: {', '.join([str(tid) for tid, _, _, _, _, _ in tracked_players])}"
-                    cv2.putText(frame_with_detections, ids_text, (10, 60), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
-                
-                # Mostrar video
-                if show_video:
-                    cv2.imshow('Primera Pasada: Detección YOLOv11 - Presiona Q para salir', frame_with_detections)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
-                
-                # Guardar frame
-                if writer:
-                    writer.write(frame_with_detections)
-                
-                frame_count += 1
+            with VideoPipeline(cap, writer=writer, render=render, stats=self.stage_stats,
+                               frame_sink=frame_cache_writer.write if frame_cache_writer else None) as pipeline:
+                # Detección en lotes de detection_batch_size frames; el tracking
+                # sigue siendo frame a frame y en orden
+                stopped_by_user = False
+                for frame, detections in self.iter_frame_detections(pipeline.frames()):
+                    # frame = cv2.resize(frame, (1568, 1045))
+                    
+                    # Trackear jugadores
+                    tracked_players = self.track_detections(detections, frame.shape)
+                    self.player_counts.append(len(tracked_players))
+                    
+                    if timeline is not None:
+                        timeline.add(frame_count, self.to_source_tracks(tracked_players),
+                                     detected=detections is not None)
+                    
+                    if pose_store is not None:
+                        self.record_track_poses(pose_store, frame_count, frame, tracked_players)
+                    
+                    if show_video:
+                        # Mostrar video
+                        frame_with_detections = self.render_first_pass_frame(
+                            frame, tracked_players, frame_count, total_frames)
+                        cv2.imshow('Primera Pasada: Detección YOLOv11 - Presiona Q para salir', frame_with_detections)
+                        if cv2.waitKey(1) & 0xFF == ord('q'):
+                            stopped_by_user = True
+                            break
+                        
+                        # Guardar frame
+                        pipeline.write(frame_with_detections)
+                    else:
+                        # Guardar frame (se dibuja en el hilo de codificación)
+                        pipeline.write(frame, tracked_players, frame_count, total_frames)
+                    
+                    frame_count += 1
+                    
+                    if frame_count % 30 == 0:
+                        progress = (frame_count / total_frames) * 100
+                        print(f"Progreso: {progress:.1f}%")
                 
-                if frame_count % 30 == 0:
-                    progress = (frame_count / total_frames) * 100
-                    print(f"Progreso: {progress:.1f}%")
+                video_read = not stopped_by_user
         
         finally:
             cap.release()
@@ -437,9 +1106,249 @@ class FootballPlayerDetector:
                 writer.release()
             if show_video:
                 cv2.destroyAllWindows()
+            # Solo un video leído completo sirve a la segunda pasada
+            if frame_cache_writer is not None and frame_cache_writer.close(complete=video_read):
+                print(f"💾 Caché de frames: {frame_cache_writer.frames} frames de "
+                      f"{frame_cache_writer.cache_size[0]}x{frame_cache_writer.cache_size[1]} en {frame_cache_writer.path}")
+        
+        self.report_pipeline_utilisation(pipeline, pass_name='primera_pasada', frames=frame_count)
+        
+        if timeline is not None:
+            timeline.save(timeline_path, video_path)
+            print(f"💾 Tracks guardados en: {timeline_path}")
+            if cache is not None:
+                cache.put(CACHED_TIMELINE, lambda path: shutil.copyfile(timeline_path, path))
+        
+        if pose_store is not None:
+            pose_store.set_coverage(self.detected_player_ids, frame_count)
+            self.save_track_poses(pose_store, video_path, poses_path, cache)
+        
+        return self.detected_player_ids
+    
+    def record_track_poses(self, pose_store, frame_idx, frame, tracked_players):
+        """
+        Pose de todos los tracks de un frame (pose_all_tracks), en un solo lote
+        
+        En frames sin detección (stride) se usa la caja propagada por el tracker.
+        """
+        if not tracked_players:
+            return
+        
+        crops = [self.prepare_pose_crop(frame, (x1, y1, x2, y2)) for _, x1, y1, x2, y2, _ in tracked_players]
+        for (track_id, *_), keypoints in zip(tracked_players, self.get_poses_batch(crops)):
+            pose_store.add(frame_idx, track_id, self.to_source_keypoints(keypoints))
+    
+    def save_track_poses(self, pose_store, video_path, poses_path=None, cache=None):
+        """
+        Guarda las poses de todos los tracks en el sidecar y/o en el caché de resultados
+        """
+        if poses_path:
+            pose_store.save(poses_path, video_path)
+            print(f"💾 Poses de {len(pose_store.coverage)} tracks guardadas en: {poses_path}")
+        if cache is not None:
+            cache.put(CACHED_POSES, lambda path: pose_store.save(path, video_path))
+    
+    def has_all_track_poses(self, cache, cached_timeline_path):
+        """
+        True si el caché tiene la pose de todos los tracks del timeline en todo el video
+        """
+        timeline = TrackTimeline.load(cached_timeline_path)
+        track_ids = timeline.unique_track_ids()
+        if not track_ids:
+            return True
+        
+        cached_poses = cache.get(CACHED_POSES)
+        pose_store = TrackPoseStore.load(cached_poses) if cached_poses else None
+        return pose_store is not None and pose_store.covered_frames(track_ids) >= timeline.total_frames
+    
+    def restore_first_pass(self, video_path, cached_timeline_path, timeline_path, output_path=None,
+                           cache=None, poses_path=None):
+        """
+        Primera pasada desde el caché: copia los tracks al sidecar del video
+        (con la firma del archivo nuevo) sin decodificar ni detectar
+        
+        Con pose_all_tracks y poses_path también copia las poses de todos los tracks.
+        
+        Returns:
+            IDs de los tracks detectados
+        """
+        timeline = TrackTimeline.load(cached_timeline_path)
+        timeline.save(timeline_path, video_path)
+        
+        cached_poses = cache.get(CACHED_POSES) if self.pose_all_tracks and poses_path and cache is not None else None
+        if cached_poses:
+            TrackPoseStore.load(cached_poses).save(poses_path, video_path)
+        
+        self.reset()
+        self.first_pass_cached = True
+        self.detected_player_ids = timeline.unique_track_ids()
+        self.player_counts = np.bincount(timeline.frames, minlength=timeline.total_frames).tolist()
+        print(f"♻️ Tracks recuperados del caché de resultados: {len(self.detected_player_ids)} tracks, "
+              f"{timeline.total_frames} frames")
+        
+        if output_path:
+            render_timeline(video_path, output_path, timeline)
+        
+        return self.detected_player_ids
+    
+    def track_frame_range(self, video_path, start_frame, end_frame=None):
+        """
+        Detecta y trackea el rango de frames [start_frame, end_frame) del video
+        
+        Lo ejecuta cada proceso del modo por segmentos; los IDs son locales al rango.
+        Los frames anteriores al rango se decodifican y descartan en lugar de usar
+        CAP_PROP_POS_FRAMES: en videos con frames B o timestamps variables el seek
+        cae algunos frames después y reporta igual la posición pedida, lo que
+        desalinearía todas las cajas del segmento.
+        
+        Returns:
+            TrackTimeline del rango (con índices de frame absolutos)
+        """
+        cap = self.open_video(video_path)
+        
+        if not cap.isOpened():
+            raise ValueError(f"No se pudo abrir el video: {video_path}")
+        
+        # Mismo conteo de frames que la pasada en serie (grab no convierte ni copia el frame);
+        # si el conteo estimado del video era mayor, el rango queda vacío
+        for _ in range(start_frame):
+            if not cap.grab():
+                break
+        
+        self.reset()
+        timeline = TrackTimeline()
+        timeline.fps = cap.get(cv2.CAP_PROP_FPS)
+        n_frames = None if end_frame is None else end_frame - start_frame
+        
+        try:
+            with VideoPipeline(cap, stats=self.stage_stats) as pipeline:
+                frames = itertools.islice(pipeline.frames(), n_frames)
+                for frame_idx, (frame, detections) in enumerate(self.iter_frame_detections(frames), start_frame):
+                    tracked_players = self.track_detections(detections, frame.shape)
+                    timeline.add(frame_idx, self.to_source_tracks(tracked_players),
+                                 detected=detections is not None)
+        finally:
+            cap.release()
+        
+        timeline._compact()
+        return timeline
+    
+    def process_video_first_pass_sharded(self, video_path, output_path=None, timeline_path=None,
+                                         num_workers=2, overlap_frames=30, cache=None, poses_path=None,
+                                         frame_cache=None):
+        """
+        Primera pasada por segmentos en paralelo (un proceso y una copia del modelo por segmento)
+        
+        El video se divide en rangos de frames consecutivos; cada rango empieza
+        overlap_frames antes para compartirlos con el anterior. Cada proceso
+        trackea su rango con IDs locales y después se unen en IDs globales
+        asociando los tracks dentro del solapamiento (TrackTimeline.stitch).
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"No se pudo abrir el video: {video_path}")
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        
+        # Límites alineados al stride para que los frames clave sean los de la pasada en serie
+        stride = self.detection_stride
+        overlap = int(np.ceil(overlap_frames / stride)) * stride
+        segment_frames = max(int(np.ceil(total_frames / num_workers / stride)) * stride, 2 * overlap, stride)
+        core_starts = list(range(0, total_frames, segment_frames))
+        
+        # Video corto: en serie, con el caché de frames y las poses del llamador
+        if len(core_starts) < 2:
+            return self.process_video_first_pass(video_path, output_path, show_video=False,
+                                                 timeline_path=timeline_path, cache=cache,
+                                                 poses_path=poses_path, frame_cache=frame_cache)
+        
+        if frame_cache is not None and frame_cache.enabled:
+            print("⚠️ El modo por segmentos no guarda el caché de frames")
+        
+        # El último segmento se lee hasta el final (el conteo de frames puede ser aproximado)
+        ranges = [(max(0, core_start - overlap), end)
+                  for core_start, end in zip(core_starts, core_starts[1:] + [None])]
+        
+        settings = {
+            'model_path': self.model_path,
+            'detection_weights': self.detection_weights,
+            'pose_weights': self.pose_weights,
+            'detection_input_size': self.detection_input_size,
+            'pose_conf': self.pose_conf,
+            'profile': self.profile,
+            'backend': self.backend,
+            'confidence_threshold': self.confidence_threshold,
+            'detection_batch_size': self.detection_batch_size,
+            'detection_stride': self.detection_stride,
+            'motion_threshold': self.motion_threshold,
+            'single_model': self.single_model,
+            'decoder': self.decoder,
+            'decode_width': self.decode_width,
+            'decode_crop': self.decode_crop,
+            'decoder_threads': self.decoder_threads
+        }
+        torch_threads = max(1, (os.cpu_count() or 1) // len(ranges))
+        
+        print(f"🎬 Procesando video: {video_path}")
+        print(f"🧩 PRIMERA PASADA POR SEGMENTOS: {len(ranges)} procesos de ~{segment_frames} frames, "
+              f"solapamiento de {overlap} frames")
+        
+        # Nuevo trabajo: conteos e IDs desde cero
+        self.reset()
+        start_time = time.perf_counter()
+        
+        # spawn: cada proceso arranca limpio y carga su propio modelo
+        with ProcessPoolExecutor(max_workers=len(ranges),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [
+                pool.submit(_first_pass_segment_worker, video_path, start, end, settings, torch_threads)
+                for start, end in ranges
+            ]
+            results = [future.result() for future in futures]
+        
+        segments = []
+        for core_start, (segment_timeline, stage_snapshot, motion_skipped) in zip(core_starts, results):
+            segments.append((core_start, segment_timeline))
+            # Incluye los frames del solapamiento (se cuentan en ambos segmentos)
+            self.motion_skipped_frames['primera_pasada'] += motion_skipped
+            self.stage_stats.merge(stage_snapshot)
+        
+        timeline = TrackTimeline.stitch(segments)
+        timeline.interpolate()
+        
+        self.detected_player_ids = timeline.unique_track_ids()
+        self.player_counts = np.bincount(timeline.frames, minlength=timeline.total_frames).tolist()
+        
+        print(f"🧵 Segmentos unidos: {len(self.detected_player_ids)} tracks globales")
+        self.report_pipeline_utilisation(wall_seconds=time.perf_counter() - start_time, pass_name='primera_pasada',
+                                         frames=timeline.total_frames)
+        
+        if timeline_path:
+            timeline.save(timeline_path, video_path)
+            print(f"💾 Tracks guardados en: {timeline_path}")
+            if cache is not None:
+                cache.put(CACHED_TIMELINE, lambda path: shutil.copyfile(timeline_path, path))
+        
+        if output_path:
+            render_timeline(video_path, output_path, timeline)
         
         return self.detected_player_ids
     
+    def iter_cached_pose_frames(self, timeline, pose_store, selected_player_ids, n_frames):
+        """
+        Reproduce tracks y poses guardadas sin decodificar el video
+        
+        Yields:
+            (None, tracks, {track_id: keypoints}) de los primeros n_frames frames,
+            en coordenadas del video original
+        """
+        selected = set(int(track_id) for track_id in selected_player_ids)
+        missing = np.full((17, 3), np.nan, dtype=np.float32)
+        for frame_idx, tracked_players in itertools.islice(timeline.iter_frames(), n_frames):
+            keypoints = pose_store.frame_keypoints(frame_idx, selected)
+            yield None, tracked_players, {track_id: keypoints.get(track_id, missing)
+                                         for track_id, _, _, _, _, _ in tracked_players}
+    
     def select_players_interactive(self, detected_ids):
         """
         Permite al usuario seleccionar uno o múltiples jugadores ID
@@ -506,139 +1415,287 @@ class FootballPlayerDetector:
                 print("\n❌ Análisis cancelado por el usuario.")
                 return None
     
-    def process_video_second_pass(self, video_path, selected_player_ids, csv_output_path):
+    def process_video_second_pass(self, video_path, selected_player_ids, csv_output_path=None, timeline_path=None,
+                                  keypoints_output_path=None, kicker_foot=None, kick_tail_frames=None, cache=None,
+                                  use_cached_poses=True, poses_path=None, frame_cache=None):
         """
         Segunda pasada: extrae landmarks de los jugadores seleccionados usando YOLOv11-pose
         Combina múltiples IDs eligiendo el mejor por frame
-        """
-        cap = cv2.VideoCapture(video_path)
         
-        if not cap.isOpened():
-            raise ValueError(f"No se pudo abrir el video: {video_path}")
+        Si existe el timeline de tracks de la primera pasada, se reproduce en lugar
+        de volver a detectar: solo se ejecuta pose sobre los tracks seleccionados y
+        los IDs coinciden exactamente con los mostrados al usuario.
         
-        # Reiniciar tracker para segunda pasada
-        self.tracker = PlayerTracker(max_distance=80, max_frames_lost=15)
+        Los keypoints se escriben frame a frame en un .npy (keypoint_store.py);
+        el CSV es una exportación opcional al final.
         
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        El momento del remate se detecta online con los tobillos y la cadera del
+        jugador elegido (kick_detection.py) y queda en self.kick_frame.
+        
+        Con caché de resultados y timeline, las poses calculadas de los tracks
+        seleccionados se guardan en el caché; si ya están todas, la pasada solo
+        elige el candidato de cada frame (sin decodificar el video ni ejecutar pose).
+        Lo mismo con poses_path: el sidecar de poses de la primera pasada
+        (pose_all_tracks) cubre cualquier selección de IDs.
+        
+        Args:
+            csv_output_path: CSV a exportar (opcional)
+            keypoints_output_path: Archivo .npy de keypoints (default: junto al CSV)
+            kicker_foot: Pie del pateador ('L' o 'R'); None = ambos tobillos
+            kick_tail_frames: Frames a procesar después del remate antes de cortar
+                la decodificación y la inferencia (None = procesar todo el video)
+            cache: CacheEntry del caché de resultados (result_cache.py)
+            use_cached_poses: Reutilizar las poses del caché si cubren la selección
+            poses_path: Sidecar de poses por track (track_poses.py); se consulta
+                y se actualiza con las poses que calcule esta pasada
+            frame_cache: FrameCache (frame_cache.py); con los frames de la primera
+                pasada en caché se leen de ahí en lugar de decodificar el video
+        """
+        if keypoints_output_path is None:
+            if csv_output_path is None:
+                raise ValueError("Se requiere keypoints_output_path o csv_output_path")
+            keypoints_output_path = get_keypoints_path(csv_output_path)
+        
+        timeline = TrackTimeline.load(timeline_path, video_path) if timeline_path else None
+        self.stage_stats = StageStats()
+        
+        # Poses por track del caché y del sidecar (y las que calcule esta pasada, para guardarlas)
+        pose_store = None
+        save_poses = timeline is not None and (cache is not None or bool(poses_path))
+        if save_poses:
+            cached_poses = cache.get(CACHED_POSES) if cache is not None else None
+            pose_store = TrackPoseStore.load(cached_poses) if cached_poses else None
+            sidecar_poses = TrackPoseStore.load(poses_path, video_path) if poses_path else None
+            if pose_store is None:
+                pose_store = sidecar_poses
+            elif sidecar_poses is not None:
+                pose_store.merge(sidecar_poses)
+        covered_frames = pose_store.covered_frames(selected_player_ids) if pose_store is not None else 0
+        # Solo se consultan las poses si cubren todo el video: con poses cortadas en un
+        # remate anterior se decide acá la pasada completa (sin escribir un resultado parcial)
+        pose_lookup = use_cached_poses and covered_frames > 0 and covered_frames >= timeline.total_frames
+        if use_cached_poses and 0 < covered_frames < timeline.total_frames:
+            print(f"⚠️ Poses guardadas incompletas para esta selección ({covered_frames} de "
+                  f"{timeline.total_frames} frames); se recalculan")
+        recorded_poses = TrackPoseStore() if save_poses and not pose_lookup else None
+        
+        # El video solo se abre si hay que leer frames: la consulta de poses usa
+        # los FPS y el largo guardados en el timeline
+        cap = None
+        if pose_lookup:
+            fps = timeline.fps
+            if not fps:
+                # Timeline sin FPS (guardado antes): solo se leen los metadatos del contenedor
+                probe = cv2.VideoCapture(video_path)
+                fps = probe.get(cv2.CAP_PROP_FPS)
+                probe.release()
+            total_frames = timeline.total_frames
+        else:
+            cap = self.open_video(video_path, frame_cache)
+            if not cap.isOpened():
+                raise ValueError(f"No se pudo abrir el video: {video_path}")
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        
+        if pose_lookup:
+            print(f"♻️ Poses recuperadas de la primera pasada ({covered_frames} frames): sin decodificar el video")
+            timeline = timeline.select(selected_player_ids)
+            pipeline = None
+            # Tracks y keypoints ya están en coordenadas del video original
+            tracked_frames = self.iter_cached_pose_frames(timeline, pose_store, selected_player_ids,
+                                                          timeline.total_frames)
+        elif timeline is not None:
+            print(f"♻️ Reutilizando tracks de la primera pasada: {timeline_path}")
+            timeline = timeline.select(selected_player_ids)
+            
+            # Los frames sin candidatos se saltan sin decodificar la imagen
+            has_tracks = timeline.frames_with_tracks()
+            pipeline = VideoPipeline(
+                cap, stats=self.stage_stats,
+                decode_filter=lambda idx: idx < len(has_tracks) and has_tracks[idx]
+            )
+            # El timeline está en coordenadas del video original
+            tracked_frames = (
+                (frame, self.to_frame_tracks(tracked_players))
+                for frame, tracked_players in iter_timeline_frames(pipeline.frames(), timeline)
+            )
+        else:
+            # Reiniciar tracker para segunda pasada
+            self.tracker = self.create_tracker()
+            self.detection_regions = {'roi': 0, 'full': 0}
+            self.motion_skipped_frames['segunda_pasada'] = 0
+            pipeline = VideoPipeline(cap, stats=self.stage_stats)
+            if self.tracking_roi or self.single_model:
+                # Detección alrededor de los seleccionados y/o keypoints de la misma inferencia
+                tracked_frames = self.iter_live_tracked_frames(pipeline.frames(), selected_player_ids)
+            else:
+                tracked_frames = (
+                    (frame, self.track_detections(detections, frame.shape, record_ids=False))
+                    for frame, detections in self.iter_frame_detections(pipeline.frames(), 'segunda_pasada')
+                )
         
         print(f"\n🎯 SEGUNDA PASADA: Extrayendo landmarks con YOLOv11-pose de {len(selected_player_ids)} jugadores")
         print(f"👥 Jugadores candidatos: {selected_player_ids}")
         if len(selected_player_ids) > 1:
-            print("🧠 Estrategia: En cada frame se elige el jugador con más landmarks válidos")
-        print(f"💾 Los datos se guardarán en: {csv_output_path}")
+            print(f"🧠 Estrategia: En cada frame se elige un jugador según la política "
+                  f"'{getattr(self.selection_policy, '__name__', self.selection_policy)}'")
+        print(f"💾 Los datos se guardarán en: {keypoints_output_path}")
         print("🦴 Extrayendo 17 keypoints corporales por frame...")
         
-        # Preparar datos para CSV
-        csv_data = []
+        # Keypoints frame a frame directo a disco (memoria constante)
+        writer = KeypointWriter(keypoints_output_path)
         frame_count = 0
         
         # Estadísticas por jugador
         player_usage_count = {pid: 0 for pid in selected_player_ids}
         total_landmarks_detected = 0
         
-        # Crear columnas para CSV (estructura simple)
-        columns = ['frame']
-        for kp_name in self.keypoint_names:
-            columns.extend([f'{kp_name}_x', f'{kp_name}_y', f'{kp_name}_confidence'])
+        print(f"📊 Estructura: bloque float32 de {len(self.keypoint_names)} keypoints × 3 valores por frame")
+        
+        # Detección del remate sobre el jugador elegido en cada frame
+        kick_detector = KickDetector(fps, foot=kicker_foot)
+        kick_frame = None
+        stopped_after_kick = False
+        
+        # Ventana de frames pendientes de pose: la pose se ejecuta por lotes
+        # de recortes y luego se resuelve cada frame en orden
+        pending_frames = []  # [[(track_id, índice del recorte), ...], ...]
+        best_previous_id = None  # Track elegido en el frame anterior (política 'continuity')
+        pending_crops = []
+        ready_keypoints = {}  # índice del recorte -> keypoints de la detección (single_model)
         
-        print(f"📊 Estructura CSV: {len(columns)} columnas (frame + 17 keypoints × 3 valores)")
+        to_source_keypoints = (lambda keypoints: keypoints) if pose_lookup else self.to_source_keypoints
+        start_time = time.perf_counter()
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Detectar y trackear jugadores con YOLOv11
-                results = self.detection_model(frame, conf=self.confidence_threshold, verbose=False)
-                
-                detections = []
-                for result in results:
-                    if result.boxes is not None:
-                        boxes = result.boxes.xyxy.cpu().numpy()
-                        confidences = result.boxes.conf.cpu().numpy()
-                        classes = result.boxes.cls.cpu().numpy()
+            with pipeline if pipeline is not None else contextlib.nullcontext():
+                # None al final indica que hay que procesar la última ventana
+                for item in itertools.chain(tracked_frames, [None]):
+                    if item is not None:
+                        frame, tracked_players = item[:2]
+                        # Keypoints ya calculados por track (modo single_model)
+                        tracked_keypoints = item[2] if len(item) > 2 else {}
                         
-                        for box, conf, cls in zip(boxes, confidences, classes):
-                            if cls == 0:
-                                detections.append(np.append(box, conf))
-                
-                filtered_detections = self.filter_players_in_field(detections, frame.shape)
-                tracked_players = self.tracker.update(filtered_detections)
-                
-                # Encontrar jugadores candidatos este frame
-                candidate_players = {}
-                for track_id, x1, y1, x2, y2, conf in tracked_players:
-                    if track_id in selected_player_ids:
-                        # Extraer landmarks para este jugador candidato
-                        bbox = (x1, y1, x2, y2)
-                        keypoints = self.get_pose_for_player(frame, bbox)
+                        # Recortar los jugadores candidatos de este frame
+                        candidate_slots = []
+                        for track_id, x1, y1, x2, y2, conf in tracked_players:
+                            if track_id in selected_player_ids:
+                                candidate_slots.append((track_id, len(pending_crops)))
+                                if track_id in tracked_keypoints:
+                                    ready_keypoints[len(pending_crops)] = tracked_keypoints[track_id]
+                                    pending_crops.append(None)
+                                else:
+                                    pending_crops.append(self.prepare_pose_crop(frame, (x1, y1, x2, y2)))
+                        pending_frames.append(candidate_slots)
+                    
+                    if not pending_frames or (item is not None and len(pending_crops) < self.pose_batch_size):
+                        continue
+                    
+                    # Pose por lotes para todos los candidatos de la ventana
+                    keypoints_batch = self.get_poses_batch(pending_crops)
+                    for slot, keypoints in ready_keypoints.items():
+                        keypoints_batch[slot] = keypoints
+                    
+                    for candidate_slots in pending_frames:
+                        if recorded_poses is not None:
+                            for track_id, slot in candidate_slots:
+                                recorded_poses.add(frame_count, track_id, to_source_keypoints(keypoints_batch[slot]))
                         
-                        # Contar landmarks válidos (no NaN)
-                        valid_landmarks_count = 0
-                        for kp in keypoints:
-                            if not (pd.isna(kp[0]) or pd.isna(kp[1]) or pd.isna(kp[2])):
-                                valid_landmarks_count += 1
+                        # Elegir el mejor jugador para este frame
+                        best_player_id = None
+                        best_keypoints = None
                         
-                        candidate_players[track_id] = {
-                            'keypoints': keypoints,
-                            'valid_count': valid_landmarks_count
-                        }
-                
-                # Elegir el mejor jugador para este frame
-                best_player_id = None
-                best_keypoints = None
-                
-                if candidate_players:
-                    # Encontrar el jugador con más landmarks válidos
-                    best_player_id = max(candidate_players.keys(), 
-                                       key=lambda pid: candidate_players[pid]['valid_count'])
-                    best_keypoints = candidate_players[best_player_id]['keypoints']
+                        if candidate_slots:
+                            # Keypoints de los candidatos de este frame: (n_candidatos, 17, 3)
+                            track_ids = [track_id for track_id, _ in candidate_slots]
+                            candidates = keypoints_batch[[slot for _, slot in candidate_slots]]
+                            best = select_candidate(candidates, track_ids, best_previous_id, self.selection_policy)
+                            best_player_id = track_ids[best]
+                            best_keypoints = candidates[best]
+                            best_previous_id = best_player_id
+                            
+                            # Actualizar estadísticas
+                            player_usage_count[best_player_id] += 1
+                            if not np.isnan(best_keypoints).any(axis=1).all():
+                                total_landmarks_detected += 1
+                        
+                        # Guardar keypoints del frame
+                        if best_player_id is not None and best_keypoints is not None:
+                            # Usar el mejor jugador encontrado
+                            # Los keypoints quedan en coordenadas del video original
+                            writer.write(to_source_keypoints(best_keypoints))
+                        else:
+                            # No se encontró ningún jugador candidato - usar NaN
+                            writer.write(None)
+                        
+                        kick_frame = kick_detector.update(frame_count, best_keypoints, best_player_id)
+                        frame_count += 1
+                        
+                        # Mostrar progreso cada 50 frames
+                        if frame_count % 50 == 0:
+                            progress = (frame_count / total_frames) * 100
+                            
+                            if len(selected_player_ids) > 1:
+                                # Mostrar distribución de uso para múltiples jugadores
+                                usage_info = []
+                                for pid in selected_player_ids:
+                                    usage_pct = (player_usage_count[pid] / frame_count) * 100
+                                    usage_info.append(f"ID-{pid}: {usage_pct:.1f}%")
+                                
+                                landmarks_rate = (total_landmarks_detected / frame_count) * 100
+                                print(f"Progreso: {progress:.1f}% | Uso: {', '.join(usage_info)} | Landmarks: {landmarks_rate:.1f}%")
+                            else:
+                                # Para un solo jugador, mostrar detección simple
+                                landmarks_rate = (total_landmarks_detected / frame_count) * 100
+                                print(f"Progreso: {progress:.1f}% | Landmarks detectados: {landmarks_rate:.1f}%")
+                        
+                        # Cortar kick_tail_frames después del remate (celebraciones, repeticiones)
+                        if (kick_frame is not None and kick_tail_frames is not None
+                                and frame_count > kick_frame + kick_tail_frames):
+                            stopped_after_kick = True
+                            break
                     
-                    # Actualizar estadísticas
-                    player_usage_count[best_player_id] += 1
-                    if candidate_players[best_player_id]['valid_count'] > 0:
-                        total_landmarks_detected += 1
-                
-                # Preparar fila de datos
-                if best_player_id is not None and best_keypoints is not None:
-                    # Usar el mejor jugador encontrado
-                    row_data = [frame_count]
-                    for kp in best_keypoints:
-                        row_data.extend([kp[0], kp[1], kp[2]])
-                else:
-                    # No se encontró ningún jugador candidato - usar NaN
-                    row_data = [frame_count]
-                    for _ in range(17):  # 17 keypoints
-                        row_data.extend([np.nan, np.nan, np.nan])
-                
-                csv_data.append(row_data)
-                frame_count += 1
-                
-                # Mostrar progreso cada 50 frames
-                if frame_count % 50 == 0:
-                    progress = (frame_count / total_frames) * 100
+                    if stopped_after_kick:
+                        break
                     
-                    if len(selected_player_ids) > 1:
-                        # Mostrar distribución de uso para múltiples jugadores
-                        usage_info = []
-                        for pid in selected_player_ids:
-                            usage_pct = (player_usage_count[pid] / frame_count) * 100
-                            usage_info.append(f"ID-{pid}: {usage_pct:.1f}%")
-                        
-                        landmarks_rate = (total_landmarks_detected / frame_count) * 100
-                        print(f"Progreso: {progress:.1f}% | Uso: {', '.join(usage_info)} | Landmarks: {landmarks_rate:.1f}%")
-                    else:
-                        # Para un solo jugador, mostrar detección simple
-                        landmarks_rate = (total_landmarks_detected / frame_count) * 100
-                        print(f"Progreso: {progress:.1f}% | Landmarks detectados: {landmarks_rate:.1f}%")
+                    pending_frames = []
+                    pending_crops = []
+                    ready_keypoints = {}
         
         finally:
-            cap.release()
-        
-        # Guardar datos en CSV
-        df = pd.DataFrame(csv_data, columns=columns)
-        df.to_csv(csv_output_path, index=False)
+            if cap is not None:
+                cap.release()
+            writer.close()
+        
+        if recorded_poses is not None:
+            recorded_poses.set_coverage(selected_player_ids, frame_count)
+            if pose_store is not None:
+                pose_store.merge(recorded_poses)
+            else:
+                pose_store = recorded_poses
+            if poses_path:
+                pose_store.save(poses_path, video_path)
+            if cache is not None:
+                cache.put(CACHED_POSES, lambda path: pose_store.save(path, video_path))
+        
+        self.report_pipeline_utilisation(pipeline, wall_seconds=time.perf_counter() - start_time,
+                                         pass_name='segunda_pasada', frames=frame_count)
+        if timeline is None and self.tracking_roi:
+            print(f"🎯 Detección en ROI: {self.detection_regions['roi']} frames | "
+                  f"frame completo: {self.detection_regions['full']} frames")
+        if timeline is None and self.motion_threshold is not None:
+            print(f"💤 Frames sin movimiento (detección saltada): {self.motion_skipped_frames['segunda_pasada']}")
+        
+        self.kick_frame = kick_frame
+        if kick_frame is not None:
+            print(f"⚽ Remate detectado en el frame {kick_frame}")
+            if stopped_after_kick:
+                print(f"⏹️ Procesamiento cortado {kick_tail_frames} frames después del remate "
+                      f"({max(total_frames - frame_count, 0)} frames sin procesar)")
+        
+        # Exportación CSV opcional (por bloques desde el archivo mapeado)
+        if csv_output_path:
+            export_keypoints_csv(load_keypoints(keypoints_output_path), csv_output_path)
         
         print(f"\n✅ Análisis completado!")
         print(f"📊 Frames procesados: {frame_count}")
@@ -651,7 +1708,9 @@ class FootballPlayerDetector:
                 usage_rate = (usage_count / frame_count) * 100 if frame_count > 0 else 0
                 print(f"   🎯 Jugador ID-{player_id}: {usage_count} frames ({usage_rate:.1f}%)")
         
-        print(f"💾 Datos guardados en: {csv_output_path}")
+        print(f"💾 Keypoints guardados en: {keypoints_output_path}")
+        if csv_output_path:
+            print(f"💾 CSV exportado en: {csv_output_path}")
         
         return player_usage_count, frame_count
     
@@ -668,7 +1727,14 @@ class FootballPlayerDetector:
             'jugadores_max': np.max(self.player_counts),
             'jugadores_min': np.min(self.player_counts),
             'jugadores_mediana': np.median(self.player_counts),
-            'tracks_unicos': len(self.detected_player_ids)
+            'tracks_unicos': len(self.detected_player_ids),
+            'perfil_computo': self.profile,
+            'desde_cache': self.first_pass_cached,
+            # Frames clave en los que la compuerta de movimiento saltó la detección
+            'frames_sin_movimiento': self.motion_skipped_frames['primera_pasada'],
+            # Fracción del tiempo ocupada por etapa (la mayor es el cuello de botella)
+            # y tiempos acumulados / por frame / histogramas de cada etapa
+            **self.stage_statistics()
         }
         
         return stats
@@ -686,6 +1752,21 @@ class FootballPlayerDetector:
         print(f"Mínimo jugadores detectados: {stats['jugadores_min']}")
         print(f"Mediana de jugadores: {stats['jugadores_mediana']:.1f}")
         print(f"IDs únicos detectados: {stats['tracks_unicos']}")
+        if self.motion_threshold is not None:
+            print(f"Frames sin movimiento (detección saltada): {stats['frames_sin_movimiento']}")
+
+def _first_pass_segment_worker(video_path, start_frame, end_frame, settings, torch_threads):
+    """
+    Procesa un rango de frames de la primera pasada dentro de un proceso del pool
+    
+    Returns:
+        (TrackTimeline del rango, snapshot de StageStats, frames saltados por la compuerta de movimiento)
+    """
+    # Los hilos de torch se fijan una vez por proceso, antes de cargar el modelo
+    set_torch_threads(torch_threads)
+    detector = FootballPlayerDetector(torch_threads=torch_threads, **settings)
+    timeline = detector.track_frame_range(video_path, start_frame, end_frame)
+    return timeline, detector.stage_stats.snapshot(), detector.motion_skipped_frames['primera_pasada']
 
 def main():
     parser = argparse.ArgumentParser(description='Detector de jugadores con análisis de landmarks usando YOLOv11')
@@ -697,6 +1778,36 @@ def main():
                        help='Umbral de confianza (default: 0.4)')
     parser.add_argument('--no-display', action='store_true', 
                        help='No mostrar video en tiempo real')
+    parser.add_argument('--profile', choices=list(COMPUTE_PROFILES), default=None,
+                       help='Perfil de cómputo: modelos, resolución, stride y lotes (default: balanced)')
+    parser.add_argument('--backend', choices=INFERENCE_BACKENDS, default=None,
+                       help='Backend de inferencia; onnx/openvino se exportan la primera vez (default: según el perfil)')
+    parser.add_argument('--pose-batch-size', type=int, default=None,
+                       help='Recortes por llamada al modelo de pose (default: según el perfil)')
+    parser.add_argument('--detection-batch-size', type=int, default=1,
+                       help='Frames por llamada al modelo de detección (default: 1)')
+    parser.add_argument('--detection-stride', type=int, default=None,
+                       help='Detectar cada k frames e interpolar los intermedios (default: según el perfil)')
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                       help='Saltar la detección si cambia menos de esta fracción de píxeles (ej: 0.002)')
+    parser.add_argument('--no-tracking-roi', action='store_true',
+                       help='Detectar sobre el frame completo en la segunda pasada')
+    parser.add_argument('--single-model', action='store_true',
+                       help='Usar solo YOLOv11n-pose para detección y keypoints')
+    parser.add_argument('--decoder', choices=['opencv', 'ffmpeg'], default='opencv',
+                       help='Decodificador de video (default: opencv)')
+    parser.add_argument('--decode-width', type=int,
+                       help='Ancho al que ffmpeg escala los frames al decodificar')
+    parser.add_argument('--decoder-threads', type=int, default=0,
+                       help='Hilos del decodificador de ffmpeg (default: automático)')
+    parser.add_argument('--selection-policy', choices=list(SELECTION_POLICIES), default=None,
+                       help='Cómo elegir entre varios IDs en cada frame (default: valid_landmarks)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Procesos para la primera pasada por segmentos (requiere --no-display)')
+    parser.add_argument('--foot', choices=['L', 'R'], default=None,
+                       help='Pie del pateador para detectar el remate (default: ambos)')
+    parser.add_argument('--kick-tail-frames', type=int, default=None,
+                       help='Frames a procesar después del remate (default: todo el video)')
     
     args = parser.parse_args()
     
@@ -714,11 +1825,25 @@ def main():
     # Crear directorio csvs si no existe
     os.makedirs(os.path.dirname(csv_output) if os.path.dirname(csv_output) else '.', exist_ok=True)
     
-    # Crear detector
-    detector = FootballPlayerDetector(
+    # Crear detector (los flags explícitos reemplazan los valores del perfil)
+    detector = FootballPlayerDetector.from_profile(
+        args.profile,
+        backend=args.backend,
+        selection_policy=args.selection_policy,
         model_path=args.model,
-        confidence_threshold=args.confidence
+        confidence_threshold=args.confidence,
+        pose_batch_size=args.pose_batch_size,
+        detection_batch_size=args.detection_batch_size,
+        detection_stride=args.detection_stride,
+        motion_threshold=args.motion_threshold,
+        tracking_roi=not args.no_tracking_roi,
+        single_model=args.single_model,
+        decoder=args.decoder,
+        decode_width=args.decode_width,
+        decoder_threads=args.decoder_threads
     )
+    # Hilos de torch del perfil: una sola vez, para todo el proceso
+    set_torch_threads(detector.torch_threads)
     
     print("🚀 INICIANDO ANÁLISIS DE LANDMARKS DE JUGADORES CON YOLOv11")
     print("=" * 60)
@@ -734,7 +1859,8 @@ def main():
         detected_ids = detector.process_video_first_pass(
             video_path=args.video_path,
             output_path=args.output_video,
-            show_video=not args.no_display
+            show_video=not args.no_display,
+            num_workers=args.workers
         )
         
         if not detected_ids:
@@ -756,7 +1882,9 @@ def main():
         player_usage_stats, total_frames = detector.process_video_second_pass(
             video_path=args.video_path,
             selected_player_ids=selected_ids,
-            csv_output_path=csv_output
+            csv_output_path=csv_output,
+            kicker_foot=args.foot,
+            kick_tail_frames=args.kick_tail_frames
         )
         
         # Resumen final
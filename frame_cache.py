@@ -0,0 +1,279 @@
+"""
+Caché de frames decodificados compartido entre las dos pasadas del detector
+
+La primera pasada guarda cada frame decodificado (reducido a un ancho
+configurable) en un archivo crudo junto al video subido. La segunda pasada y
+las re-extracciones leen los frames mapeados en memoria en lugar de volver a
+decodificar el video: saltar frames sin candidatos no cuesta nada.
+
+El archivo de frames (<video>_frames.bin) solo es válido con su archivo de
+metadatos (<video>_frames.json), que se escribe al terminar la primera pasada.
+El total de los cachés de la carpeta se limita a max_bytes.
+"""
+
+import glob
+import json
+import os
+import cv2
+import numpy as np
+
+from track_timeline import _video_signature
+
+FRAMES_SUFFIX = '_frames.bin'
+FRAMES_META_SUFFIX = '_frames.json'
+
+
+def get_frame_cache_path(video_path):
+    """
+    Ruta del archivo de frames asociado a un video subido
+    (ej: penalty_5_temp.mp4 -> penalty_5_temp_frames.bin)
+    """
+    base, _ = os.path.splitext(video_path)
+    return f"{base}{FRAMES_SUFFIX}"
+
+
+def get_frame_cache_meta_path(video_path):
+    base, _ = os.path.splitext(video_path)
+    return f"{base}{FRAMES_META_SUFFIX}"
+
+
+def remove_frame_cache(video_path):
+    """
+    Elimina el caché de frames de un video (si existe)
+
+    Returns:
+        Rutas eliminadas
+    """
+    removed = []
+    for path in (get_frame_cache_meta_path(video_path), get_frame_cache_path(video_path)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+class FrameCache:
+    def __init__(self, folder, width=None, max_bytes=0):
+        """
+        Args:
+            folder: Carpeta de los videos subidos (donde quedan los cachés)
+            width: Ancho de los frames guardados (None = el del frame decodificado)
+            max_bytes: Tamaño máximo de todos los cachés de la carpeta (0 = desactivado)
+        """
+        self.folder = folder
+        self.width = int(width) if width else None
+        self.max_bytes = int(max_bytes)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def usage(self, exclude=None):
+        """Bytes ocupados por los cachés de frames de la carpeta"""
+        total = 0
+        for path in glob.glob(os.path.join(self.folder, f"*{FRAMES_SUFFIX}")):
+            if exclude is not None and os.path.abspath(path) == os.path.abspath(exclude):
+                continue
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def writer(self, video_path, frame_size, frame_count, fps, source_transform=((1.0, 1.0), (0, 0))):
+        """
+        Writer del caché de un video para la primera pasada
+
+        Args:
+            video_path: Video subido
+            frame_size: (ancho, alto) de los frames decodificados
+            frame_count: Frames estimados del video
+            fps: FPS del video
+            source_transform: Escala y offset frame decodificado -> video original
+
+        Returns:
+            FrameCacheWriter o None si está desactivado o el video no entra en el límite
+        """
+        if not self.enabled:
+            return None
+
+        remove_frame_cache(video_path)
+        path = get_frame_cache_path(video_path)
+        available = self.max_bytes - self.usage(exclude=path)
+
+        width, height = frame_size
+        if self.width and self.width < width:
+            height = max(2, int(round(height * self.width / width / 2)) * 2)
+            width = self.width
+        estimated = int(frame_count) * width * height * 3
+        if estimated > available:
+            print(f"⚠️ Caché de frames: el video ({estimated / 1024 ** 2:.0f} MB) no entra en el límite "
+                  f"({max(available, 0) / 1024 ** 2:.0f} MB libres); no se guarda")
+            return None
+
+        return FrameCacheWriter(video_path, frame_size, (width, height), fps, source_transform, available)
+
+    def open(self, video_path):
+        """
+        Fuente de frames desde el caché (None si no existe o no corresponde al video)
+        """
+        if not self.enabled:
+            return None
+        return FrameCacheSource.open(video_path)
+
+
+class FrameCacheWriter:
+    def __init__(self, video_path, frame_size, cache_size, fps, source_transform, max_bytes):
+        """
+        Escribe los frames decodificados en orden (se llama desde el hilo de decodificación)
+
+        Args:
+            video_path: Video subido
+            frame_size: (ancho, alto) de los frames decodificados
+            cache_size: (ancho, alto) de los frames guardados
+            fps: FPS del video
+            source_transform: Escala y offset frame decodificado -> video original
+            max_bytes: Bytes disponibles para este video
+        """
+        self.video_path = video_path
+        self.path = get_frame_cache_path(video_path)
+        self.frame_size = tuple(frame_size)
+        self.cache_size = tuple(cache_size)
+        self.fps = fps
+        self.max_bytes = max_bytes
+        self.frames = 0
+        self.aborted = False
+
+        # Los frames guardados se escalan: la transformación al video original se compone
+        (sx, sy), offset = source_transform
+        self.source_transform = ((sx * frame_size[0] / cache_size[0], sy * frame_size[1] / cache_size[1]),
+                                 tuple(offset))
+
+        self._frame_bytes = cache_size[0] * cache_size[1] * 3
+        self._file = open(self.path, 'wb')
+
+    def write(self, frame):
+        """Agrega un frame (un error de disco descarta el caché sin cortar la pasada)"""
+        if self.aborted:
+            return
+        if (self.frames + 1) * self._frame_bytes > self.max_bytes:
+            print("⚠️ Caché de frames: se superó el límite de tamaño; se descarta")
+            self.abort()
+            return
+
+        if (frame.shape[1], frame.shape[0]) != self.cache_size:
+            frame = cv2.resize(frame, self.cache_size, interpolation=cv2.INTER_AREA)
+        try:
+            self._file.write(np.ascontiguousarray(frame).data)
+        except OSError as e:
+            print(f"⚠️ Caché de frames: error al escribir ({e}); se descarta")
+            self.abort()
+            return
+        self.frames += 1
+
+    def close(self, complete=True):
+        """
+        Cierra el caché; solo un video leído completo queda disponible
+
+        Returns:
+            True si el caché quedó guardado
+        """
+        if self.aborted:
+            return False
+        if not complete or self.frames == 0:
+            self.abort()
+            return False
+
+        self._file.close()
+        (sx, sy), (ox, oy) = self.source_transform
+        meta = {
+            'frames': self.frames,
+            'width': self.cache_size[0],
+            'height': self.cache_size[1],
+            'fps': self.fps,
+            'source_scale': [sx, sy],
+            'source_offset': [ox, oy],
+            'video_signature': _video_signature(self.video_path).tolist()
+        }
+        # Los metadatos se escriben al final: sin ellos el archivo de frames no se usa
+        with open(get_frame_cache_meta_path(self.video_path), 'w') as f:
+            json.dump(meta, f)
+        return True
+
+    def abort(self):
+        self.aborted = True
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class FrameCacheSource:
+    def __init__(self, path, meta):
+        """
+        Frames del caché mapeados en memoria, con la interfaz de cv2.VideoCapture
+        que usan el detector y el pipeline (read, grab, get, set, isOpened, release)
+        """
+        self.width = int(meta['width'])
+        self.height = int(meta['height'])
+        self.fps = float(meta['fps']) or 25.0
+        self.frame_count = int(meta['frames'])
+        self.source_transform = (tuple(meta['source_scale']), tuple(meta['source_offset']))
+        self._frames = np.memmap(path, dtype=np.uint8, mode='r',
+                                 shape=(self.frame_count, self.height, self.width, 3))
+        self.position = 0
+
+    @classmethod
+    def open(cls, video_path):
+        """
+        Returns:
+            FrameCacheSource o None si no hay caché completo para este video
+        """
+        meta_path = get_frame_cache_meta_path(video_path)
+        path = get_frame_cache_path(video_path)
+        if not os.path.exists(meta_path) or not os.path.exists(path):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['video_signature'] != _video_signature(video_path).tolist():
+            return None
+        if os.path.getsize(path) != meta['frames'] * meta['width'] * meta['height'] * 3:
+            return None
+        return cls(path, meta)
+
+    def read(self):
+        if self._frames is None or self.position >= self.frame_count:
+            return False, None
+        # Copia: los frames siguen vivos en las colas después de avanzar
+        frame = np.array(self._frames[self.position])
+        self.position += 1
+        return True, frame
+
+    def grab(self):
+        # Saltar un frame no requiere decodificar ni copiar
+        if self._frames is None or self.position >= self.frame_count:
+            return False
+        self.position += 1
+        return True
+
+    def get(self, prop):
+        values = {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+            cv2.CAP_PROP_POS_FRAMES: self.position
+        }
+        return float(values.get(prop, 0))
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES or self._frames is None:
+            return False
+        self.position = min(max(int(value), 0), self.frame_count)
+        return True
+
+    def isOpened(self):
+        return self._frames is not None
+
+    def release(self):
+        self._frames = None
@@ -0,0 +1,159 @@
+"""
+Fuentes de frames del detector
+
+FFmpegFrameSource lee frames crudos (BGR) desde un proceso ffmpeg, ya
+recortados y escalados al decodificar, con la misma interfaz de
+cv2.VideoCapture que usan el detector y el pipeline (read, grab, get, set,
+isOpened, release). Así Python recibe frames más chicos y los modelos no
+tienen que reducir frames en resolución completa.
+"""
+
+import shutil
+import subprocess
+import cv2
+import numpy as np
+
+FFMPEG_BIN = 'ffmpeg'
+
+
+class FFmpegFrameSource:
+    def __init__(self, video_path, output_width=None, crop=None, threads=0, ffmpeg_bin=FFMPEG_BIN):
+        """
+        Fuente de frames desde un pipe de ffmpeg
+
+        Args:
+            video_path: Ruta del video
+            output_width: Ancho de salida (el alto mantiene la proporción); None = sin escalar
+            crop: (x, y, w, h) en píxeles del video original, aplicado antes de escalar
+            threads: Hilos del decodificador de ffmpeg (0 = automático)
+            ffmpeg_bin: Ejecutable de ffmpeg
+        """
+        if shutil.which(ffmpeg_bin) is None:
+            raise RuntimeError(f"No se encontró ffmpeg ({ffmpeg_bin}); usar el decodificador de OpenCV")
+
+        self.video_path = video_path
+        self.ffmpeg_bin = ffmpeg_bin
+        self.threads = int(threads)
+
+        # Metadatos con OpenCV (no requiere ffprobe)
+        probe = cv2.VideoCapture(video_path)
+        self._opened = probe.isOpened()
+        self.fps = probe.get(cv2.CAP_PROP_FPS) or 25.0
+        self.source_width = int(probe.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.source_height = int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_count = int(probe.get(cv2.CAP_PROP_FRAME_COUNT))
+        probe.release()
+
+        x, y, w, h = crop if crop else (0, 0, self.source_width, self.source_height)
+        self.crop = (int(x), int(y), int(w), int(h))
+
+        if output_width and self._opened:
+            self.width = int(output_width)
+            self.height = max(2, int(round(self.crop[3] * self.width / self.crop[2] / 2)) * 2)
+        else:
+            self.width, self.height = self.crop[2], self.crop[3]
+
+        self._frame_bytes = self.width * self.height * 3
+        self._discard = bytearray(self._frame_bytes)
+        self._process = None
+        self.position = 0
+
+        if self._opened:
+            self._start(0)
+
+    @property
+    def source_transform(self):
+        """
+        Escala y offset para llevar coordenadas del frame al video original:
+        x_original = x * escala_x + offset_x
+        """
+        x, y, w, h = self.crop
+        return (w / self.width, h / self.height), (x, y)
+
+    def _command(self, start_frame):
+        cmd = [self.ffmpeg_bin, '-nostdin', '-loglevel', 'error', '-threads', str(self.threads)]
+        if start_frame > 0:
+            # Seek exacto: ffmpeg decodifica desde el keyframe anterior y descarta
+            # los frames con timestamp menor (medio frame antes para evitar redondeos)
+            cmd += ['-ss', f'{(start_frame - 0.5) / self.fps:.6f}']
+        cmd += ['-i', self.video_path, '-an', '-sn']
+
+        filters = []
+        if self.crop != (0, 0, self.source_width, self.source_height):
+            filters.append('crop={2}:{3}:{0}:{1}'.format(*self.crop))
+        if (self.width, self.height) != self.crop[2:]:
+            filters.append(f'scale={self.width}:{self.height}:flags=area')
+        if filters:
+            cmd += ['-vf', ','.join(filters)]
+
+        return cmd + ['-vsync', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+
+    def _start(self, start_frame):
+        self._stop()
+        self._process = subprocess.Popen(
+            self._command(start_frame), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            bufsize=self._frame_bytes
+        )
+        self.position = start_frame
+
+    def _stop(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+
+    def _read_into(self, buffer):
+        """Lee un frame completo en buffer; False al final del video"""
+        if self._process is None:
+            return False
+        view = memoryview(buffer)
+        received = 0
+        while received < self._frame_bytes:
+            n = self._process.stdout.readinto(view[received:])
+            if not n:
+                return False
+            received += n
+        self.position += 1
+        return True
+
+    def read(self):
+        buffer = bytearray(self._frame_bytes)
+        if not self._read_into(buffer):
+            return False, None
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def grab(self):
+        # Con un pipe no se puede saltar la decodificación; solo se descarta el frame
+        return self._read_into(self._discard)
+
+    def get(self, prop):
+        values = {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+            cv2.CAP_PROP_POS_FRAMES: self.position
+        }
+        return float(values.get(prop, 0))
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES or not self._opened:
+            return False
+        self._start(int(value))
+        return True
+
+    def isOpened(self):
+        return self._opened
+
+    def release(self):
+        self._stop()
+        self._opened = False
+
+
+def get_source_transform(cap):
+    """
+    Escala y offset frame -> video original de una fuente de frames
+    (identidad para cv2.VideoCapture)
+    """
+    return getattr(cap, 'source_transform', ((1.0, 1.0), (0, 0)))
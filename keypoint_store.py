@@ -0,0 +1,142 @@
+"""
+Almacenamiento columnar de keypoints de la segunda pasada
+
+La segunda pasada escribe un bloque float32 (17, 3) [x, y, conf] por frame
+directamente a un archivo .npy, sin acumular filas en memoria. Los consumidores
+(inserción de posturas y predicción) lo leen con np.load(mmap_mode='r'),
+sin parsear texto. El CSV queda como exportación opcional.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+KEYPOINTS_SUFFIX = '_keypoints.npy'
+
+# Orden COCO de los 17 keypoints de YOLOv11-pose (mismo orden que la tabla postures)
+KEYPOINT_NAMES = (
+    'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle'
+)
+
+KEYPOINT_COLUMNS = ['frame'] + [
+    f'{name}_{value}' for name in KEYPOINT_NAMES for value in ('x', 'y', 'confidence')
+]
+
+_FRAME_SHAPE = (len(KEYPOINT_NAMES), 3)
+
+
+def get_keypoints_path(path):
+    """
+    Ruta del archivo de keypoints asociado a otro archivo del mismo trabajo
+    (ej: penalty_5_postures.csv -> penalty_5_postures_keypoints.npy)
+    """
+    base, _ = os.path.splitext(path)
+    return f"{base}{KEYPOINTS_SUFFIX}"
+
+
+def _header(n_frames):
+    return {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+            'fortran_order': False,
+            'shape': (n_frames,) + _FRAME_SHAPE}
+
+
+class KeypointWriter:
+    def __init__(self, path):
+        """
+        Escritor incremental de keypoints (N, 17, 3) float32 en formato .npy
+
+        El header se escribe con 0 frames y se reescribe al cerrar con el total
+        (tiene largo fijo, así que los datos no se mueven).
+
+        Args:
+            path: Ruta del archivo .npy
+        """
+        self.path = path
+        self.n_frames = 0
+        self._file = open(path, 'wb')
+        np.lib.format.write_array_header_1_0(self._file, _header(0))
+        self._data_offset = self._file.tell()
+
+    def write(self, keypoints):
+        """
+        Agrega los keypoints de un frame (NaN si no hay jugador)
+
+        Args:
+            keypoints: Array (17, 3) o None
+        """
+        if keypoints is None:
+            block = np.full(_FRAME_SHAPE, np.nan, dtype=np.float32)
+        else:
+            block = np.ascontiguousarray(keypoints, dtype=np.float32).reshape(_FRAME_SHAPE)
+        self._file.write(block.tobytes())
+        self.n_frames += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.seek(0)
+        np.lib.format.write_array_header_1_0(self._file, _header(self.n_frames))
+        if self._file.tell() != self._data_offset:
+            raise RuntimeError(f"Header de keypoints inválido en {self.path}")
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def load_keypoints(path):
+    """
+    Keypoints (N, 17, 3) float32 mapeados en memoria (sin copiar ni parsear);
+    la fila i corresponde al frame i
+    """
+    return np.load(path, mmap_mode='r')
+
+
+def keypoints_to_dataframe(keypoints, start=0, stop=None):
+    """
+    DataFrame con las columnas del CSV histórico (frame, nose_x, nose_y, ...)
+
+    Args:
+        keypoints: Array (N, 17, 3)
+        start, stop: Rango de frames (para procesar por bloques)
+    """
+    block = np.asarray(keypoints[start:stop]).reshape(-1, len(KEYPOINT_NAMES) * 3)
+    df = pd.DataFrame(block, columns=KEYPOINT_COLUMNS[1:])
+    df.insert(0, 'frame', np.arange(start, start + len(block)))
+    return df
+
+
+def export_keypoints_csv(keypoints, csv_path, chunk_frames=2048):
+    """
+    Exporta los keypoints al CSV histórico por bloques (memoria acotada)
+    """
+    for start in range(0, max(len(keypoints), 1), chunk_frames):
+        keypoints_to_dataframe(keypoints, start, start + chunk_frames).to_csv(
+            csv_path, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+
+
+def iter_posture_rows(path):
+    """
+    Filas para la tabla postures desde el archivo de keypoints (.npy) o un CSV histórico
+
+    Yields:
+        (frame, [51 valores en el orden de KEYPOINT_COLUMNS, None en lugar de NaN])
+    """
+    if path.endswith('.npy'):
+        rows = load_keypoints(path).reshape(-1, len(KEYPOINT_NAMES) * 3)
+        frames = range(len(rows))
+    else:
+        df = pd.read_csv(path)
+        rows = df[KEYPOINT_COLUMNS[1:]].to_numpy(dtype=np.float64)
+        frames = df['frame'].astype(int).tolist()
+
+    for frame, values in zip(frames, rows):
+        yield int(frame), [None if np.isnan(value) else float(value) for value in values.tolist()]
@@ -0,0 +1,110 @@
+"""
+Detección online del momento del remate en la segunda pasada
+
+Sigue la trayectoria de los tobillos del pateador relativa al centro de la
+cadera. El remate es el pico de velocidad del tobillo (en largos de pierna por
+segundo, así no depende de la resolución ni de la distancia a la cámara): se
+confirma cuando la velocidad supera el umbral durante algunos frames y luego
+cae a menos de la mitad del pico.
+"""
+
+from collections import deque
+
+import numpy as np
+
+# Índices COCO de los keypoints usados
+LEFT_HIP, RIGHT_HIP = 11, 12
+LEFT_ANKLE, RIGHT_ANKLE = 15, 16
+
+# Velocidad mínima del tobillo respecto de la cadera en el remate (largos de pierna / s).
+# La carrera de aproximación queda por debajo; el golpe al balón por encima.
+KICK_SPEED_THRESHOLD = 8.0
+
+
+class KickDetector:
+    def __init__(self, fps, foot=None, speed_threshold=KICK_SPEED_THRESHOLD, min_peak_frames=2,
+                 confirm_frames=3, max_gap_frames=5):
+        """
+        Detector del frame del remate a partir de keypoints frame a frame
+
+        Args:
+            fps: Frames por segundo del video
+            foot: Pie del pateador ('L' o 'R'); None = ambos tobillos
+            speed_threshold: Velocidad mínima del remate (largos de pierna / s)
+            min_peak_frames: Frames consecutivos sobre el umbral para aceptar el pico
+            confirm_frames: Frames bajo la mitad del pico para confirmar el remate
+            max_gap_frames: Frames sin keypoints tras los cuales se reinicia la trayectoria
+        """
+        self.fps = fps or 25.0
+        self.ankles = {'L': [LEFT_ANKLE], 'R': [RIGHT_ANKLE]}.get(foot, [LEFT_ANKLE, RIGHT_ANKLE])
+        self.speed_threshold = speed_threshold
+        self.min_peak_frames = min_peak_frames
+        self.confirm_frames = confirm_frames
+        self.max_gap_frames = max_gap_frames
+
+        self.kick_frame = None
+        self._leg_lengths = deque(maxlen=30)
+        self._previous = None  # (frame_idx, track_id, posiciones relativas (n_tobillos, 2))
+        self._above = 0
+        self._below = 0
+        self._run_peak = None  # Máximo de la racha actual sobre el umbral
+        self._peak = None  # (frame_idx, velocidad)
+
+    def _leg_length(self, keypoints):
+        """Largo de pierna (mediana reciente de la distancia cadera-tobillo)"""
+        hips = keypoints[[LEFT_HIP, RIGHT_HIP], :2]
+        ankles = keypoints[[LEFT_ANKLE, RIGHT_ANKLE], :2]
+        lengths = np.linalg.norm(ankles - hips, axis=1)
+        self._leg_lengths.extend(lengths[np.isfinite(lengths) & (lengths > 0)].tolist())
+        return float(np.median(self._leg_lengths)) if self._leg_lengths else None
+
+    def update(self, frame_idx, keypoints, track_id=None):
+        """
+        Procesa los keypoints del jugador elegido en un frame
+
+        Args:
+            frame_idx: Índice del frame
+            keypoints: Array (17, 3) con NaN en keypoints faltantes, o None
+            track_id: Track del jugador (un cambio de track reinicia la trayectoria)
+
+        Returns:
+            Frame del remate si ya se detectó, si no None
+        """
+        if self.kick_frame is not None or keypoints is None:
+            return self.kick_frame
+
+        hips = keypoints[[LEFT_HIP, RIGHT_HIP], :2]
+        if np.isnan(hips).all():
+            return None
+        hip_center = np.nanmean(hips, axis=0)
+        relative = keypoints[self.ankles, :2] - hip_center
+        leg_length = self._leg_length(keypoints)
+
+        previous = self._previous
+        self._previous = (frame_idx, track_id, relative)
+        if (previous is None or leg_length is None or previous[1] != track_id
+                or frame_idx - previous[0] > self.max_gap_frames):
+            return None
+
+        # Velocidad del tobillo más rápido respecto de la cadera
+        displacement = np.linalg.norm(relative - previous[2], axis=1)
+        if np.isnan(displacement).all():
+            return None
+        speed = np.nanmax(displacement) / (frame_idx - previous[0]) * self.fps / leg_length
+
+        if speed >= self.speed_threshold:
+            self._above += 1
+            self._below = 0
+            if self._run_peak is None or speed > self._run_peak[1]:
+                self._run_peak = (frame_idx, speed)
+            if self._above >= self.min_peak_frames and (self._peak is None or self._run_peak[1] > self._peak[1]):
+                self._peak = self._run_peak
+        else:
+            self._above = 0
+            self._run_peak = None
+            if self._peak is not None and speed < self._peak[1] / 2:
+                self._below += 1
+                if self._below >= self.confirm_frames:
+                    self.kick_frame = self._peak[0]
+
+        return self.kick_frame
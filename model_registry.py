@@ -0,0 +1,171 @@
+"""
+Registro de modelos YOLO compartido por todo el proceso
+
+Cada archivo de pesos se carga una sola vez por backend de inferencia y se
+reutiliza entre requests. Como los predictores de ultralytics no son seguros
+entre hilos, cada modelo tiene su propio lock que se toma durante la inferencia.
+
+Backends:
+    torch:    pesos .pt con PyTorch (default)
+    onnx:     exportado a .onnx y ejecutado con ONNX Runtime
+    openvino: exportado a <pesos>_openvino_model/ y ejecutado con OpenVINO
+    onnx_int8: <pesos>_int8.onnx cuantizado con quantize.py, con ONNX Runtime
+
+Los backends exportados se generan la primera vez que se piden (junto a los
+pesos .pt) y se reutilizan en los siguientes arranques. El INT8 no se genera
+solo porque necesita calibrarse con clips propios (python quantize.py calibrate). Se exportan con ejes
+dinámicos para aceptar el mismo rango de imgsz y tamaños de lote que PyTorch.
+El modelo exportado tiene la misma interfaz de ultralytics (Results), así que
+el detector no cambia según el backend.
+"""
+
+import os
+import threading
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+DETECTION_WEIGHTS = 'yolo11n.pt'
+POSE_WEIGHTS = 'yolo11n-pose.pt'
+
+INFERENCE_BACKENDS = ('torch', 'onnx', 'openvino', 'onnx_int8')
+DEFAULT_BACKEND = 'torch'
+
+_models = {}
+_locks = {}
+_backends = {}  # Backend que realmente cargó cada modelo (torch si el pedido falló)
+_registry_lock = threading.Lock()
+
+# Hilos de torch al importar (los que usa set_torch_threads sin valor)
+DEFAULT_TORCH_THREADS = torch.get_num_threads()
+
+
+def set_torch_threads(threads=None):
+    """
+    Fija los hilos de torch del proceso
+
+    Es un valor global al proceso: se llama una vez al arrancar (servidor, CLI
+    o cada proceso de la primera pasada por segmentos), nunca desde un request.
+
+    Args:
+        threads: Cantidad de hilos (None = default de torch)
+
+    Returns:
+        Hilos aplicados
+    """
+    threads = int(threads) if threads else DEFAULT_TORCH_THREADS
+    if torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+    return threads
+
+
+def get_export_path(weights, backend):
+    """
+    Ruta del modelo exportado para un backend (ej: yolo11n.pt -> yolo11n.onnx)
+    """
+    base, _ = os.path.splitext(weights)
+    if backend == 'onnx':
+        return f"{base}.onnx"
+    if backend == 'openvino':
+        return f"{base}_openvino_model"
+    if backend == 'onnx_int8':
+        return f"{base}_int8.onnx"
+    return weights
+
+
+def _load_model(weights, backend):
+    """
+    Carga los pesos en el backend pedido, exportándolos si todavía no existen
+    """
+    if backend == 'torch':
+        return YOLO(weights)
+
+    export_path = get_export_path(weights, backend)
+    source = YOLO(weights)
+    if backend == 'onnx_int8' and not os.path.exists(export_path):
+        raise FileNotFoundError(f"{export_path} no existe; generarlo con: python quantize.py calibrate")
+    if not os.path.exists(export_path):
+        print(f"📦 Exportando {weights} a {backend} (solo la primera vez)...")
+        export_path = source.export(format=backend, dynamic=True, verbose=False)
+    return YOLO(export_path, task=source.task)
+
+
+def get_model(weights, backend=DEFAULT_BACKEND):
+    """
+    Retorna el modelo YOLO para unos pesos y backend, cargándolo la primera vez
+
+    Si el backend no se puede usar (ej: falta onnxruntime u openvino, o no se
+    generó el modelo INT8), se registra el modelo de PyTorch en su lugar para
+    no reintentar en cada request; get_model_backend indica cuál quedó cargado.
+
+    Args:
+        weights: Ruta o nombre de los pesos (ej: 'yolo11n.pt')
+        backend: 'torch', 'onnx', 'openvino' u 'onnx_int8'
+    """
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Backend de inferencia desconocido: {backend} (opciones: {', '.join(INFERENCE_BACKENDS)})")
+
+    key = (weights, backend)
+    with _registry_lock:
+        if key not in _models:
+            print(f"🔧 Cargando modelo en el registro: {weights} ({backend})")
+            try:
+                _models[key] = _load_model(weights, backend)
+                _backends[key] = backend
+            except Exception as e:
+                if backend == 'torch':
+                    raise
+                print(f"⚠️ No se pudo usar {backend} para {weights}: {e}. Usando torch")
+                _models[key] = YOLO(weights)
+                _backends[key] = 'torch'
+            _locks[key] = threading.Lock()
+        return _models[key]
+
+
+def get_model_lock(weights, backend=DEFAULT_BACKEND):
+    """
+    Lock de inferencia del modelo (se crea junto con el modelo)
+    """
+    get_model(weights, backend)
+    return _locks[(weights, backend)]
+
+
+def get_model_backend(weights, backend=DEFAULT_BACKEND):
+    """
+    Backend con el que quedó cargado el modelo (el pedido o 'torch' si no se pudo usar)
+    """
+    get_model(weights, backend)
+    return _backends[(weights, backend)]
+
+
+def warmup_model(weights, imgsz=640, backend=DEFAULT_BACKEND):
+    """
+    Ejecuta una inferencia con una imagen vacía para pagar la latencia
+    de la primera llamada (inicialización del predictor) antes del primer request
+    """
+    model = get_model(weights, backend)
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    with get_model_lock(weights, backend):
+        model(dummy, imgsz=imgsz, verbose=False)
+
+
+def warmup_models(specs=((DETECTION_WEIGHTS, 640), (POSE_WEIGHTS, 320)), backend=DEFAULT_BACKEND):
+    """
+    Carga y precalienta los modelos del detector
+
+    Args:
+        specs: Pares (pesos, imgsz) con el tamaño de entrada que usará cada modelo
+        backend: Backend de inferencia (los exportados se generan acá si faltan)
+    """
+    for weights, imgsz in specs:
+        try:
+            warmup_model(weights, imgsz, backend)
+            print(f"🔥 Modelo precalentado: {weights} ({imgsz}px, {get_model_backend(weights, backend)})")
+        except Exception as e:
+            print(f"⚠️ No se pudo precalentar {weights}: {e}")
+
+
+def loaded_models():
+    """Modelos cargados en este proceso como {(pesos, backend pedido): backend cargado}"""
+    with _registry_lock:
+        return dict(_backends)
@@ -0,0 +1,68 @@
+"""
+Compuerta de movimiento para saltar la detección en tramos casi estáticos
+
+Compara una miniatura en grises de cada frame contra la del último frame en
+el que se ejecutó la detección. Si la fracción de píxeles que cambiaron no
+supera el umbral (ej: el pateador esperando el silbato), la detección se
+salta y se reutilizan los tracks anteriores. Como la referencia es el último
+frame detectado, un movimiento lento se acumula hasta volver a detectar.
+"""
+
+import cv2
+import numpy as np
+
+# Ancho de la miniatura (el alto mantiene la proporción del frame)
+MOTION_THUMBNAIL_WIDTH = 160
+
+# Diferencia mínima de gris (0-255) para que un píxel cuente como movimiento
+# (por debajo queda el ruido de compresión)
+MOTION_PIXEL_THRESHOLD = 12
+
+# Frames seguidos sin detectar como máximo aunque la escena siga quieta
+MOTION_MAX_SKIP_FRAMES = 30
+
+
+class MotionGate:
+    def __init__(self, threshold, max_skip_frames=MOTION_MAX_SKIP_FRAMES, thumbnail_width=MOTION_THUMBNAIL_WIDTH,
+                 pixel_threshold=MOTION_PIXEL_THRESHOLD):
+        """
+        Args:
+            threshold: Fracción de píxeles de la miniatura que deben cambiar para
+                detectar (ej: 0.002); por debajo el frame se considera estático
+            max_skip_frames: Frames estáticos seguidos tras los cuales se detecta igual
+            thumbnail_width: Ancho de la miniatura en píxeles
+            pixel_threshold: Diferencia de gris mínima por píxel
+        """
+        self.threshold = float(threshold)
+        self.max_skip_frames = int(max_skip_frames)
+        self.thumbnail_width = int(thumbnail_width)
+        self.pixel_threshold = pixel_threshold
+        self._reference = None
+        self._consecutive = 0
+
+    def thumbnail(self, frame):
+        """Miniatura en grises; INTER_AREA promedia y suaviza el ruido del sensor"""
+        height, width = frame.shape[:2]
+        size = (self.thumbnail_width, max(1, round(height * self.thumbnail_width / width)))
+        return cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    def motion(self, thumbnail):
+        """Fracción de píxeles que cambiaron respecto del último frame detectado"""
+        changed = cv2.absdiff(thumbnail, self._reference) > self.pixel_threshold
+        return float(np.count_nonzero(changed)) / changed.size
+
+    def is_static(self, frame):
+        """
+        Decide si se puede saltar la detección en este frame
+
+        Si retorna False el frame pasa a ser la nueva referencia (se detecta).
+        """
+        thumbnail = self.thumbnail(frame)
+        if (self._reference is not None and self._reference.shape == thumbnail.shape
+                and self._consecutive < self.max_skip_frames and self.motion(thumbnail) < self.threshold):
+            self._consecutive += 1
+            return True
+
+        self._reference = thumbnail
+        self._consecutive = 0
+        return False
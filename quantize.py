@@ -0,0 +1,235 @@
+"""
+Cuantización INT8 de los modelos YOLO para despliegues solo CPU
+
+Calibra con frames de nuestros propios clips (carpeta de uploads) y genera
+<pesos>_int8.onnx para el backend 'onnx_int8' del registro de modelos.
+El reporte compara la pose INT8 contra el camino FP32 para decidir por perfil.
+
+python quantize.py calibrate --profile balanced --frames 200
+python quantize.py report --profiles fast balanced --json int8_report.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+import cv2
+import numpy as np
+
+import config
+from benchmark import _quiet, benchmark_backends, check_parity, report_parity, sample_video_frames
+from compute_profiles import COMPUTE_PROFILES, get_compute_profile
+from detector import FootballPlayerDetector
+from model_registry import get_export_path, get_model
+
+# Tolerancias del reporte contra torch (INT8 pierde algo de precisión respecto de FP32)
+INT8_MIN_BOX_IOU = 0.8
+INT8_MAX_KEYPOINT_ERROR_PX = 10.0
+INT8_MAX_COUNT_MISMATCH_FRACTION = 0.1
+
+# Videos subidos por los endpoints de upload (penalty_<id>_temp.mp4, prediction_<id>_temp.mp4)
+UPLOADED_CLIPS_PATTERN = '*_temp.mp4'
+
+
+def find_calibration_clips(folder=None):
+    """
+    Clips subidos disponibles para calibrar (por defecto config.UPLOAD_FOLDER)
+    """
+    return sorted(glob.glob(os.path.join(folder or config.UPLOAD_FOLDER, UPLOADED_CLIPS_PATTERN)))
+
+
+def sample_calibration_frames(clips, n_frames):
+    """
+    Reparte n_frames frames de muestra entre los clips
+    """
+    per_clip = max(1, -(-n_frames // len(clips)))
+    frames = []
+    for clip in clips:
+        frames.extend(sample_video_frames(clip, per_clip))
+    return frames[:n_frames]
+
+
+def letterbox_blob(image, size):
+    """
+    Mismo preprocesamiento que ultralytics: letterbox cuadrado con gris 114,
+    BGR -> RGB, escala 0-1 y formato (1, 3, size, size) float32
+    """
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    new_w, new_h = max(1, round(width * scale)), max(1, round(height * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    return np.ascontiguousarray(canvas[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def pose_calibration_crops(detector, frames, max_crops):
+    """
+    Recortes de jugadores para calibrar el modelo de pose, con el mismo
+    letterbox que usa el detector en la segunda pasada (prepare_pose_crop)
+    """
+    crops = []
+    for frame in frames:
+        detections = detector.filter_players_in_field(detector.detect_players_in_frames([frame])[0], frame.shape)
+        for bbox in detections:
+            crop = detector.prepare_pose_crop(frame, bbox[:4])
+            if crop is not None:
+                crops.append(crop[0])
+        if len(crops) >= max_crops:
+            break
+    return crops[:max_crops]
+
+
+def quantize_model(weights, images, input_size):
+    """
+    Cuantiza estáticamente (QDQ, pesos por canal) el ONNX FP32 de unos pesos
+
+    La cabeza del modelo (último módulo) se deja en FP32: es donde se
+    decodifican cajas y keypoints y donde INT8 más error agrega.
+
+    Returns:
+        Ruta del modelo INT8
+    """
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+
+    # ONNX FP32 exportado por el registro (lo genera si falta)
+    fp32_path = get_export_path(weights, 'onnx')
+    get_model(weights, 'onnx')
+    if not os.path.exists(fp32_path):
+        raise RuntimeError(f"No se pudo exportar {weights} a ONNX (¿falta onnx/onnxruntime?)")
+
+    graph = onnx.load(fp32_path).graph
+    input_name = graph.input[0].name
+    # Nodos del último módulo (ej: /model.23/... en yolo11n)
+    modules = [int(match.group(1)) for match in (re.match(r'/model\.(\d+)/', node.name) for node in graph.node)
+               if match]
+    head = f"/model.{max(modules)}/" if modules else None
+    head_nodes = [node.name for node in graph.node if head and node.name.startswith(head)]
+
+    class FrameCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self._blobs = (letterbox_blob(image, input_size) for image in images)
+
+        def get_next(self):
+            blob = next(self._blobs, None)
+            return None if blob is None else {input_name: blob}
+
+    output_path = get_export_path(weights, 'onnx_int8')
+    print(f"⚖️ Cuantizando {weights} con {len(images)} imágenes de {input_size}px "
+          f"({len(head_nodes)} nodos de la cabeza en FP32)...")
+    quantize_static(
+        fp32_path, output_path, FrameCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=head_nodes
+    )
+    print(f"✅ Modelo INT8: {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB, "
+          f"FP32: {os.path.getsize(fp32_path) / 1e6:.1f} MB)")
+    return output_path
+
+
+def calibrate(profile=None, n_frames=200, max_crops=400, clips_folder=None):
+    """
+    Genera los modelos INT8 de detección y pose de un perfil
+
+    Returns:
+        Diccionario {'detection': ruta, 'pose': ruta}
+    """
+    clips = find_calibration_clips(clips_folder)
+    if not clips:
+        raise RuntimeError(f"No hay clips para calibrar en {clips_folder or config.UPLOAD_FOLDER}")
+
+    settings = get_compute_profile(profile)
+    frames = sample_calibration_frames(clips, n_frames)
+    print(f"🎞️ {len(frames)} frames de calibración de {len(clips)} clips")
+
+    # Los recortes de pose salen de la detección FP32
+    detector = _quiet(FootballPlayerDetector.from_profile, profile, backend='torch')
+    crops = pose_calibration_crops(detector, frames, max_crops)
+    if not crops:
+        raise RuntimeError("No se detectaron jugadores en los frames de calibración")
+    print(f"🧍 {len(crops)} recortes de jugadores para calibrar la pose")
+
+    return {
+        'detection': quantize_model(settings['detection_weights'], frames, settings['detection_input_size']),
+        'pose': quantize_model(settings['pose_weights'], crops, settings['pose_input_size'])
+    }
+
+
+def report(profiles, video_path=None, n_frames=32, repeat=3):
+    """
+    Compara INT8 contra FP32 (torch) por perfil: throughput y error de keypoints
+
+    Returns:
+        Diccionario {perfil: resultados de benchmark_backends}
+    """
+    if video_path is None:
+        clips = find_calibration_clips()
+        if not clips:
+            raise RuntimeError("No hay clips en la carpeta de uploads; indicar un video")
+        video_path = clips[0]
+
+    results = {}
+    for profile in profiles:
+        print(f"\n📊 Perfil {profile}")
+        results[profile] = benchmark_backends(video_path, ['torch', 'onnx', 'onnx_int8'],
+                                              n_frames, repeat, profile)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cuantización INT8 de los modelos YOLO del detector')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    calibrate_parser = subparsers.add_parser('calibrate', help='Generar los modelos INT8 de un perfil')
+    calibrate_parser.add_argument('--profile', choices=list(COMPUTE_PROFILES), help='Perfil (default: balanced)')
+    calibrate_parser.add_argument('--frames', type=int, default=200, help='Frames de calibración (default: 200)')
+    calibrate_parser.add_argument('--max-crops', type=int, default=400,
+                                  help='Recortes de jugadores para la pose (default: 400)')
+    calibrate_parser.add_argument('--clips-folder', help='Carpeta de clips (default: UPLOAD_FOLDER)')
+
+    report_parser = subparsers.add_parser('report', help='Comparar INT8 contra FP32 por perfil')
+    report_parser.add_argument('video_path', nargs='?', help='Video de prueba (default: primer clip subido)')
+    report_parser.add_argument('--profiles', nargs='+', choices=list(COMPUTE_PROFILES), default=['balanced'],
+                               help='Perfiles a evaluar (default: balanced)')
+    report_parser.add_argument('--frames', type=int, default=32, help='Frames de muestra (default: 32)')
+    report_parser.add_argument('--repeat', type=int, default=3, help='Repeticiones (se usa la más rápida)')
+    report_parser.add_argument('--min-box-iou', type=float, default=INT8_MIN_BOX_IOU,
+                               help=f'IoU mínimo de cajas contra torch (default: {INT8_MIN_BOX_IOU})')
+    report_parser.add_argument('--max-keypoint-error', type=float, default=INT8_MAX_KEYPOINT_ERROR_PX,
+                               help=f'Error máximo de keypoints en px (default: {INT8_MAX_KEYPOINT_ERROR_PX})')
+    report_parser.add_argument('--max-count-mismatch', type=float, default=INT8_MAX_COUNT_MISMATCH_FRACTION,
+                               help='Fracción máxima de frames con distinta cantidad de personas '
+                                    f'(default: {INT8_MAX_COUNT_MISMATCH_FRACTION})')
+    report_parser.add_argument('--json', help='Guardar resultados en un archivo JSON')
+
+    args = parser.parse_args()
+
+    if args.command == 'calibrate':
+        calibrate(args.profile, args.frames, args.max_crops, args.clips_folder)
+    elif args.command == 'report':
+        results = report(args.profiles, args.video_path, args.frames, args.repeat)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"💾 Resultados guardados en: {args.json}")
+
+        # Sale con error si algún backend de algún perfil está fuera de tolerancia
+        failures = [f"{profile}/{failure}" for profile, profile_results in results.items()
+                    for failure in check_parity(profile_results, args.min_box_iou, args.max_keypoint_error,
+                                                args.max_count_mismatch)]
+        sys.exit(report_parity(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Caché en disco de resultados del detector por contenido del video
+
+Los uploads se hashean (SHA-256) mientras se escriben a disco. Los tracks de
+la primera pasada y las poses por track se guardan en
+<carpeta>/<hash>_<config>/, donde <config> resume los parámetros del detector
+que cambian el resultado. Un clip que se sube de nuevo (ej: por el catálogo y
+después por predicción) reutiliza esos resultados y no vuelve a procesarse.
+
+El tamaño total se limita con LRU: cada acceso actualiza la fecha de la
+entrada y al guardar se eliminan las menos usadas hasta quedar bajo el límite.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+HASH_SUFFIX = '_sha256.txt'
+
+# Archivos de cada entrada
+CACHED_TIMELINE = 'tracks.npz'
+CACHED_POSES = 'poses.npz'
+
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_hash_path(video_path):
+    """
+    Ruta del sidecar con el hash del video subido
+    (ej: penalty_5_temp.mp4 -> penalty_5_temp_sha256.txt)
+    """
+    base, _ = os.path.splitext(video_path)
+    return f"{base}{HASH_SUFFIX}"
+
+
+def save_upload(file, path):
+    """
+    Guarda un archivo subido calculando su SHA-256 en el mismo recorrido
+    (sin volver a leer el video) y deja el hash en el sidecar
+
+    Args:
+        file: FileStorage de Flask (o cualquier objeto con .stream / .read)
+        path: Ruta destino
+
+    Returns:
+        Hash hexadecimal del contenido
+    """
+    stream = getattr(file, 'stream', file)
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(_UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            f.write(chunk)
+
+    content_hash = digest.hexdigest()
+    with open(get_hash_path(path), 'w') as f:
+        f.write(content_hash)
+    return content_hash
+
+
+def get_video_hash(video_path):
+    """
+    Hash del video guardado al subirlo (None si no tiene sidecar)
+    """
+    hash_path = get_hash_path(video_path)
+    if not os.path.exists(hash_path):
+        return None
+    with open(hash_path) as f:
+        return f.read().strip() or None
+
+
+def _settings_key(settings):
+    """Resumen corto y estable de los parámetros que cambian el resultado"""
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def _folder_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ResultCache:
+    def __init__(self, folder, max_bytes):
+        """
+        Args:
+            folder: Carpeta del caché
+            max_bytes: Tamaño máximo en disco (0 = caché desactivado)
+        """
+        self.folder = folder
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def entry(self, content_hash, settings):
+        """
+        Entrada del caché para un video y una configuración del detector
+
+        Returns:
+            CacheEntry o None si el caché está desactivado o no hay hash
+        """
+        if not self.enabled or not content_hash:
+            return None
+        return CacheEntry(self, os.path.join(self.folder, f"{content_hash}_{_settings_key(settings)}"))
+
+    def has_results(self, content_hash):
+        """
+        True si hay resultados del video con alguna configuración
+        """
+        if not self.enabled or not content_hash or not os.path.isdir(self.folder):
+            return False
+        return any(name.startswith(f"{content_hash}_") for name in os.listdir(self.folder))
+
+    def evict(self):
+        """
+        Elimina las entradas usadas hace más tiempo hasta quedar bajo max_bytes
+        """
+        with self._lock:
+            if not os.path.isdir(self.folder):
+                return
+            entries = []
+            for name in os.listdir(self.folder):
+                path = os.path.join(self.folder, name)
+                if os.path.isdir(path):
+                    entries.append((os.path.getmtime(path), _folder_size(path), path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                print(f"🧹 Caché: entrada eliminada por tamaño {os.path.basename(path)}")
+
+
+class CacheEntry:
+    def __init__(self, cache, path):
+        """
+        Resultados de un video con una configuración del detector
+        """
+        self.cache = cache
+        self.path = path
+
+    def file_path(self, name):
+        return os.path.join(self.path, name)
+
+    def get(self, name):
+        """
+        Ruta de un archivo de la entrada si existe (y la marca como usada)
+        """
+        path = self.file_path(name)
+        if not os.path.exists(path):
+            return None
+        now = time.time()
+        os.utime(self.path, (now, now))
+        return path
+
+    def put(self, name, save):
+        """
+        Guarda un archivo en la entrada y aplica el límite de tamaño
+
+        Args:
+            name: Nombre del archivo (CACHED_TIMELINE, CACHED_POSES)
+            save: Función path -> None que escribe el archivo
+        """
+        os.makedirs(self.path, exist_ok=True)
+        # Se escribe a un temporal para no dejar archivos a medias ante errores
+        partial_path = self.file_path(f"partial_{name}")
+        save(partial_path)
+        os.replace(partial_path, self.file_path(name))
+        now = time.time()
+        os.utime(self.path, (now, now))
+        self.cache.evict()
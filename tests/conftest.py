@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytest
+import torch
+
+# Los módulos del backend están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Boxes:
+    def __init__(self, rows):
+        self.xyxy = torch.tensor(rows[:, :4])
+        self.conf = torch.tensor(rows[:, 4])
+        self.cls = torch.zeros(len(rows))
+
+
+class _Keypoints:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Result:
+    def __init__(self, rows, keypoints=None):
+        self.boxes = _Boxes(rows)
+        self.keypoints = None if keypoints is None else _Keypoints(keypoints)
+
+
+class FakeDetectionModel:
+    """
+    Modelo determinístico sin pesos: cada rectángulo blanco del frame es una persona
+
+    Registra el tamaño de lote de cada llamada en batch_sizes.
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect(self, frame):
+        mask = cv2.inRange(frame, (200, 200, 200), (255, 255, 255))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        rows = [[x, y, x + w, y + h, 0.5 + (x % 50) / 100] for x, y, w, h, area in stats[1:] if area > 50]
+        return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+    def __call__(self, source, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        self.batch_sizes.append(len(frames))
+        return [_Result(self.detect(frame)) for frame in frames]
+
+
+def make_player_frames(n_frames, width=640, height=360, seed=0):
+    """
+    Frames sintéticos con jugadores (rectángulos blancos) que se mueven
+
+    Returns:
+        Lista de frames BGR uint8
+    """
+    rng = np.random.default_rng(seed)
+    positions = np.array([[80.0 + 120 * i, 120.0 + 40 * (i % 3)] for i in range(4)])
+    velocities = rng.uniform(-4, 4, positions.shape)
+    frames = []
+    for _ in range(n_frames):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        for x, y in positions.astype(int):
+            cv2.rectangle(frame, (x, y), (x + 24, y + 70), (255, 255, 255), -1)
+        frames.append(frame)
+        positions = np.clip(positions + velocities, 10, [width - 40, height - 80])
+    return frames
+
+
+@pytest.fixture
+def fake_detector(monkeypatch):
+    """
+    Fábrica de FootballPlayerDetector con modelos falsos (sin cargar pesos)
+
+    Returns:
+        Función (loaded_backend=None, **kwargs) -> (detector, FakeDetectionModel), donde
+        loaded_backend(pesos, backend) simula el backend que cargó el registro
+    """
+    import detector as detector_module
+
+    def build(loaded_backend=None, **kwargs):
+        model = FakeDetectionModel()
+        monkeypatch.setattr(detector_module, 'get_model', lambda weights, backend='torch': model)
+        monkeypatch.setattr(detector_module, 'get_model_lock', lambda weights, backend='torch': threading.Lock())
+        monkeypatch.setattr(detector_module, 'get_model_backend',
+                            loaded_backend or (lambda weights, backend='torch': backend))
+        return detector_module.FootballPlayerDetector(**kwargs), model
+
+    return build
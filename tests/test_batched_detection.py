@@ -0,0 +1,68 @@
+"""
+Detección por lotes: lotes de N frames deben dar lo mismo que de a uno
+"""
+
+import numpy as np
+import pytest
+
+from conftest import make_player_frames
+
+
+def run_detections(detector, frames):
+    return [None if detections is None else detections.copy()
+            for _, detections in detector.iter_frame_detections(frames)]
+
+
+def run_tracks(detector, frames):
+    tracks = []
+    for frame, detections in detector.iter_frame_detections(frames):
+        if detections is None:
+            tracks.append(detector.tracker.predict())
+        else:
+            tracks.append(detector.track_detections(detections, frame.shape))
+    return tracks
+
+
+@pytest.mark.parametrize('batch_size', [2, 4, 7])
+def test_batched_detections_match_single_frame(fake_detector, batch_size):
+    frames = make_player_frames(30)
+    single, single_model = fake_detector(detection_batch_size=1)
+    batched, batched_model = fake_detector(detection_batch_size=batch_size)
+
+    expected = run_detections(single, frames)
+    actual = run_detections(batched, frames)
+
+    assert len(actual) == len(expected) == len(frames)
+    for a, b in zip(actual, expected):
+        np.testing.assert_array_equal(a, b)
+
+    assert set(single_model.batch_sizes) == {1}
+    assert sum(batched_model.batch_sizes) == len(frames)
+    assert max(batched_model.batch_sizes) == batch_size
+
+
+@pytest.mark.parametrize('stride', [2, 3])
+def test_batched_detections_with_stride(fake_detector, stride):
+    frames = make_player_frames(25)
+    single, _ = fake_detector(detection_batch_size=1, detection_stride=stride)
+    batched, batched_model = fake_detector(detection_batch_size=4, detection_stride=stride)
+
+    expected = run_detections(single, frames)
+    actual = run_detections(batched, frames)
+
+    # Los frames intermedios llegan sin detecciones, en el mismo lugar
+    assert [d is None for d in actual] == [i % stride != 0 for i in range(len(frames))]
+    for a, b in zip(actual, expected):
+        if b is None:
+            assert a is None
+        else:
+            np.testing.assert_array_equal(a, b)
+    assert sum(batched_model.batch_sizes) == len(range(0, len(frames), stride))
+
+
+def test_batched_tracks_match_single_frame(fake_detector):
+    frames = make_player_frames(40)
+    single, _ = fake_detector(detection_batch_size=1)
+    batched, _ = fake_detector(detection_batch_size=8)
+
+    assert run_tracks(batched, frames) == run_tracks(single, frames)
@@ -0,0 +1,46 @@
+"""
+Chequeo de paridad de backends (benchmark.py backends y quantize.py report)
+"""
+
+from benchmark import check_parity, report_parity
+
+
+def parity_result(backend, loaded=None, min_box_iou=0.99, keypoint_error=1.0, count_mismatches=0, frames=32):
+    return {
+        'backend': loaded or backend,
+        'requested_backend': backend,
+        'frames': frames,
+        'min_box_iou': min_box_iou,
+        'max_keypoint_error_px': keypoint_error,
+        'frames_with_count_mismatch': count_mismatches
+    }
+
+
+def test_parity_within_tolerance_passes():
+    results = [parity_result('torch', keypoint_error=0.0), parity_result('onnx')]
+    assert check_parity(results) == []
+    assert report_parity([]) == 0
+
+
+def test_parity_fails_outside_tolerance():
+    results = [
+        parity_result('torch'),
+        parity_result('onnx', min_box_iou=0.5),
+        parity_result('openvino', keypoint_error=12.0),
+        parity_result('onnx_int8', count_mismatches=5)
+    ]
+    failures = check_parity(results)
+    assert [failure.split(':')[0] for failure in failures] == ['onnx', 'openvino', 'onnx_int8']
+    assert report_parity(failures) == 1
+
+
+def test_parity_tolerances_are_configurable():
+    results = [parity_result('onnx_int8', min_box_iou=0.85, keypoint_error=8.0, count_mismatches=2)]
+    assert check_parity(results)
+    assert check_parity(results, min_box_iou=0.8, max_keypoint_error_px=10.0,
+                        max_count_mismatch_fraction=0.1) == []
+
+
+def test_backend_that_fell_back_to_torch_fails():
+    failures = check_parity([parity_result('torch'), parity_result('onnx', loaded='torch')])
+    assert failures == ['onnx: no se pudo cargar, se usó torch']
@@ -0,0 +1,92 @@
+"""
+Políticas de selección del jugador por frame en la segunda pasada
+"""
+
+import numpy as np
+import pytest
+
+from candidate_selection import (CONTINUITY_MARGIN, SELECTION_POLICIES, get_selection_policy,
+                                 highest_mean_confidence, most_valid_landmarks, select_candidate,
+                                 track_continuity)
+
+
+def candidates(valid_counts, confidence=0.9):
+    """Keypoints (n, 17, 3) con los primeros valid_counts[i] keypoints válidos"""
+    keypoints = np.full((len(valid_counts), 17, 3), np.nan, dtype=np.float32)
+    for i, count in enumerate(valid_counts):
+        keypoints[i, :count] = (100.0, 200.0, confidence)
+    return keypoints
+
+
+def original_selection(keypoints, track_ids):
+    """Selección original: dict por track y max() de landmarks sin NaN"""
+    candidate_players = {}
+    for track_id, kps in zip(track_ids, keypoints):
+        valid_count = sum(1 for kp in kps if not (np.isnan(kp[0]) or np.isnan(kp[1]) or np.isnan(kp[2])))
+        candidate_players[track_id] = valid_count
+    return max(candidate_players, key=lambda pid: candidate_players[pid])
+
+
+def test_valid_landmarks_matches_original_selection():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = int(rng.integers(1, 5))
+        keypoints = rng.uniform(0, 1, (n, 17, 3)).astype(np.float32)
+        keypoints[rng.random((n, 17, 3)) < rng.uniform(0, 0.6)] = np.nan
+        track_ids = rng.choice(50, n, replace=False).tolist()
+
+        best = select_candidate(keypoints, track_ids, policy=most_valid_landmarks)
+        assert track_ids[best] == original_selection(keypoints, track_ids)
+
+
+def test_ties_keep_first_candidate():
+    keypoints = candidates([10, 10, 10])
+    for policy in SELECTION_POLICIES.values():
+        assert select_candidate(keypoints, [7, 3, 9], policy=policy) == 0
+
+
+def test_mean_confidence_counts_missing_keypoints_as_zero():
+    keypoints = candidates([17, 12])
+    keypoints[0, :, 2] = 0.5
+    keypoints[1, :12, 2] = 0.95
+    # 0.5 de media contra 0.95 * 12 / 17 = 0.67
+    assert select_candidate(keypoints, [1, 2], policy=highest_mean_confidence) == 1
+
+    keypoints[1, :12, 2] = 0.6
+    # 0.6 * 12 / 17 = 0.42
+    assert select_candidate(keypoints, [1, 2], policy=highest_mean_confidence) == 0
+
+
+@pytest.mark.parametrize('advantage, expected', [
+    (0, 0),
+    (CONTINUITY_MARGIN - 1, 0),
+    (CONTINUITY_MARGIN, 1),
+    (CONTINUITY_MARGIN + 2, 1),
+])
+def test_continuity_switches_only_with_margin(advantage, expected):
+    keypoints = candidates([10, 10 + advantage])
+    assert select_candidate(keypoints, [4, 8], previous_id=4, policy=track_continuity) == expected
+
+
+def test_continuity_without_previous_track_uses_valid_landmarks():
+    keypoints = candidates([5, 9, 9])
+    assert select_candidate(keypoints, [4, 8, 2], previous_id=None, policy=track_continuity) == 1
+    assert select_candidate(keypoints, [4, 8, 2], previous_id=3, policy=track_continuity) == 1
+
+
+def test_continuity_drops_previous_track_without_landmarks():
+    keypoints = candidates([0, 1])
+    assert select_candidate(keypoints, [4, 8], previous_id=4, policy=track_continuity) == 1
+
+
+def test_get_selection_policy():
+    assert get_selection_policy() is most_valid_landmarks
+    assert get_selection_policy('continuity') is track_continuity
+
+    def custom(keypoints, track_ids, previous_id):
+        return -np.asarray(track_ids)
+    assert get_selection_policy(custom) is custom
+    assert select_candidate(candidates([1, 1]), [9, 2], policy=custom) == 1
+
+    with pytest.raises(ValueError):
+        get_selection_policy('no_existe')
@@ -0,0 +1,93 @@
+"""
+Archivo de keypoints de la segunda pasada (.npy escrito por frame)
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from keypoint_store import (KEYPOINT_COLUMNS, KeypointWriter, _header, export_keypoints_csv,
+                            iter_posture_rows, load_keypoints)
+
+
+def random_keypoints(n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    keypoints = rng.uniform(0, 1000, (n_frames, 17, 3)).astype(np.float32)
+    keypoints[rng.random((n_frames, 17)) < 0.2] = np.nan
+    return keypoints
+
+
+def write_keypoints(path, keypoints, missing=()):
+    with KeypointWriter(str(path)) as writer:
+        for frame_idx, block in enumerate(keypoints):
+            writer.write(None if frame_idx in missing else block)
+    return writer
+
+
+@pytest.mark.parametrize('n_frames', [0, 1, 37, 12345])
+def test_writer_rewrites_header_with_frame_count(tmp_path, n_frames):
+    keypoints = random_keypoints(n_frames)
+    path = tmp_path / 'clip_keypoints.npy'
+    write_keypoints(path, keypoints)
+
+    loaded = np.load(path)
+    assert loaded.shape == (n_frames, 17, 3)
+    assert loaded.dtype == np.float32
+    np.testing.assert_array_equal(loaded, keypoints)
+
+
+def test_header_length_does_not_depend_on_frame_count():
+    # El header se reescribe en el lugar: su largo no puede cambiar con el total
+    lengths = set()
+    for n_frames in (0, 9, 10 ** 6, 10 ** 12):
+        buffer = io.BytesIO()
+        np.lib.format.write_array_header_1_0(buffer, _header(n_frames))
+        lengths.add(buffer.tell())
+    assert len(lengths) == 1
+
+
+def test_writer_stores_missing_frames_as_nan(tmp_path):
+    keypoints = random_keypoints(5)
+    path = tmp_path / 'clip_keypoints.npy'
+    write_keypoints(path, keypoints, missing={1, 3})
+
+    loaded = load_keypoints(str(path))
+    assert np.isnan(loaded[[1, 3]]).all()
+    np.testing.assert_array_equal(loaded[[0, 2, 4]], keypoints[[0, 2, 4]])
+
+
+def test_posture_rows_from_npy_and_csv_match(tmp_path):
+    keypoints = random_keypoints(50)
+    npy_path = tmp_path / 'clip_keypoints.npy'
+    csv_path = tmp_path / 'clip.csv'
+    write_keypoints(npy_path, keypoints, missing={7})
+    keypoints[7] = np.nan
+    export_keypoints_csv(load_keypoints(str(npy_path)), str(csv_path), chunk_frames=16)
+
+    npy_rows = list(iter_posture_rows(str(npy_path)))
+    csv_rows = list(iter_posture_rows(str(csv_path)))
+
+    assert [frame for frame, _ in npy_rows] == list(range(50))
+    assert [frame for frame, _ in csv_rows] == list(range(50))
+    for (_, from_npy), (_, from_csv), expected in zip(npy_rows, csv_rows, keypoints.reshape(50, -1)):
+        assert len(from_npy) == len(KEYPOINT_COLUMNS) - 1
+        # NaN -> None para la base de datos
+        assert [value is None for value in from_npy] == np.isnan(expected).tolist()
+        assert [value is None for value in from_csv] == [value is None for value in from_npy]
+        np.testing.assert_allclose(
+            [value for value in from_csv if value is not None],
+            [value for value in from_npy if value is not None], rtol=1e-6)
+    assert all(value is None for value in npy_rows[7][1])
+
+
+def test_exported_csv_keeps_historical_columns(tmp_path):
+    keypoints = random_keypoints(20)
+    csv_path = tmp_path / 'clip.csv'
+    export_keypoints_csv(keypoints, str(csv_path), chunk_frames=8)
+
+    df = pd.read_csv(csv_path)
+    assert list(df.columns) == KEYPOINT_COLUMNS
+    assert df['frame'].tolist() == list(range(20))
+    np.testing.assert_allclose(df[KEYPOINT_COLUMNS[1:]].to_numpy(), keypoints.reshape(20, -1), rtol=1e-6)
@@ -0,0 +1,53 @@
+"""
+Registro de modelos y estado global del proceso (hilos de torch)
+"""
+
+import torch
+
+import model_registry
+
+
+def test_detector_constructor_keeps_process_torch_threads(fake_detector):
+    before = torch.get_num_threads()
+    detector, _ = fake_detector(torch_threads=1 if before > 1 else 2)
+    assert torch.get_num_threads() == before
+    assert detector.torch_threads in (1, 2)
+
+
+def test_set_torch_threads_restores_default():
+    try:
+        assert model_registry.set_torch_threads(1) == 1
+        assert torch.get_num_threads() == 1
+    finally:
+        model_registry.set_torch_threads(None)
+    assert torch.get_num_threads() == model_registry.DEFAULT_TORCH_THREADS
+
+
+def test_failed_backend_is_registered_as_torch(monkeypatch):
+    def fail(weights, backend):
+        raise ImportError('onnxruntime no instalado')
+    monkeypatch.setattr(model_registry, '_load_model', fail)
+    monkeypatch.setattr(model_registry, 'YOLO', lambda weights: ('torch', weights))
+    monkeypatch.setattr(model_registry, '_models', {})
+    monkeypatch.setattr(model_registry, '_locks', {})
+    monkeypatch.setattr(model_registry, '_backends', {})
+
+    assert model_registry.get_model('pesos.pt', 'onnx') == ('torch', 'pesos.pt')
+    assert model_registry.get_model_backend('pesos.pt', 'onnx') == 'torch'
+    assert model_registry.loaded_models() == {('pesos.pt', 'onnx'): 'torch'}
+
+
+def test_detector_reports_loaded_backend(fake_detector):
+    detector, _ = fake_detector(backend='onnx')
+    assert detector.effective_backend == 'onnx'
+    assert detector.result_cache_settings()['backend'] == 'onnx'
+
+    detector, _ = fake_detector(backend='onnx', loaded_backend=lambda weights, backend: 'torch')
+    assert detector.backend == 'onnx'
+    assert detector.effective_backend == 'torch'
+    assert detector.result_cache_settings()['backend'] == 'torch'
+
+    # Solo la pose cae a torch
+    detector, _ = fake_detector(backend='onnx', loaded_backend=lambda weights, backend:
+                                'torch' if 'pose' in weights else backend)
+    assert detector.effective_backend == 'onnx/torch'
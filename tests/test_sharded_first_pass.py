@@ -0,0 +1,107 @@
+"""
+Primera pasada por segmentos: el timeline unido debe ser el de la pasada en serie
+
+Los procesos del pool se reemplazan por un executor en el mismo proceso para
+que usen el modelo falso; el resto (rangos, lectura de cada segmento y unión)
+es el código real.
+"""
+
+import os
+from concurrent.futures import Future
+
+import cv2
+import pytest
+
+from conftest import make_player_frames
+from frame_cache import FrameCache, get_frame_cache_meta_path
+from test_track_timeline import assert_same_tracks
+from track_timeline import TrackTimeline
+
+
+class InProcessExecutor:
+    """Reemplazo de ProcessPoolExecutor que ejecuta cada tarea al enviarla"""
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class InexactSeekCapture:
+    """
+    Captura cuyo seek cae unos frames después y reporta igual la posición pedida
+    (como cv2 en videos con frames B o timestamps variables)
+    """
+
+    def __init__(self, cap, error_frames=3):
+        self._cap = cap
+        self.error_frames = error_frames
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES and value:
+            self._cap.set(prop, value + self.error_frames)
+            return True
+        return self._cap.set(prop, value)
+
+    def __getattr__(self, name):
+        return getattr(self._cap, name)
+
+
+def write_clip(path, n_frames):
+    frames = make_player_frames(n_frames)
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 25, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+@pytest.fixture
+def in_process_pool(monkeypatch):
+    import detector as detector_module
+    monkeypatch.setattr(detector_module, 'ProcessPoolExecutor', InProcessExecutor)
+    monkeypatch.setattr(detector_module, 'set_torch_threads', lambda threads=None: threads)
+    return detector_module
+
+
+@pytest.mark.parametrize('inexact_seek', [False, True])
+def test_sharded_timeline_matches_serial(fake_detector, in_process_pool, monkeypatch, tmp_path, inexact_seek):
+    video = write_clip(tmp_path / 'clip.avi', 120)
+    if inexact_seek:
+        open_video = in_process_pool.FootballPlayerDetector.open_video
+        monkeypatch.setattr(in_process_pool.FootballPlayerDetector, 'open_video',
+                            lambda self, *args, **kwargs: InexactSeekCapture(open_video(self, *args, **kwargs)))
+
+    serial, _ = fake_detector()
+    serial.process_video_first_pass(video, show_video=False, timeline_path=str(tmp_path / 'serial.npz'))
+    sharded, _ = fake_detector()
+    sharded.process_video_first_pass(video, show_video=False, timeline_path=str(tmp_path / 'sharded.npz'),
+                                     num_workers=3, overlap_frames=10)
+
+    expected = TrackTimeline.load(str(tmp_path / 'serial.npz'))
+    actual = TrackTimeline.load(str(tmp_path / 'sharded.npz'))
+    assert expected.total_frames == 120
+    assert_same_tracks(actual, expected)
+    assert sharded.detected_player_ids == serial.detected_player_ids
+
+
+def test_short_video_keeps_frame_cache(fake_detector, in_process_pool, tmp_path):
+    video = write_clip(tmp_path / 'short.avi', 20)
+    detector, _ = fake_detector()
+    frame_cache = FrameCache(str(tmp_path), max_bytes=1024 ** 3)
+
+    detector.process_video_first_pass(video, show_video=False, timeline_path=str(tmp_path / 'short.npz'),
+                                      num_workers=2, overlap_frames=10, frame_cache=frame_cache)
+
+    assert os.path.exists(get_frame_cache_meta_path(video))
+    assert frame_cache.open(video).frame_count == 20
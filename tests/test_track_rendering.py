@@ -0,0 +1,57 @@
+"""
+Video anotado dibujado desde el timeline (sin modelos)
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from track_rendering import color_for_id, render_timeline_video
+from track_timeline import TrackTimeline
+from conftest import make_player_frames
+
+
+def write_video(path, frames, fps=25):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def test_colors_are_stable_and_keep_global_random_state():
+    np.random.seed(123)
+    expected = np.random.rand()
+
+    np.random.seed(123)
+    colors = {}
+    first = color_for_id(7, colors)
+    assert np.random.rand() == expected
+
+    assert color_for_id(7) == first
+    assert colors == {7: first}
+    assert all(50 <= channel < 255 for channel in first)
+
+
+def test_render_timeline_video(tmp_path):
+    video = tmp_path / 'penalty_1_temp.mp4'
+    write_video(video, make_player_frames(20))
+    timeline = TrackTimeline()
+    for frame_idx in range(20):
+        timeline.add(frame_idx, [(1, 100 + frame_idx, 100, 140 + frame_idx, 180, 0.9)])
+    timeline_path = str(tmp_path / 'penalty_1_temp_tracks.npz')
+    timeline.save(timeline_path, str(video))
+
+    output = str(tmp_path / 'penalty_1_detected.mp4')
+    assert render_timeline_video(str(video), output, timeline_path) == output
+
+    cap = cv2.VideoCapture(output)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 20
+    cap.release()
+
+
+def test_render_without_timeline_fails(tmp_path):
+    video = tmp_path / 'penalty_1_temp.mp4'
+    write_video(video, make_player_frames(2))
+    with pytest.raises(ValueError):
+        render_timeline_video(str(video), str(tmp_path / 'out.mp4'), str(tmp_path / 'missing.npz'))
@@ -0,0 +1,156 @@
+"""
+TrackTimeline: unión de segmentos de la primera pasada por segmentos
+
+Cada segmento se trackea por separado (IDs locales) igual que en
+_first_pass_segment_worker; al unirlos deben quedar los mismos tracks
+que en la pasada en serie.
+"""
+
+import numpy as np
+
+from detector import PlayerTracker
+from track_timeline import TrackTimeline
+
+
+def make_detections(n_frames):
+    """
+    Detecciones sintéticas por frame: jugadores que entran, salen y cruzan
+    los límites de los segmentos
+
+    Returns:
+        Lista por frame de arrays (N, 5)
+    """
+    players = [
+        (0, n_frames, (100, 100), (3, 0)),    # todo el video
+        (0, 45, (400, 200), (0, 2)),          # sale en el primer segmento
+        (50, n_frames, (600, 80), (-2, 1)),   # entra dentro del solapamiento
+        (70, 130, (250, 300), (1, -1)),       # entra en el segundo segmento
+    ]
+    frames = []
+    for frame_idx in range(n_frames):
+        rows = []
+        for start, end, (x, y), (vx, vy) in players:
+            if start <= frame_idx < end:
+                t = frame_idx - start
+                cx, cy = x + vx * t, y + vy * t
+                rows.append([cx - 20, cy - 40, cx + 20, cy + 40, 0.8])
+        frames.append(np.array(rows, dtype=np.float32).reshape(-1, 5))
+    return frames
+
+
+def track_range(detections, start, end):
+    """Trackea [start, end) con un tracker nuevo (IDs locales)"""
+    tracker = PlayerTracker(max_distance=80, max_frames_lost=15)
+    timeline = TrackTimeline()
+    for frame_idx in range(start, end):
+        timeline.add(frame_idx, tracker.update(detections[frame_idx]))
+    return timeline
+
+
+def assert_same_tracks(actual, expected):
+    """Mismas cajas por frame y una correspondencia 1 a 1 entre IDs"""
+    actual._compact()
+    expected._compact()
+    np.testing.assert_array_equal(actual.frames, expected.frames)
+    assert actual.total_frames == expected.total_frames
+
+    mapping = {}
+    for frame in np.unique(expected.frames):
+        a = np.flatnonzero(actual.frames == frame)
+        b = np.flatnonzero(expected.frames == frame)
+        a = a[np.lexsort(actual.bboxes[a].T[::-1])]
+        b = b[np.lexsort(expected.bboxes[b].T[::-1])]
+        np.testing.assert_array_equal(actual.bboxes[a], expected.bboxes[b])
+        for i, j in zip(a, b):
+            assert mapping.setdefault(int(expected.track_ids[j]), int(actual.track_ids[i])) == actual.track_ids[i]
+    assert len(set(mapping.values())) == len(mapping)
+
+
+def test_stitch_matches_serial_tracking():
+    detections = make_detections(150)
+    serial = track_range(detections, 0, 150)
+
+    overlap = 30
+    core_starts = [0, 60, 110]
+    ends = core_starts[1:] + [150]
+    segments = [(core_start, track_range(detections, max(0, core_start - overlap), end))
+                for core_start, end in zip(core_starts, ends)]
+
+    stitched = TrackTimeline.stitch(segments)
+
+    assert_same_tracks(stitched, serial)
+    assert stitched.unique_track_ids() == {1, 2, 3, 4}
+
+
+def test_stitch_keeps_overlap_boxes_from_previous_segment():
+    detections = make_detections(100)
+    first = track_range(detections, 0, 60)
+    second = track_range(detections, 30, 100)
+    # El segundo segmento ve el solapamiento con cajas corridas (IoU alto)
+    second._compact()
+    overlap = second.frames < 60
+    second.bboxes[overlap] += 2
+
+    stitched = TrackTimeline.stitch([(0, first), (60, second)])
+    stitched_overlap = (stitched.frames >= 30) & (stitched.frames < 60)
+    first_overlap = first.frames >= 30
+
+    np.testing.assert_array_equal(stitched.bboxes[stitched_overlap], first.bboxes[first_overlap])
+    assert len(stitched.frames) == len(first.frames) + int((~overlap).sum())
+
+
+def test_stitch_does_not_merge_tracks_below_min_iou():
+    first = TrackTimeline()
+    second = TrackTimeline()
+    for frame_idx in range(20):
+        first.add(frame_idx, [(1, 100, 100, 140, 180, 0.9)])
+    for frame_idx in range(10, 30):
+        # Otro jugador lejos durante el solapamiento
+        second.add(frame_idx, [(1, 400, 100, 440, 180, 0.9)])
+
+    stitched = TrackTimeline.stitch([(0, first), (20, second)])
+
+    assert stitched.unique_track_ids() == {1, 2}
+    assert set(stitched.track_ids[stitched.frames >= 20].tolist()) == {2}
+
+
+def test_timeline_save_load_roundtrip(tmp_path):
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'video')
+    timeline = track_range(make_detections(60), 0, 60)
+    timeline.fps = 29.97
+    path = str(tmp_path / 'video_tracks.npz')
+    timeline.save(path, str(video))
+
+    loaded = TrackTimeline.load(path, str(video))
+    np.testing.assert_array_equal(loaded.frames, timeline.frames)
+    np.testing.assert_array_equal(loaded.track_ids, timeline.track_ids)
+    np.testing.assert_array_equal(loaded.bboxes, timeline.bboxes)
+    assert loaded.total_frames == timeline.total_frames
+    assert loaded.fps == 29.97
+    assert loaded.select(loaded.unique_track_ids()).fps == 29.97
+
+    video.write_bytes(b'otro video')
+    assert TrackTimeline.load(path, str(video)) is None
+
+
+def test_timeline_without_fps_loads_as_unknown(tmp_path):
+    """Sidecars guardados antes de guardar los FPS: la segunda pasada los lee del video"""
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'video')
+    path = str(tmp_path / 'video_tracks.npz')
+    track_range(make_detections(10), 0, 10).save(path, str(video))
+
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files if name != 'fps'}
+    np.savez(path, **arrays)
+
+    assert TrackTimeline.load(path, str(video)).fps == 0.0
+
+
+def test_stitch_keeps_fps():
+    detections = make_detections(60)
+    first, second = track_range(detections, 0, 40), track_range(detections, 20, 60)
+    first.fps = second.fps = 25.0
+
+    assert TrackTimeline.stitch([(0, first), (30, second)]).fps == 25.0
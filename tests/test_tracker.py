@@ -0,0 +1,160 @@
+"""
+PlayerTracker con asignación húngara vs el tracker greedy original
+
+Los escenarios son trayectorias sintéticas sin ambigüedad (cruces,
+oclusiones, salidas de cuadro): en ellas ambos trackers deben asignar
+exactamente los mismos IDs.
+"""
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+from detector import PlayerTracker
+
+
+class GreedyTracker:
+    """Tracker original (asignación greedy por distancia sobre un dict de tracks)"""
+
+    def __init__(self, max_distance=100, max_frames_lost=10):
+        self.max_distance = max_distance
+        self.max_frames_lost = max_frames_lost
+        self.tracks = {}
+        self.next_id = 1
+
+    def update(self, detections):
+        if not detections:
+            for track_id in list(self.tracks):
+                self.tracks[track_id]['frames_lost'] += 1
+                if self.tracks[track_id]['frames_lost'] > self.max_frames_lost:
+                    del self.tracks[track_id]
+            return []
+
+        centers = np.array([((d[0] + d[2]) / 2, (d[1] + d[3]) / 2) for d in detections])
+        assignments = []
+        assigned_detections = set()
+
+        if self.tracks:
+            track_ids = list(self.tracks)
+            distances = cdist(centers, np.array([self.tracks[tid]['center'] for tid in track_ids]))
+            assigned_tracks = set()
+            for det_idx, track_idx in zip(*np.unravel_index(np.argsort(distances.ravel()), distances.shape)):
+                if (det_idx not in assigned_detections and track_idx not in assigned_tracks and
+                        distances[det_idx, track_idx] < self.max_distance):
+                    assignments.append((det_idx, track_ids[track_idx]))
+                    assigned_detections.add(det_idx)
+                    assigned_tracks.add(track_idx)
+
+        for det_idx, track_id in assignments:
+            self.tracks[track_id].update(center=tuple(centers[det_idx]), bbox=tuple(detections[det_idx][:4]),
+                                         frames_lost=0, conf=detections[det_idx][4])
+
+        for det_idx, detection in enumerate(detections):
+            if det_idx not in assigned_detections:
+                self.tracks[self.next_id] = {'center': tuple(centers[det_idx]), 'bbox': tuple(detection[:4]),
+                                             'frames_lost': 0, 'conf': detection[4]}
+                assignments.append((det_idx, self.next_id))
+                self.next_id += 1
+
+        assigned_ids = {tid for _, tid in assignments}
+        for track_id in self.tracks:
+            if track_id not in assigned_ids:
+                self.tracks[track_id]['frames_lost'] += 1
+        for track_id in list(self.tracks):
+            if self.tracks[track_id]['frames_lost'] > self.max_frames_lost:
+                del self.tracks[track_id]
+
+        return [(track_id, *self.tracks[track_id]['bbox'], self.tracks[track_id]['conf'])
+                for _, track_id in assignments]
+
+
+def box(cx, cy, conf=0.9, w=40, h=80):
+    return (cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, conf)
+
+
+def run_both(frames, **kwargs):
+    """
+    Ejecuta ambos trackers sobre la misma secuencia
+
+    Returns:
+        Lista por frame de ({caja: id} nuevo, {caja: id} greedy)
+    """
+    tracker, reference = PlayerTracker(**kwargs), GreedyTracker(**kwargs)
+    results = []
+    for detections in frames:
+        new = {tuple(row[1:5]): row[0] for row in tracker.update(detections)}
+        old = {tuple(row[1:5]): row[0] for row in reference.update(list(detections))}
+        results.append((new, old))
+    return results
+
+
+def assert_same_ids(frames, **kwargs):
+    for frame_idx, (new, old) in enumerate(run_both(frames, **kwargs)):
+        assert new == old, f"IDs distintos en el frame {frame_idx}: {new} vs {old}"
+
+
+def test_crossing_players_keep_their_ids():
+    # Dos jugadores que se cruzan en horizontal a distinta altura
+    frames = [[box(100 + 10 * t, 200), box(400 - 10 * t, 260)] for t in range(31)]
+    assert_same_ids(frames)
+
+    new, _ = run_both(frames)[-1]
+    assert new[box(400, 200)[:4]] == 1
+    assert new[box(100, 260)[:4]] == 2
+
+
+def test_occlusion_recovers_id_within_max_frames_lost():
+    frames = [[box(100 + 5 * t, 200), box(300, 200)] for t in range(10)]
+    # El primer jugador queda oculto 6 frames y reaparece cerca
+    frames += [[box(300, 200)] for _ in range(6)]
+    frames += [[box(160, 200), box(300, 200)] for _ in range(5)]
+    assert_same_ids(frames, max_frames_lost=10)
+
+    new, _ = run_both(frames, max_frames_lost=10)[-1]
+    assert sorted(new.values()) == [1, 2]
+
+
+def test_track_expires_after_max_frames_lost():
+    frames = [[box(100, 200)] for _ in range(5)]
+    frames += [[] for _ in range(4)]
+    frames += [[box(100, 200)]]
+    assert_same_ids(frames, max_frames_lost=3)
+
+    new, _ = run_both(frames, max_frames_lost=3)[-1]
+    assert list(new.values()) == [2]
+
+
+def test_far_detection_starts_new_track():
+    frames = [[box(100, 200)], [box(100, 200), box(600, 200)], [box(250, 200)]]
+    assert_same_ids(frames, max_distance=100)
+
+
+def test_random_sparse_scenes_match_greedy():
+    # Jugadores lejanos entre sí con movimiento chico y desapariciones al azar:
+    # la asignación no es ambigua, así que greedy y húngaro coinciden
+    rng = np.random.default_rng(0)
+    positions = np.array([[100.0 + 250 * i, 150.0 + 120 * (i % 2)] for i in range(5)])
+    frames = []
+    for _ in range(120):
+        positions += rng.uniform(-6, 6, positions.shape)
+        visible = rng.random(len(positions)) > 0.15
+        frames.append([box(x, y, conf=0.5) for (x, y), v in zip(positions, visible) if v])
+    assert_same_ids(frames)
+
+
+def test_optimal_assignment_beats_greedy_on_ambiguous_pair():
+    # El greedy toma el par más cercano primero y deja la otra detección fuera
+    # de max_distance (nuevo ID); la asignación óptima mantiene ambos IDs
+    frames = [[box(100, 200), box(190, 200)], [box(150, 200), box(240, 200)]]
+    new, old = run_both(frames, max_distance=100)[-1]
+    assert sorted(new.values()) == [1, 2]
+    assert sorted(old.values()) == [2, 3]
+
+
+def test_update_accepts_array_and_predict_keeps_ids():
+    tracker = PlayerTracker()
+    tracker.update(np.array([box(100, 200), box(300, 200)], dtype=np.float32))
+    tracker.update(np.array([box(110, 200), box(300, 210)], dtype=np.float32))
+
+    predicted = tracker.predict()
+    assert [row[0] for row in predicted] == [1, 2]
+    assert np.allclose(predicted[0][1:5], np.array(box(120, 200)[:4]))
@@ -0,0 +1,163 @@
+"""
+Poses por track calculadas sobre los tracks de la primera pasada
+
+Guarda, por (frame, track_id), los 17 keypoints [x, y, conf] en coordenadas
+del video original, y hasta qué frame está calculado cada track (cobertura).
+Con las poses de los tracks seleccionados, la segunda pasada se reduce a
+elegir el candidato de cada frame sin decodificar el video ni ejecutar pose.
+"""
+
+import os
+import numpy as np
+
+from track_timeline import _video_signature
+
+POSES_SUFFIX = '_poses.npz'
+
+
+def get_poses_path(video_path):
+    """
+    Ruta del sidecar de poses asociado a un video subido
+    (ej: penalty_5_temp.mp4 -> penalty_5_temp_poses.npz)
+    """
+    base, _ = os.path.splitext(video_path)
+    return f"{base}{POSES_SUFFIX}"
+
+
+class TrackPoseStore:
+    def __init__(self):
+        """
+        Poses por track en arrays planos ordenados por (frame, track_id):
+            frames:    (N,) int32
+            track_ids: (N,) int32
+            keypoints: (N, 17, 3) float32 con NaN en keypoints no detectados
+        y coverage {track_id: frames}: las poses del track están calculadas
+        en todos los frames [0, frames) donde aparece
+        """
+        self.frames = np.empty(0, dtype=np.int32)
+        self.track_ids = np.empty(0, dtype=np.int32)
+        self.keypoints = np.empty((0, 17, 3), dtype=np.float32)
+        self.coverage = {}
+
+        self._pending = []
+
+    def __len__(self):
+        self._compact()
+        return len(self.frames)
+
+    def add(self, frame_idx, track_id, keypoints):
+        """
+        Agrega la pose de un track en un frame (keypoints (17, 3))
+        """
+        self._pending.append((frame_idx, track_id, keypoints))
+
+    def set_coverage(self, track_ids, n_frames):
+        """
+        Marca los tracks como calculados en sus apariciones de [0, n_frames)
+        """
+        for track_id in track_ids:
+            self.coverage[int(track_id)] = max(self.coverage.get(int(track_id), 0), int(n_frames))
+
+    def _compact(self):
+        if not self._pending:
+            return
+        frames, track_ids, keypoints = zip(*self._pending)
+        self._pending = []
+        self.frames = np.concatenate([self.frames, np.asarray(frames, dtype=np.int32)])
+        self.track_ids = np.concatenate([self.track_ids, np.asarray(track_ids, dtype=np.int32)])
+        self.keypoints = np.concatenate([self.keypoints, np.asarray(keypoints, dtype=np.float32).reshape(-1, 17, 3)])
+
+        index = np.lexsort((self.track_ids, self.frames))
+        self.frames = self.frames[index]
+        self.track_ids = self.track_ids[index]
+        self.keypoints = self.keypoints[index]
+
+    def covered_frames(self, track_ids):
+        """
+        Frames iniciales en los que todos los tracks indicados tienen pose (0 si falta alguno)
+        """
+        return min((self.coverage.get(int(track_id), 0) for track_id in track_ids), default=0)
+
+    def merge(self, other):
+        """
+        Incorpora las poses de otro store; por track se queda con el de mayor cobertura
+        """
+        self._compact()
+        other._compact()
+        replaced = [track_id for track_id, frames in other.coverage.items()
+                    if frames > self.coverage.get(track_id, 0)]
+        if not replaced:
+            return
+
+        keep = ~np.isin(self.track_ids, replaced)
+        incoming = np.isin(other.track_ids, replaced)
+        for frame_idx, track_id, keypoints in zip(other.frames[incoming], other.track_ids[incoming],
+                                                  other.keypoints[incoming]):
+            self._pending.append((frame_idx, track_id, keypoints))
+        self.frames = self.frames[keep]
+        self.track_ids = self.track_ids[keep]
+        self.keypoints = self.keypoints[keep]
+        for track_id in replaced:
+            self.coverage[track_id] = other.coverage[track_id]
+        self._compact()
+
+    def frame_keypoints(self, frame_idx, track_ids=None):
+        """
+        Poses de un frame como {track_id: keypoints (17, 3)}
+        """
+        self._compact()
+        start, end = np.searchsorted(self.frames, [frame_idx, frame_idx + 1])
+        return {
+            int(track_id): keypoints
+            for track_id, keypoints in zip(self.track_ids[start:end], self.keypoints[start:end])
+            if track_ids is None or track_id in track_ids
+        }
+
+    def save(self, path, video_path):
+        """
+        Guarda las poses como .npz comprimido
+
+        Args:
+            path: Ruta del sidecar
+            video_path: Video de origen (se guarda su firma para validar al cargar)
+        """
+        self._compact()
+        covered_ids = np.asarray(sorted(self.coverage), dtype=np.int32)
+        np.savez_compressed(
+            path,
+            frames=self.frames,
+            track_ids=self.track_ids,
+            keypoints=self.keypoints,
+            covered_ids=covered_ids,
+            covered_frames=np.asarray([self.coverage[track_id] for track_id in covered_ids], dtype=np.int64),
+            video_signature=_video_signature(video_path)
+        )
+
+    @classmethod
+    def load(cls, path, video_path=None):
+        """
+        Carga las poses desde disco
+
+        Args:
+            path: Ruta del sidecar
+            video_path: Si se indica, se verifica que el sidecar corresponda a este video
+
+        Returns:
+            TrackPoseStore o None si no existe o no corresponde al video
+        """
+        if not path or not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            if video_path is not None and not np.array_equal(
+                    data['video_signature'], _video_signature(video_path)):
+                return None
+
+            store = cls()
+            store.frames = data['frames']
+            store.track_ids = data['track_ids']
+            store.keypoints = data['keypoints']
+            store.coverage = {int(track_id): int(frames)
+                              for track_id, frames in zip(data['covered_ids'], data['covered_frames'])}
+
+        return store
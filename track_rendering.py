@@ -0,0 +1,191 @@
+"""
+Video anotado de la primera pasada dibujado desde el timeline de tracks
+
+Dibuja las cajas e IDs guardados por la primera pasada (track_timeline.py)
+sobre el video original sin cargar los modelos ni crear el detector, así el
+servidor puede generar el MP4 recién cuando se pide.
+"""
+
+import cv2
+import numpy as np
+
+from track_timeline import TrackTimeline
+from video_pipeline import VideoPipeline
+
+# Codecs en orden de preferencia (H.264 tiene mejor compatibilidad con navegadores)
+VIDEO_CODECS = ('H264', 'avc1', 'mp4v')
+
+
+def color_for_id(track_id, colors=None):
+    """
+    Color único y consistente para cada ID (el mismo en todos los procesos)
+
+    Args:
+        track_id: ID del track
+        colors: Diccionario {track_id: color} opcional para no recalcularlo
+    """
+    if colors is not None and track_id in colors:
+        return colors[track_id]
+
+    # RandomState propio: no cambia el estado global de np.random
+    rng = np.random.RandomState(track_id)
+    color = tuple(int(rng.randint(50, 255)) for _ in range(3))
+    if colors is not None:
+        colors[track_id] = color
+    return color
+
+
+def draw_tracked_players(frame, tracked_players, colors=None):
+    """
+    Dibuja jugadores con IDs consistentes
+
+    Args:
+        frame: Frame BGR (no se modifica)
+        tracked_players: Lista [(track_id, x1, y1, x2, y2, conf), ...]
+        colors: Caché de colores por ID (ver color_for_id)
+
+    Returns:
+        Copia del frame con las cajas dibujadas
+    """
+    frame_with_detections = frame.copy()
+
+    for track_id, x1, y1, x2, y2, conf in tracked_players:
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+
+        # Color único para cada ID
+        color = color_for_id(track_id, colors)
+
+        # Dibujar caja
+        cv2.rectangle(frame_with_detections, (x1, y1), (x2, y2), color, 2)
+
+        # Etiqueta con fondo del color del track
+        label = f'Jugador ID-{track_id}: {conf:.2f}'
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+        cv2.rectangle(frame_with_detections,
+                      (x1, y1 - label_size[1] - 10),
+                      (x1 + label_size[0] + 5, y1),
+                      color, -1)
+        cv2.putText(frame_with_detections, label, (x1 + 2, y1 - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+        # Punto central
+        cv2.circle(frame_with_detections, ((x1 + x2) // 2, (y1 + y2) // 2), 3, color, -1)
+
+    return frame_with_detections
+
+
+def render_first_pass_frame(frame, tracked_players, frame_idx, total_frames, colors=None):
+    """
+    Dibuja tracks e información del frame para el video de la primera pasada
+    """
+    frame_with_detections = draw_tracked_players(frame, tracked_players, colors)
+
+    # Información del frame
+    info_text = f"Frame: {frame_idx+1}/{total_frames} | Jugadores: {len(tracked_players)} | YOLOv11"
+    cv2.putText(frame_with_detections, info_text, (10, 30),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    # Lista de IDs detectados
+    if tracked_players:
+        ids_text = f"IDs activos: {', '.join([str(tid) for tid, _, _, _, _, _ in tracked_players])}"
+        cv2.putText(frame_with_detections, ids_text, (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+
+    return frame_with_detections
+
+
+def create_video_writer(output_path, fps, width, height):
+    """
+    Crea el writer del video anotado con el primer codec disponible
+
+    Raises:
+        RuntimeError: Si ningún codec de VIDEO_CODECS puede escribir output_path
+    """
+    for codec in VIDEO_CODECS:
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+        if writer.isOpened():
+            return writer
+        writer.release()
+    raise RuntimeError(f"No se pudo crear el video {output_path} (codecs: {', '.join(VIDEO_CODECS)})")
+
+
+def iter_timeline_frames(frames, timeline):
+    """
+    Reproduce un timeline de tracks sobre el video sin ejecutar detección
+
+    Args:
+        frames: Iterable de frames decodificados
+        timeline: TrackTimeline a reproducir
+
+    Yields:
+        (frame, tracks) en orden de frame
+    """
+    timeline_frames = timeline.iter_frames()
+    for frame in frames:
+        _, tracked_players = next(timeline_frames, (None, []))
+        yield frame, tracked_players
+
+
+def render_timeline(video_path, output_path, timeline):
+    """
+    Dibuja un TrackTimeline sobre el video y lo codifica en output_path
+
+    Raises:
+        ValueError: Si no se puede abrir el video
+        RuntimeError: Si no se puede crear el video anotado
+
+    Returns:
+        output_path
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"No se pudo abrir el video: {video_path}")
+
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    print(f"🎨 Renderizando video anotado desde el timeline: {output_path}")
+
+    try:
+        writer = create_video_writer(output_path, fps, width, height)
+    except RuntimeError:
+        cap.release()
+        raise
+
+    colors = {}
+
+    def render(frame, tracked_players, frame_idx):
+        return render_first_pass_frame(frame, tracked_players, frame_idx, total_frames, colors)
+
+    try:
+        with VideoPipeline(cap, writer=writer, render=render) as pipeline:
+            for frame_idx, (frame, tracked_players) in enumerate(
+                    iter_timeline_frames(pipeline.frames(), timeline)):
+                pipeline.write(frame, tracked_players, frame_idx)
+    finally:
+        cap.release()
+        writer.release()
+
+    print(f"✅ Video anotado generado en {pipeline.wall_seconds:.1f}s")
+    return output_path
+
+
+def render_timeline_video(video_path, output_path, timeline_path):
+    """
+    Renderiza el video anotado de la primera pasada a partir del sidecar de tracks
+
+    Args:
+        video_path: Video original
+        output_path: Ruta del video anotado
+        timeline_path: Sidecar de tracks de la primera pasada
+
+    Raises:
+        ValueError: Si no hay tracks de la primera pasada para el video
+    """
+    timeline = TrackTimeline.load(timeline_path, video_path)
+    if timeline is None:
+        raise ValueError(f"No hay tracks de la primera pasada para: {video_path}")
+
+    return render_timeline(video_path, output_path, timeline)
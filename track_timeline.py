@@ -0,0 +1,360 @@
+"""
+Timeline compacto de tracks generado en la primera pasada del detector.
+
+Guarda por frame (frame, track_id, bbox, conf) en un archivo sidecar .npz
+junto al video subido, para que la segunda pasada reproduzca los mismos
+tracks sin volver a ejecutar la detección YOLO.
+"""
+
+import os
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+TIMELINE_SUFFIX = '_tracks.npz'
+
+
+def get_timeline_path(video_path):
+    """
+    Ruta del sidecar de tracks asociado a un video subido
+    (ej: penalty_5_temp.mp4 -> penalty_5_temp_tracks.npz)
+    """
+    base, _ = os.path.splitext(video_path)
+    return f"{base}{TIMELINE_SUFFIX}"
+
+
+def _box_iou(boxes_a, boxes_b):
+    """IoU entre dos conjuntos de cajas (N, 4) y (M, 4) -> (N, M)"""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def _video_signature(video_path):
+    """Tamaño y fecha de modificación del video para invalidar sidecars viejos"""
+    stat = os.stat(video_path)
+    return np.array([stat.st_size, int(stat.st_mtime)], dtype=np.int64)
+
+
+class TrackTimeline:
+    def __init__(self):
+        """
+        Timeline de tracks por frame
+
+        Internamente guarda arrays planos ordenados por frame:
+            frames:    (N,) int32
+            track_ids: (N,) int32
+            bboxes:    (N, 4) float32 [x1, y1, x2, y2]
+            confs:     (N,) float32
+            detected:  (N,) bool, False si la caja fue propagada (detection stride)
+        y los FPS del video (0 = desconocido, ej: sidecars guardados antes de guardarlos)
+        """
+        self.frames = np.empty(0, dtype=np.int32)
+        self.track_ids = np.empty(0, dtype=np.int32)
+        self.bboxes = np.empty((0, 4), dtype=np.float32)
+        self.confs = np.empty(0, dtype=np.float32)
+        self.detected = np.empty(0, dtype=bool)
+        self.total_frames = 0
+        self.fps = 0.0
+
+        # Buffer de escritura (se compacta al guardar)
+        self._pending = []
+
+    def add(self, frame_idx, tracked_players, detected=True):
+        """
+        Agrega los tracks de un frame
+
+        Args:
+            frame_idx: Índice del frame
+            tracked_players: Lista [(track_id, x1, y1, x2, y2, conf), ...]
+            detected: False si las cajas son predicciones del tracker (sin detección)
+        """
+        self.total_frames = max(self.total_frames, frame_idx + 1)
+        if tracked_players:
+            rows = np.asarray(tracked_players, dtype=np.float64).reshape(-1, 6)
+            self._pending.append((frame_idx, rows, detected))
+
+    def _compact(self):
+        if not self._pending:
+            return
+
+        frames = [np.full(len(rows), idx, dtype=np.int32) for idx, rows, _ in self._pending]
+        detected = [np.full(len(rows), flag, dtype=bool) for _, rows, flag in self._pending]
+        rows = np.concatenate([rows for _, rows, _ in self._pending])
+
+        self.frames = np.concatenate([self.frames] + frames)
+        self.track_ids = np.concatenate([self.track_ids, rows[:, 0].astype(np.int32)])
+        self.bboxes = np.concatenate([self.bboxes, rows[:, 1:5].astype(np.float32)])
+        self.confs = np.concatenate([self.confs, rows[:, 5].astype(np.float32)])
+        self.detected = np.concatenate([self.detected] + detected)
+        self._pending = []
+
+        self._keep(np.argsort(self.frames, kind='stable'))
+
+    def _keep(self, index):
+        self.frames = self.frames[index]
+        self.track_ids = self.track_ids[index]
+        self.bboxes = self.bboxes[index]
+        self.confs = self.confs[index]
+        self.detected = self.detected[index]
+
+    def interpolate(self):
+        """
+        Reemplaza las cajas propagadas entre dos detecciones del mismo track
+        por una interpolación lineal entre esas detecciones
+
+        Las cajas propagadas después de la última detección de un track
+        se conservan (extrapolación con velocidad constante).
+        """
+        self._compact()
+        if self.detected.all():
+            return
+
+        for track_id in np.unique(self.track_ids[~self.detected]):
+            idx = np.flatnonzero(self.track_ids == track_id)
+            observed = idx[self.detected[idx]]
+            predicted = idx[~self.detected[idx]]
+            if len(observed) < 2:
+                continue
+
+            # Solo los frames entre la primera y la última detección
+            predicted_frames = self.frames[predicted]
+            inside = predicted[(predicted_frames > self.frames[observed[0]]) &
+                               (predicted_frames < self.frames[observed[-1]])]
+            if len(inside) == 0:
+                continue
+
+            for coord in range(4):
+                self.bboxes[inside, coord] = np.interp(
+                    self.frames[inside], self.frames[observed], self.bboxes[observed, coord])
+
+    def save(self, path, video_path):
+        """
+        Guarda el timeline como .npz comprimido
+
+        Args:
+            path: Ruta del sidecar
+            video_path: Video de origen (se guarda su firma para validar al cargar)
+        """
+        self.interpolate()
+        np.savez_compressed(
+            path,
+            frames=self.frames,
+            track_ids=self.track_ids,
+            bboxes=self.bboxes,
+            confs=self.confs,
+            detected=self.detected,
+            total_frames=np.int64(self.total_frames),
+            fps=np.float64(self.fps),
+            video_signature=_video_signature(video_path)
+        )
+
+    @classmethod
+    def load(cls, path, video_path=None):
+        """
+        Carga un timeline desde disco
+
+        Args:
+            path: Ruta del sidecar
+            video_path: Si se indica, se verifica que el sidecar corresponda a este video
+
+        Returns:
+            TrackTimeline o None si no existe o no corresponde al video
+        """
+        if not path or not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            if video_path is not None and not np.array_equal(
+                    data['video_signature'], _video_signature(video_path)):
+                return None
+
+            timeline = cls()
+            timeline.frames = data['frames']
+            timeline.track_ids = data['track_ids']
+            timeline.bboxes = data['bboxes']
+            timeline.confs = data['confs']
+            timeline.detected = data['detected']
+            timeline.total_frames = int(data['total_frames'])
+            timeline.fps = float(data['fps']) if 'fps' in data.files else 0.0
+
+        return timeline
+
+    def select(self, track_ids):
+        """
+        Retorna un nuevo timeline solo con los tracks indicados
+        """
+        self._compact()
+        mask = np.isin(self.track_ids, np.asarray(list(track_ids), dtype=np.int32))
+
+        timeline = TrackTimeline()
+        timeline.frames = self.frames[mask]
+        timeline.track_ids = self.track_ids[mask]
+        timeline.bboxes = self.bboxes[mask]
+        timeline.confs = self.confs[mask]
+        timeline.detected = self.detected[mask]
+        timeline.total_frames = self.total_frames
+        timeline.fps = self.fps
+        return timeline
+
+    @classmethod
+    def stitch(cls, segments, min_iou=0.5):
+        """
+        Une timelines de segmentos procesados por separado con IDs globales
+
+        Cada segmento empieza overlap frames antes de su core_start, así que
+        comparte esos frames con el segmento anterior. Los tracks locales se
+        asocian a los globales del segmento anterior por IoU medio en ese
+        solapamiento (asignación húngara); los que no se asocian reciben un
+        ID nuevo.
+
+        Args:
+            segments: Lista ordenada de (core_start, TrackTimeline con IDs locales)
+            min_iou: IoU medio mínimo para considerar que dos tracks son el mismo
+
+        Returns:
+            TrackTimeline con IDs globales
+        """
+        stitched = cls()
+        next_id = 1
+
+        for core_start, timeline in segments:
+            timeline._compact()
+            mapping = {}
+
+            if len(stitched.frames) and len(timeline.frames):
+                overlap_start = int(timeline.frames[0])
+                mapping = stitched._match_tracks(timeline, overlap_start, core_start, min_iou)
+
+            for local_id in np.unique(timeline.track_ids).tolist():
+                if local_id not in mapping:
+                    mapping[local_id] = next_id
+                    next_id += 1
+
+            # En el solapamiento quedan las cajas del segmento anterior
+            keep = timeline.frames >= core_start
+            track_ids = [mapping[tid] for tid in timeline.track_ids[keep].tolist()]
+
+            stitched.frames = np.concatenate([stitched.frames, timeline.frames[keep]])
+            stitched.track_ids = np.concatenate([stitched.track_ids, np.array(track_ids, dtype=np.int32)])
+            stitched.bboxes = np.concatenate([stitched.bboxes, timeline.bboxes[keep]])
+            stitched.confs = np.concatenate([stitched.confs, timeline.confs[keep]])
+            stitched.detected = np.concatenate([stitched.detected, timeline.detected[keep]])
+            stitched.total_frames = max(stitched.total_frames, timeline.total_frames)
+            stitched.fps = stitched.fps or timeline.fps
+
+        stitched._keep(np.argsort(stitched.frames, kind='stable'))
+        return stitched
+
+    def _match_tracks(self, other, start, end, min_iou):
+        """
+        Asocia los tracks de other a los de este timeline en los frames [start, end)
+
+        Returns:
+            Diccionario {id en other: id en este timeline}
+        """
+        mine = (self.frames >= start) & (self.frames < end)
+        theirs = (other.frames >= start) & (other.frames < end)
+        my_ids = np.unique(self.track_ids[mine])
+        their_ids = np.unique(other.track_ids[theirs])
+        if len(my_ids) == 0 or len(their_ids) == 0:
+            return {}
+
+        # IoU acumulado por par de tracks a lo largo del solapamiento
+        iou_sum = np.zeros((len(their_ids), len(my_ids)))
+        frames_seen = np.zeros(len(their_ids))
+        for frame in np.unique(other.frames[theirs]):
+            a = np.flatnonzero(theirs & (other.frames == frame))
+            b = np.flatnonzero(mine & (self.frames == frame))
+            rows = np.searchsorted(their_ids, other.track_ids[a])
+            frames_seen[rows] += 1
+            if len(b):
+                cols = np.searchsorted(my_ids, self.track_ids[b])
+                iou_sum[np.ix_(rows, cols)] += _box_iou(other.bboxes[a], self.bboxes[b])
+
+        mean_iou = iou_sum / np.maximum(frames_seen[:, None], 1)
+        rows, cols = linear_sum_assignment(-mean_iou)
+        return {
+            int(their_ids[r]): int(my_ids[c])
+            for r, c in zip(rows, cols) if mean_iou[r, c] >= min_iou
+        }
+
+    def unique_track_ids(self):
+        self._compact()
+        return set(int(tid) for tid in np.unique(self.track_ids))
+
+    def frame_ranges(self):
+        """
+        Retorna (start, end) por frame para indexar los arrays planos
+
+        Returns:
+            Array (total_frames, 2) con los índices [start, end) de cada frame
+        """
+        self._compact()
+        frame_idx = np.arange(self.total_frames)
+        starts = np.searchsorted(self.frames, frame_idx, side='left')
+        ends = np.searchsorted(self.frames, frame_idx, side='right')
+        return np.stack([starts, ends], axis=1)
+
+    def frames_with_tracks(self):
+        """
+        Máscara booleana (total_frames,) de los frames que tienen al menos un track
+        """
+        self._compact()
+        mask = np.zeros(self.total_frames, dtype=bool)
+        mask[self.frames] = True
+        return mask
+
+    def to_overlay(self):
+        """
+        Overlay compacto de cajas e IDs para dibujar en el frontend
+
+        Cada track se divide en segmentos de frames consecutivos. Cada segmento
+        guarda la primera caja en píxeles enteros y las siguientes como deltas
+        respecto de la anterior (la suma acumulada reproduce las cajas).
+
+        Returns:
+            {'total_frames': N, 'tracks': [{'id': 3, 'segments': [
+                {'start': 10, 'length': 25, 'box': [x1, y1, x2, y2],
+                 'deltas': [[dx1, dy1, dx2, dy2], ...]}, ...]}, ...]}
+        """
+        self._compact()
+        boxes = np.rint(self.bboxes).astype(np.int64)
+        tracks = []
+
+        for track_id in np.unique(self.track_ids):
+            idx = np.flatnonzero(self.track_ids == track_id)
+            frames = self.frames[idx]
+            track_boxes = boxes[idx]
+
+            # Cortar donde hay frames sin el track
+            breaks = np.flatnonzero(np.diff(frames) != 1) + 1
+            segments = []
+            for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(idx)]):
+                segments.append({
+                    'start': int(frames[start]),
+                    'length': int(end - start),
+                    'box': track_boxes[start].tolist(),
+                    'deltas': np.diff(track_boxes[start:end], axis=0).tolist()
+                })
+
+            tracks.append({'id': int(track_id), 'segments': segments})
+
+        return {'total_frames': int(self.total_frames), 'tracks': tracks}
+
+    def iter_frames(self):
+        """
+        Itera los tracks frame a frame con el mismo formato que PlayerTracker.update
+
+        Yields:
+            (frame_idx, [(track_id, x1, y1, x2, y2, conf), ...])
+        """
+        ranges = self.frame_ranges()
+        for frame_idx, (start, end) in enumerate(ranges):
+            tracked_players = [
+                (int(self.track_ids[i]), *self.bboxes[i].tolist(), float(self.confs[i]))
+                for i in range(start, end)
+            ]
+            yield frame_idx, tracked_players
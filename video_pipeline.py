@@ -0,0 +1,314 @@
+"""
+Pipeline de video con hilos: decodificación -> inferencia -> codificación
+
+La decodificación (cap.read) y la escritura del video (dibujo + writer.write)
+corren en hilos propios conectados por colas acotadas, de forma que se
+solapan con el tiempo de los modelos. La inferencia sigue en el hilo que
+llama (los modelos no se comparten entre hilos).
+"""
+
+import bisect
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Marca de fin de stream en las colas
+_END = object()
+
+# Límites superiores (ms) de los buckets de los histogramas por etapa; el último
+# bucket acumula todo lo que supera el mayor límite
+HISTOGRAM_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class StageStats:
+    def __init__(self):
+        """
+        Acumula el tiempo ocupado de cada etapa del pipeline (segundos)
+        Es seguro llamarlo desde varios hilos.
+
+        Además del total, cada etapa tiene un histograma del tiempo por muestra
+        (frame decodificado, frame detectado, recorte de pose, frame dibujado...):
+        una llamada por lotes de n muestras suma n muestras de seconds / n.
+        """
+        self.busy = {}
+        self.calls = {}
+        self.samples = {}
+        self.max_seconds = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, samples=1):
+        samples = max(1, int(samples))
+        per_sample_ms = seconds * 1000 / samples
+        with self._lock:
+            self.busy[stage] = self.busy.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+            self.samples[stage] = self.samples.get(stage, 0) + samples
+            self.max_seconds[stage] = max(self.max_seconds.get(stage, 0.0), seconds / samples)
+            histogram = self.histograms.setdefault(stage, [0] * (len(HISTOGRAM_BUCKETS_MS) + 1))
+            histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, per_sample_ms)] += samples
+
+    @contextmanager
+    def time(self, stage, samples=1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, samples)
+
+    def snapshot(self):
+        """
+        Copia serializable (ej: para devolverla desde otro proceso y unirla con merge)
+        """
+        with self._lock:
+            return {
+                'busy': dict(self.busy),
+                'calls': dict(self.calls),
+                'samples': dict(self.samples),
+                'max_seconds': dict(self.max_seconds),
+                'histograms': {stage: list(counts) for stage, counts in self.histograms.items()}
+            }
+
+    def merge(self, snapshot):
+        """
+        Suma las estadísticas de un snapshot (modo por segmentos)
+        """
+        with self._lock:
+            for stage, seconds in snapshot['busy'].items():
+                self.busy[stage] = self.busy.get(stage, 0.0) + seconds
+                self.calls[stage] = self.calls.get(stage, 0) + snapshot['calls'][stage]
+                self.samples[stage] = self.samples.get(stage, 0) + snapshot['samples'][stage]
+                self.max_seconds[stage] = max(self.max_seconds.get(stage, 0.0), snapshot['max_seconds'][stage])
+                histogram = self.histograms.setdefault(stage, [0] * (len(HISTOGRAM_BUCKETS_MS) + 1))
+                for i, count in enumerate(snapshot['histograms'][stage]):
+                    histogram[i] += count
+
+    def _percentile_ms(self, stage, q):
+        """Percentil aproximado: límite superior del bucket que lo contiene"""
+        histogram = self.histograms[stage]
+        target = q * sum(histogram)
+        cumulative = 0
+        for limit, count in zip(HISTOGRAM_BUCKETS_MS, histogram):
+            cumulative += count
+            if cumulative >= target:
+                return min(limit, self.max_seconds[stage] * 1000)
+        return self.max_seconds[stage] * 1000
+
+    def summary(self, frames=None):
+        """
+        Resumen por etapa: tiempo acumulado, tiempo por muestra e histograma
+
+        Args:
+            frames: Frames de video procesados, para el costo de cada etapa por frame
+
+        Returns:
+            {etapa: {'total_s', 'llamadas', 'muestras', 'media_ms', 'p50_ms', 'p95_ms',
+                     'max_ms', 'ms_por_frame', 'histograma_ms'}}
+        """
+        labels = [f"<={limit:g}" for limit in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]:g}"]
+        with self._lock:
+            summary = {}
+            for stage, seconds in self.busy.items():
+                summary[stage] = {
+                    'total_s': round(seconds, 4),
+                    'llamadas': self.calls[stage],
+                    'muestras': self.samples[stage],
+                    'media_ms': round(seconds * 1000 / self.samples[stage], 3),
+                    'p50_ms': round(self._percentile_ms(stage, 0.5), 3),
+                    'p95_ms': round(self._percentile_ms(stage, 0.95), 3),
+                    'max_ms': round(self.max_seconds[stage] * 1000, 3),
+                    'ms_por_frame': round(seconds * 1000 / frames, 3) if frames else None,
+                    'histograma_ms': {label: count for label, count in zip(labels, self.histograms[stage]) if count}
+                }
+            return summary
+
+    def utilisation(self, wall_seconds):
+        """
+        Fracción del tiempo total que cada etapa estuvo ocupada
+
+        La etapa con mayor utilización es el cuello de botella.
+        """
+        if wall_seconds <= 0:
+            return {}
+        with self._lock:
+            return {stage: busy / wall_seconds for stage, busy in self.busy.items()}
+
+
+class FrameReader(threading.Thread):
+    def __init__(self, cap, maxsize=8, stats=None, decode_filter=None, frame_sink=None):
+        """
+        Hilo que decodifica frames hacia una cola acotada
+
+        Args:
+            cap: cv2.VideoCapture abierto
+            maxsize: Frames máximos en cola (backpressure sobre la decodificación)
+            stats: StageStats donde registrar la etapa 'decode'
+            decode_filter: Función frame_idx -> bool; si retorna False el frame
+                se salta con grab() y se entrega como None
+            frame_sink: Función frame -> None llamada en este hilo con cada frame
+                decodificado (ej: caché de frames); etapa 'frame_cache'
+        """
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = stats if stats is not None else StageStats()
+        self.decode_filter = decode_filter
+        self.frame_sink = frame_sink
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def _put(self, item):
+        while not self._stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        frame_idx = 0
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                if self.decode_filter is None or self.decode_filter(frame_idx):
+                    ret, frame = self.cap.read()
+                else:
+                    ret, frame = self.cap.grab(), None
+                self.stats.add('decode', time.perf_counter() - start)
+
+                if ret and frame is not None and self.frame_sink is not None:
+                    with self.stats.time('frame_cache'):
+                        self.frame_sink(frame)
+
+                if not ret or not self._put(frame):
+                    break
+                frame_idx += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
+
+class FrameWriter(threading.Thread):
+    def __init__(self, writer, render=None, maxsize=8, stats=None):
+        """
+        Hilo que dibuja y codifica frames desde una cola acotada
+
+        Args:
+            writer: cv2.VideoWriter abierto
+            render: Función (*args) -> frame a escribir; si es None se escribe args[0]
+            maxsize: Frames máximos en cola (backpressure sobre la inferencia)
+            stats: StageStats donde registrar las etapas 'draw' y 'encode'
+        """
+        super().__init__(daemon=True)
+        self.writer = writer
+        self.render = render
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = stats if stats is not None else StageStats()
+        self.error = None
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                return
+            if self.error is not None:
+                continue
+            try:
+                if self.render is not None:
+                    with self.stats.time('draw'):
+                        frame = self.render(*item)
+                else:
+                    frame = item[0]
+                with self.stats.time('encode'):
+                    self.writer.write(frame)
+            except Exception as e:
+                self.error = e
+
+    def write(self, *args):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(args)
+
+    def close(self):
+        if self.is_alive():
+            self.queue.put(_END)
+            self.join()
+        if self.error is not None:
+            raise self.error
+
+
+class VideoPipeline:
+    def __init__(self, cap, writer=None, render=None, decode_filter=None, queue_size=8, stats=None,
+                 frame_sink=None):
+        """
+        Pipeline decodificación -> inferencia -> codificación con colas acotadas
+
+        Uso:
+            with VideoPipeline(cap, writer, render) as pipeline:
+                for frame in pipeline.frames():
+                    ...inferencia...
+                    pipeline.write(frame, resultados)
+            print(pipeline.utilisation())
+
+        Args:
+            cap: cv2.VideoCapture abierto
+            writer: cv2.VideoWriter opcional
+            render: Función que prepara el frame a escribir en el hilo de codificación
+            decode_filter: Ver FrameReader
+            queue_size: Tamaño de cada cola
+            stats: StageStats compartido con el detector (etapas de inferencia)
+            frame_sink: Ver FrameReader
+        """
+        self.stats = stats if stats is not None else StageStats()
+        self.reader = FrameReader(cap, maxsize=queue_size, stats=self.stats, decode_filter=decode_filter,
+                                  frame_sink=frame_sink)
+        self.writer = FrameWriter(writer, render, maxsize=queue_size, stats=self.stats) if writer else None
+        self.wall_seconds = 0.0
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self.reader.start()
+        if self.writer:
+            self.writer.start()
+        return self
+
+    def frames(self):
+        return iter(self.reader)
+
+    def write(self, *args):
+        if self.writer:
+            self.writer.write(*args)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.reader.stop()
+        try:
+            if self.writer:
+                self.writer.close()
+        except Exception:
+            # No ocultar la excepción original del bloque with
+            if exc_type is None:
+                raise
+        finally:
+            self.wall_seconds = time.perf_counter() - self._start
+        return False
+
+    def utilisation(self):
+        return self.stats.utilisation(self.wall_seconds)